@@ -4,12 +4,22 @@ import time
 from domino_gym import DominoEnv
 from domino_engine import DominoGame
 from sb3_contrib import MaskablePPO
+from domino_mcts import MCTSPlayer
+from domino_endgame import EndgameSolver, endgame_move
+from domino_batch import evaluate_policy
+from domino_profiler import PROFILER, enable, print_report, write_json
 
 # --- CONFIGURACIÓN ---
 NUM_GAMES = 1000            # Número de partidas a simular
 MODEL_PATH = "modelos_domino_mask/domino_pro"
 NUM_PLAYERS = 2            # 1 vs 1 para un combate limpio (IA vs Bot)
 VERBOSE_INTERVAL = 20       # Imprimir progreso cada X partidas
+OPPONENT = "random"         # Rival del jugador 1: "random" o "mcts"
+MCTS_ROLLOUTS = 500         # Iteraciones por jugada si OPPONENT = "mcts"
+ENDGAME_TILES = 14          # Fichas en manos a partir de las que IA y MCTS usan el solver exacto (0 = nunca)
+BATCH_GAMES = 256           # Partidas simultáneas con inferencia por lotes (vs Random con ENDGAME_TILES = 0; 0 = desactivado)
+PROFILE = False             # Desglose del tiempo por fase (motor, máscaras, observaciones, inferencia)
+PROFILE_JSON = "logs_domino_mask/profile_benchmark.json"
 
 class BenchmarkEnv(DominoEnv):
     """
@@ -26,57 +36,40 @@ class BenchmarkEnv(DominoEnv):
         self.game = DominoGame(num_players=self.num_players_override, teams=False)
         return super().reset(seed=seed, options=options)
 
-def main():
-    print("🚀 INICIANDO BENCHMARK DE IA (Headless)")
-    print("=" * 50)
-    
-    # 1. Verificar Modelo
-    if not os.path.exists(MODEL_PATH + ".zip"):
-        print(f"❌ ERROR CRÍTICO: No se encontró el modelo en {MODEL_PATH}.zip")
-        print("   Asegúrate de haber entrenado con el script 'train_domino.py' antes.")
-        return
-
-    print(f"📂 Cargando modelo: {MODEL_PATH} ...")
-    try:
-        model = MaskablePPO.load(MODEL_PATH)
-        print("✅ Modelo cargado correctamente.")
-    except Exception as e:
-        print(f"❌ Error al cargar modelo: {e}")
-        return
-
-    # 2. Crear Entorno de Prueba (1v1)
-    print(f"🆚 Configurando entorno: {NUM_PLAYERS} Jugadores (IA vs Random)")
-    env = BenchmarkEnv(num_players=NUM_PLAYERS)
-
-    # 3. Contadores
+def play_serial(model, env, bot, endgame):
+    """Bucle clásico: una partida tras otra y una inferencia por decisión."""
+    predict = PROFILER.wrap("inference", model.predict) if PROFILE else model.predict
     wins_ai = 0
-    wins_random = 0
-    
-    start_time = time.time()
-
-    print("-" * 50)
-    print("⚔️  COMENZANDO SIMULACIÓN DE PARTIDAS...")
-    print("-" * 50)
-
-    # 4. Bucle de Entrenamiento / Juego
     for game_idx in range(1, NUM_GAMES + 1):
         obs, _ = env.reset()
+        action_masks = env.action_masks()
         done = False
         
         # Bucle de una partida individual
         while not done:
             current_player = env.game.current_player
-            action_masks = env.action_masks()
             
-            if current_player == 0:
+            move = None
+            if current_player == 0 and endgame is not None:
+                # --- FINAL DE PARTIDA: SOLVER EXACTO ---
+                move = endgame_move(endgame, env.game, ENDGAME_TILES)
+
+            if move is not None:
+                action = env._encode_action(move[0], move[1])
+            elif current_player == 0:
                 # --- TURNO DE LA IA ENTRENADA ---
-                action, _ = model.predict(
+                action, _ = predict(
                     obs, 
                     action_masks=action_masks, 
                     deterministic=True # Importante: jugada consistente
                 )
+            elif bot is not None:
+                # --- TURNO DEL BOT DE BÚSQUEDA (MCTS) ---
+                move = bot.choose_move(env.game)
+                action = env._encode_action(move[0], move[1]) if move else 0
             else:
                 # --- TURNO DEL BOT TONTO (Random) ---
+                # Sale de la caché del motor: ya se calculó para action_masks
                 valid_moves = env.game.get_valid_moves(current_player)
                 
                 if valid_moves:
@@ -89,22 +82,70 @@ def main():
                     # La lógica interna del motor detectará que no es válida y pasará
                     action = 0
             
-            # Ejecutar paso
-            obs, reward, done, truncated, info = env.step(action)
+            # Ejecutar paso (devuelve también la máscara del siguiente turno)
+            obs, reward, done, truncated, info, action_masks = env.step_with_mask(action)
         
         # --- FIN DE LA PARTIDA ---
         winner = env.game.winner
         
         if winner == 0:
             wins_ai += 1
-        else:
-            wins_random += 1
 
         # Reportar progreso
         if game_idx % VERBOSE_INTERVAL == 0:
             current_pct = (wins_ai / game_idx) * 100
             print(f"🎮 Partida {game_idx}/{NUM_GAMES} | WinRate IA: {current_pct:.1f}%")
 
+    return wins_ai
+
+
+def main():
+    print("🚀 INICIANDO BENCHMARK DE IA (Headless)")
+    print("=" * 50)
+    
+    # 1. Verificar Modelo
+    if not os.path.exists(MODEL_PATH + ".zip"):
+        print(f"❌ ERROR CRÍTICO: No se encontró el modelo en {MODEL_PATH}.zip")
+        print("   Asegúrate de haber entrenado con el script 'train_domino.py' antes.")
+        return
+
+    print(f"📂 Cargando modelo: {MODEL_PATH} ...")
+    try:
+        model = MaskablePPO.load(MODEL_PATH)
+        print("✅ Modelo cargado correctamente.")
+    except Exception as e:
+        print(f"❌ Error al cargar modelo: {e}")
+        return
+
+    # 2. Crear Entorno de Prueba (1v1)
+    print(f"🆚 Configurando entorno: {NUM_PLAYERS} Jugadores (IA vs {OPPONENT.upper()})")
+    env = BenchmarkEnv(num_players=NUM_PLAYERS)
+    bot = MCTSPlayer(rollouts=MCTS_ROLLOUTS, endgame_tiles=ENDGAME_TILES) if OPPONENT == "mcts" else None
+    endgame = EndgameSolver() if ENDGAME_TILES else None
+
+    # 3. Contadores
+    if PROFILE:
+        enable()
+    start_time = time.time()
+
+    print("-" * 50)
+    print("⚔️  COMENZANDO SIMULACIÓN DE PARTIDAS...")
+    print("-" * 50)
+
+    # 4. Bucle de Entrenamiento / Juego
+    if BATCH_GAMES and OPPONENT == "random" and not ENDGAME_TILES:
+        # Todas las partidas donde le toca a la IA comparten un único forward
+        print(f"⚡ Modo por lotes: {BATCH_GAMES} partidas simultáneas")
+        predict = lambda obs, masks: model.predict(obs, action_masks=masks, deterministic=True)[0]
+        if PROFILE:
+            predict = PROFILER.wrap("inference", predict)
+        wins_ai, _ = evaluate_policy(predict, NUM_GAMES, BATCH_GAMES, NUM_PLAYERS)
+    else:
+        if endgame is not None:
+            print(f"🧩 Solver exacto con {ENDGAME_TILES} fichas en manos o menos (una partida tras otra)")
+        wins_ai = play_serial(model, env, bot, endgame)
+    wins_random = NUM_GAMES - wins_ai
+
     # 5. Resultados Finales
     total_time = time.time() - start_time
     print("-" * 50)
@@ -112,9 +153,16 @@ def main():
     print("-" * 50)
     
     print(f"🏆 IA Entrenada (Jugador 0): {wins_ai} victorias ({(wins_ai/NUM_GAMES)*100:.2f}%)")
-    print(f"🤡 Bot Random   (Jugador 1): {wins_random} victorias ({(wins_random/NUM_GAMES)*100:.2f}%)")
+    bot_label = "MCTS" if OPPONENT == "mcts" else "Random"
+    print(f"🤡 Bot {bot_label:<9}(Jugador 1): {wins_random} victorias ({(wins_random/NUM_GAMES)*100:.2f}%)")
     print(f"⏱️  Tiempo total: {total_time:.2f} segundos")
     print("-" * 50)
+    if PROFILE:
+        report = PROFILER.report()
+        print_report(report)
+        write_json(PROFILE_JSON, report)
+        print(f"📝 Perfil guardado en {PROFILE_JSON}")
+        print("-" * 50)
 
     # Conclusión Senior
     ai_win_rate = wins_ai / NUM_GAMES
@@ -0,0 +1,86 @@
+import random
+import time
+import numpy as np
+from domino_engine import ALL_PIECES
+from domino_gym import DominoEnv, ACTION_TILES, ACTION_SIDES, _TILE_INDEX
+
+# --- CONFIGURACIÓN ---
+NUM_POSITIONS = 2000        # Posiciones de partida muestreadas
+REPEATS = 20                # Repeticiones de la codificación por posición
+ENV_STEPS = 100_000         # Pasos para medir el throughput del entorno
+
+
+# Codificación anterior (búsqueda lineal en all_pieces), solo como referencia
+def legacy_index(ficha):
+    return ALL_PIECES.index(tuple(sorted(ficha)))
+
+
+def legacy_decode(action_idx):
+    return ALL_PIECES[action_idx // 2], 'L' if action_idx % 2 == 0 else 'R'
+
+
+def encode_step_legacy(hand, mesa, valid_moves, action):
+    # Lo que hace DominoEnv por paso: mano + mesa en la observación,
+    # una entrada de máscara por jugada válida y decodificar la acción
+    for f in hand: legacy_index(f)
+    for f in mesa: legacy_index(f)
+    for f, lado in valid_moves: legacy_index(f) * 2 + (lado == 'R')
+    legacy_decode(action)
+
+
+def encode_step_table(hand, mesa, valid_moves, action):
+    for v1, v2 in hand: _TILE_INDEX[v1][v2]
+    for v1, v2 in mesa: _TILE_INDEX[v1][v2]
+    for (v1, v2), lado in valid_moves: _TILE_INDEX[v1][v2] * 2 + (lado == 'R')
+    ACTION_TILES[action], ACTION_SIDES[action]
+
+
+def sample_positions(env, n):
+    positions = []
+    env.reset(seed=0)
+    while len(positions) < n:
+        player = env.game.current_player
+        valid = env.game.get_valid_moves(player)
+        action = env._encode_action(*valid[0]) if valid else 0
+        positions.append((list(env.game.hands[player]), list(env.game.mesa), valid, action))
+        mask = env.action_masks()
+        action = random.choice(np.flatnonzero(mask)) if mask.any() else 0
+        _, _, done, _, _ = env.step(action)
+        if done: env.reset()
+    return positions
+
+
+def time_encoding(fn, positions):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        for hand, mesa, valid, action in positions:
+            fn(hand, mesa, valid, action)
+    return (time.perf_counter() - start) / (REPEATS * len(positions)) * 1e6
+
+
+def time_env(env):
+    env.reset()
+    start = time.perf_counter()
+    for _ in range(ENV_STEPS):
+        mask = env.action_masks()
+        idx = np.flatnonzero(mask)
+        _, _, done, _, _ = env.step(idx[0] if len(idx) else 0)
+        if done: env.reset()
+    return ENV_STEPS / (time.perf_counter() - start)
+
+
+def main():
+    print("🚀 MICRO-BENCHMARK DE CODIFICACIÓN (DominoEnv)")
+    print("=" * 50)
+    random.seed(0)
+    positions = sample_positions(DominoEnv(), NUM_POSITIONS)
+
+    before = time_encoding(encode_step_legacy, positions)
+    after = time_encoding(encode_step_table, positions)
+    print(f"🐢 Búsqueda lineal (antes): {before:.2f} µs de codificación por paso")
+    print(f"⚡ Tablas O(1) (ahora):     {after:.2f} µs de codificación por paso (x{before / after:.1f})")
+    print(f"🎮 DominoEnv completo:      {time_env(DominoEnv()):,.0f} pasos/s")
+
+
+if __name__ == "__main__":
+    main()
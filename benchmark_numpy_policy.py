@@ -0,0 +1,82 @@
+import os
+import random
+import subprocess
+import sys
+import time
+import numpy as np
+from domino_gym import DominoEnv
+from domino_numpy_policy import NumpyPolicy, export_policy
+
+# --- CONFIGURACIÓN ---
+MODEL_PATH = "modelos_domino_mask/domino_pro"
+NPZ_PATH = MODEL_PATH + ".npz"
+NUM_POSITIONS = 5000        # Posiciones de las que salen las entradas de la latencia
+LATENCY_REPEATS = 2000      # Inferencias individuales para medir latencia
+BATCH_SIZE = 256
+
+
+def sample_positions(n, seed=0):
+    random.seed(seed)
+    env = DominoEnv()
+    obs_list, mask_list = [], []
+    obs, _ = env.reset(seed=seed)
+    while len(obs_list) < n:
+        mask = env.action_masks()
+        obs_list.append(obs)
+        mask_list.append(mask)
+        legal = np.flatnonzero(mask)
+        obs, _, done, _, _ = env.step(random.choice(legal) if len(legal) else 0)
+        if done:
+            obs, _ = env.reset()
+    return np.array(obs_list, dtype=np.float32), np.array(mask_list)
+
+
+def startup_seconds(code):
+    # Proceso nuevo: mide importaciones + carga como lo vería un worker o la GUI
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True)
+    return time.perf_counter() - start
+
+
+def latency_us(predict, obs, masks):
+    start = time.perf_counter()
+    for i in range(LATENCY_REPEATS):
+        predict(obs[i % len(obs)], masks[i % len(obs)])
+    return (time.perf_counter() - start) / LATENCY_REPEATS * 1e6
+
+
+def main():
+    print("🚀 RUNTIME NUMPY vs MaskablePPO")
+    print("=" * 50)
+    from sb3_contrib import MaskablePPO
+    model = MaskablePPO.load(MODEL_PATH, device='cpu')
+    export_policy(model, NPZ_PATH)
+    policy = NumpyPolicy(NPZ_PATH)
+    print(f"📦 Exportado {NPZ_PATH} ({os.path.getsize(NPZ_PATH) / 1024:.0f} KB)")
+    # La paridad con MaskablePPO la comprueba tests/test_numpy_policy.py
+    obs, masks = sample_positions(NUM_POSITIONS)
+
+    # 1. Arranque en frío
+    t_sb3 = startup_seconds(f"from sb3_contrib import MaskablePPO; MaskablePPO.load({MODEL_PATH!r}, device='cpu')")
+    t_np = startup_seconds(f"from domino_numpy_policy import NumpyPolicy; NumpyPolicy({NPZ_PATH!r})")
+    print(f"🐢 Arranque MaskablePPO: {t_sb3 * 1000:.0f} ms")
+    print(f"⚡ Arranque NumPy:       {t_np * 1000:.0f} ms (x{t_sb3 / t_np:.1f})")
+
+    # 2. Latencia por decisión y por lote
+    import torch
+    torch.set_num_threads(1)
+    sb3_one = latency_us(lambda o, m: model.predict(o, action_masks=m, deterministic=True), obs, masks)
+    np_one = latency_us(lambda o, m: policy.predict(o, action_masks=m), obs, masks)
+    print(f"🐢 1 decisión MaskablePPO: {sb3_one:.1f} µs")
+    print(f"⚡ 1 decisión NumPy:       {np_one:.1f} µs (x{sb3_one / np_one:.1f})")
+
+    batch_obs, batch_masks = obs[:BATCH_SIZE], masks[:BATCH_SIZE]
+    sb3_batch = latency_us(lambda o, m: model.predict(batch_obs, action_masks=batch_masks, deterministic=True),
+                           obs[:1], masks[:1])
+    np_batch = latency_us(lambda o, m: policy.predict(batch_obs, action_masks=batch_masks), obs[:1], masks[:1])
+    print(f"🐢 Lote de {BATCH_SIZE} MaskablePPO: {sb3_batch:.1f} µs")
+    print(f"⚡ Lote de {BATCH_SIZE} NumPy:       {np_batch:.1f} µs (x{sb3_batch / np_batch:.1f})")
+
+
+if __name__ == "__main__":
+    main()
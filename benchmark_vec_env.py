@@ -0,0 +1,47 @@
+import time
+import numpy as np
+from stable_baselines3.common.vec_env import SubprocVecEnv
+from sb3_contrib.common.maskable.utils import get_action_masks
+from domino_vec_env import DominoVecEnv
+from domino_batch import sample_random_actions
+from train_domino import make_env
+
+# --- CONFIGURACIÓN ---
+SUBPROC_ENVS = 12           # Configuración actual de train_domino.py
+NATIVE_ENVS = [12, 256, 1024]
+STEPS = 2000                # Llamadas a step() por configuración
+
+
+def run(env, steps, rng):
+    """Juega acciones aleatorias válidas y devuelve transiciones por segundo."""
+    env.reset()
+    start = time.time()
+    for _ in range(steps):
+        masks = get_action_masks(env)
+        actions = sample_random_actions(masks, rng)
+        actions[actions < 0] = 0  # Sin jugadas: el entorno pasa solo
+        env.step(actions)
+    total = time.time() - start
+    return env.num_envs * steps / total
+
+
+def main():
+    print("🚀 COMPARATIVA DE THROUGHPUT: SubprocVecEnv vs DominoVecEnv")
+    print("=" * 50)
+    rng = np.random.default_rng(0)
+
+    env = SubprocVecEnv([make_env(i) for i in range(SUBPROC_ENVS)])
+    sps = run(env, STEPS // 4, rng)
+    env.close()
+    print(f"🐢 SubprocVecEnv ({SUBPROC_ENVS} procesos): {sps:,.0f} pasos/s")
+    base = sps
+
+    for n in NATIVE_ENVS:
+        env = DominoVecEnv(n, seed=0)
+        sps = run(env, STEPS, rng)
+        print(f"⚡ DominoVecEnv ({n} partidas, 1 proceso): {sps:,.0f} pasos/s (x{sps / base:.1f})")
+
+
+if __name__ == "__main__":
+    # Requerido para SubprocVecEnv en Windows
+    main()
@@ -0,0 +1,373 @@
+import time
+import numpy as np
+from domino_engine import ALL_PIECES, MAX_PIP, default_hand_size, make_pieces, deal_batch, seeded_deals
+from domino_layout import obs_layout
+
+
+# --- TABLAS PRECALCULADAS (mismo orden que DominoGame.all_pieces) ---
+class PieceTables:
+    """Tablas de NumPy de las fichas de una plantilla (domino_layout.ObsLayout) del doble max_pip."""
+    def __init__(self, max_pip):
+        layout = obs_layout(max_pip)
+        self.pieces = np.array(layout.pieces, dtype=np.int8)                       # (N, 2)
+        self.points = self.pieces.sum(axis=1).astype(np.int32)                    # (N,)
+        self.pip_table = np.zeros((max_pip + 1, layout.num_pieces), dtype=bool)  # pip_table[v, i]: la ficha i tiene el valor v
+        for i, (a, b) in enumerate(layout.pieces):
+            self.pip_table[a, i] = True
+            self.pip_table[b, i] = True
+        self.doubles = np.array([layout.tile_list[d][d] for d in range(max_pip + 1)])  # índice de cada doble
+
+
+_TABLES = {}
+
+
+def piece_tables(max_pip=MAX_PIP):
+    tables = _TABLES.get(max_pip)
+    if tables is None:
+        tables = _TABLES[max_pip] = PieceTables(max_pip)
+    return tables
+
+
+NUM_PIECES = len(ALL_PIECES)
+HAND_SIZE = default_hand_size(MAX_PIP)
+PIECES = piece_tables().pieces               # (55, 2)
+PIECE_POINTS = piece_tables().points         # (55,)
+PIP_TABLE = piece_tables().pip_table         # (10, 55)
+DOUBLE_IDX = piece_tables().doubles          # índice de cada doble 0..9
+
+PASS = -1  # Acción de pasar en step()
+
+
+class BatchDominoGame:
+    """
+    N partidas de DominoGame en arrays de NumPy, avanzadas en bloque.
+    Las acciones usan la codificación de DominoEnv (ficha_idx * 2 + lado,
+    lado 0 = 'L', 1 = 'R') y PASS (-1) para pasar. Como en DominoEnv,
+    max_pip y hand_size eligen el juego de fichas y layout_pip la plantilla
+    de fichas, observaciones y acciones (N = sus fichas, 55 con doble nueve).
+
+    Estado:
+        hands          (N, P, 55) bool
+        mesa           (N, 55)    bool
+        extremos       (N, 2)     int8, -1 mientras la mesa está vacía
+        pass_count     (N,)
+        current_player (N,)
+        winner         (N,)       -1 mientras no hay ganador
+        game_over      (N,)       bool
+    """
+    def __init__(self, num_games, num_players=4, teams=False, seed=None, max_pip=MAX_PIP, hand_size=None,
+                 layout_pip=None):
+        self.num_games = num_games
+        self.num_players = num_players
+        self.teams = teams
+        self.rng = np.random.default_rng(seed)
+        self._rows = np.arange(num_games)
+
+        self.max_pip = max_pip
+        self.hand_size = hand_size or default_hand_size(max_pip)
+        self.layout = obs_layout(max_pip if layout_pip is None else layout_pip)
+        if self.layout.max_pip < max_pip:
+            raise ValueError(f"El doble {max_pip} no cabe en la plantilla del doble {self.layout.max_pip}")
+        self.tables = piece_tables(self.layout.max_pip)
+        # Índice en la plantilla de cada ficha del juego (los repartos barajan las del juego)
+        self._set_index = np.array([self.layout.tile_list[a][b] for a, b in make_pieces(max_pip)])
+        if self.hand_size * num_players > len(self._set_index):
+            raise ValueError(f"No hay fichas para {num_players} manos de {self.hand_size} en el doble {max_pip}")
+
+        n, p = num_games, num_players
+        self.hands = np.zeros((n, p, self.layout.num_pieces), dtype=bool)
+        self.hand_sizes = np.zeros((n, p), dtype=np.int16)
+        self.mesa = np.zeros((n, self.layout.num_pieces), dtype=bool)
+        self.extremos = np.full((n, 2), -1, dtype=np.int8)
+        self.pass_count = np.zeros(n, dtype=np.int16)
+        self.current_player = np.zeros(n, dtype=np.int16)
+        self.winner = np.full(n, -1, dtype=np.int16)
+        self.game_over = np.zeros(n, dtype=bool)
+        self.reset()
+
+    def reset(self, mask=None, seeds=None):
+        """
+        Reparte de nuevo las partidas marcadas en mask (todas si es None).
+        Con seeds (una por partida repartida) el reparto es el de
+        seeded_deals(), el mismo que DominoGame.reset(deal=...) con esa semilla.
+        """
+        rows = self._rows if mask is None else np.flatnonzero(mask)
+        k = len(rows)
+        if k == 0:
+            return
+
+        # 1. Barajar: una permutación por partida en una sola llamada
+        num_pieces = len(self._set_index)
+        if seeds is None:
+            perm, lots = deal_batch(k, self.rng, self.num_players, num_pieces)
+        else:
+            perm, lots = seeded_deals(seeds, num_pieces)
+
+        # 2. Repartir hand_size fichas por jugador (10 con doble nueve)
+        size = self.hand_size
+        hands = np.zeros((k, self.num_players, self.layout.num_pieces), dtype=bool)
+        dealt = self._set_index[perm[:, :self.num_players * size]].reshape(k, self.num_players, size)
+        np.put_along_axis(hands, dealt, True, axis=2)
+
+        self.hands[rows] = hands
+        self.hand_sizes[rows] = size
+        self.mesa[rows] = False
+        self.extremos[rows] = -1
+        self.pass_count[rows] = 0
+        self.winner[rows] = -1
+        self.game_over[rows] = False
+
+        # 3. Decidir quién sale: doble más alto, o sorteo si nadie tiene dobles
+        doubles = hands[:, :, self.tables.doubles[:self.max_pip + 1]]   # (k, P, max_pip + 1)
+        held = doubles.any(axis=1)                                       # (k, max_pip + 1)
+        top = self.max_pip - np.argmax(held[:, ::-1], axis=1)            # doble más alto repartido
+        starter = np.argmax(doubles[np.arange(k), :, top], axis=1)
+        nobody = ~held.any(axis=1)
+        starter[nobody] = lots[nobody] % self.num_players
+        self.current_player[rows] = starter
+
+    def load_game(self, i, game):
+        """Copia el estado de un DominoGame en la partida i del lote."""
+        tiles = self.layout.tile_list
+        self.hands[i] = False
+        for p, hand in game.hands.items():
+            for a, b in hand:
+                self.hands[i, p, tiles[a][b]] = True
+            self.hand_sizes[i, p] = len(hand)
+        self.mesa[i] = False
+        for a, b in game.mesa:
+            self.mesa[i, tiles[a][b]] = True
+        self.extremos[i] = game.extremos
+        self.pass_count[i] = game.pass_count
+        self.current_player[i] = game.current_player
+        self.winner[i] = game.winner
+        self.game_over[i] = game.game_over
+
+    def load_deals(self, hands, starters):
+        """Empieza todas las partidas con manos (N, P, 55) y jugadores de salida (N,) dados."""
+        self.hands[:] = hands
+        self.hand_sizes[:] = hands.sum(axis=2)
+        self.mesa[:] = False
+        self.extremos[:] = -1
+        self.pass_count[:] = 0
+        self.winner[:] = -1
+        self.game_over[:] = False
+        self.current_player[:] = starters
+
+    _STATE_FIELDS = ('hands', 'hand_sizes', 'mesa', 'extremos', 'pass_count', 'current_player', 'winner', 'game_over')
+
+    def get_state(self):
+        """Copia del estado de todas las partidas y del generador, para snapshots."""
+        state = {name: getattr(self, name).copy() for name in self._STATE_FIELDS}
+        state['rng'] = self.rng.bit_generator.state
+        return state
+
+    def set_state(self, state):
+        for name in self._STATE_FIELDS:
+            getattr(self, name)[:] = state[name]
+        self.rng.bit_generator.state = state['rng']
+
+    def current_hands(self):
+        """Mano del jugador en turno de cada partida, (N, 55)."""
+        return self.hands[self._rows, self.current_player]
+
+    def observations(self, out=None):
+        """Observación de DominoEnv para el jugador en turno, (N, 133) con doble nueve."""
+        layout = self.layout
+        obs = np.zeros((self.num_games, layout.obs_size), dtype=np.float32) if out is None else out
+        obs[:] = 0.0
+        obs[:, :layout.num_pieces] = self.current_hands()
+
+        opened = np.flatnonzero(self.extremos[:, 0] != -1)
+        obs[opened, layout.left + self.extremos[opened, 0]] = 1.0
+        obs[opened, layout.right + self.extremos[opened, 1]] = 1.0
+
+        obs[:, layout.board:layout.counts] = self.mesa
+
+        # Cuentas de fichas rivales (asientos 1..3, igual que DominoEnv)
+        if self.num_players == 4:
+            obs[:, layout.counts:layout.counts + 3] = self.hand_sizes[:, 1:4] / self.hand_size
+        elif self.num_players == 2:
+            obs[:, layout.counts] = self.hand_sizes[:, 1] / self.hand_size
+        return obs
+
+    def valid_move_masks(self):
+        """Máscara (N, 110) de jugadas válidas para el jugador en turno (con doble nueve)."""
+        hand = self.current_hands()
+        opened = self.extremos[:, 0] != -1
+        ends = np.maximum(self.extremos, 0)
+        pip_table = self.tables.pip_table
+        num_pieces = self.layout.num_pieces
+
+        moves = np.zeros((self.num_games, num_pieces, 2), dtype=bool)
+        # Mesa vacía: cualquier ficha sale por 'L'
+        moves[:, :, 0] = hand & np.where(opened[:, None], pip_table[ends[:, 0]], True)
+        moves[:, :, 1] = hand & pip_table[ends[:, 1]] & opened[:, None]
+        moves[self.game_over] = False
+        return moves.reshape(self.num_games, num_pieces * 2)
+
+    def step(self, actions, mask=None):
+        """
+        Aplica una acción por partida. Las partidas terminadas, y las que
+        queden fuera de mask si se indica, no se tocan.
+        Devuelve (rewards, dones) con la semántica de DominoGame.step:
+        100 al ganar vaciando la mano, 0 en otro caso y -100 si la ficha no
+        está en la mano del jugador (la partida se marca como terminada).
+        """
+        actions = np.asarray(actions)
+        rewards = np.zeros(self.num_games, dtype=np.float32)
+        dones = self.game_over.copy()
+        active = ~self.game_over
+        if mask is not None:
+            active &= mask
+        player = self.current_player
+
+        passing = active & (actions < 0)
+        playing = active & ~passing
+
+        # --- Pasar ---
+        self.pass_count[passing] += 1
+
+        # --- Jugar ficha ---
+        rows = np.flatnonzero(playing)
+        idx = actions[rows] // 2
+        lado = actions[rows] % 2
+        pl = player[rows]
+
+        in_hand = self.hands[rows, pl, idx]
+        bad = rows[~in_hand]
+        rewards[bad] = -100
+        dones[bad] = True
+        self.game_over[bad] = True
+
+        rows, idx, lado, pl = rows[in_hand], idx[in_hand], lado[in_hand], pl[in_hand]
+        self.hands[rows, pl, idx] = False
+        self.hand_sizes[rows, pl] -= 1
+        self.mesa[rows, idx] = True
+        self.pass_count[rows] = 0
+
+        v1 = self.tables.pieces[idx, 0]
+        v2 = self.tables.pieces[idx, 1]
+        first = self.extremos[rows, 0] == -1
+
+        # Primera ficha: abre ambos extremos
+        r = rows[first]
+        self.extremos[r, 0] = v1[first]
+        self.extremos[r, 1] = v2[first]
+
+        # Resto: conectar por el lado elegido (misma regla que DominoGame.step)
+        rest = ~first
+        r, s = rows[rest], lado[rest]
+        target = self.extremos[r, s]
+        nuevo = np.where(v1[rest] == target, v2[rest], v1[rest])
+        self.extremos[r, s] = nuevo
+
+        # --- Fin de partida ---
+        acted = active & ~self.game_over
+        emptied = acted & (self.hand_sizes[self._rows, player] == 0)
+        self.winner[emptied] = player[emptied]
+        rewards[emptied] = 100
+
+        blocked = acted & ~emptied & (self.pass_count >= self.num_players)
+        if blocked.any():
+            self.winner[blocked] = self._calculate_winner_by_points(blocked)
+
+        finished = emptied | blocked
+        self.game_over[finished] = True
+        dones[finished] = True
+
+        cont = acted & ~finished
+        self.current_player[cont] = (player[cont] + 1) % self.num_players
+        return rewards, dones
+
+    def _calculate_winner_by_points(self, mask):
+        sums = (self.hands[mask] * self.tables.points).sum(axis=2)     # (k, P)
+        if self.teams and self.num_players == 4:
+            t1 = sums[:, 0] + sums[:, 2]
+            t2 = sums[:, 1] + sums[:, 3]
+            return np.where(t1 < t2, 0, 1)
+        return np.argmin(sums, axis=1)
+
+
+def sample_random_actions(masks, rng):
+    """Una acción válida al azar por fila; PASS si la fila no tiene ninguna."""
+    keys = np.where(masks, rng.random(masks.shape), -1.0)
+    actions = np.argmax(keys, axis=1)
+    actions[~masks.any(axis=1)] = PASS
+    return actions
+
+
+def evaluate_policy(predict, num_games, batch_size=256, num_players=2, teams=False, seed=None,
+                    policy_seat=0, max_pip=MAX_PIP, layout_pip=None):
+    """
+    Juega num_games partidas de la política (asiento policy_seat) contra bots
+    aleatorios, con batch_size partidas avanzando a la vez. En cada paso se
+    juntan todas las partidas donde le toca a la política y se llama una sola
+    vez a predict(obs (k, 133), masks (k, 110)) -> acciones (k,).
+    max_pip / layout_pip: juego de fichas y plantilla, como en BatchDominoGame.
+    Devuelve (victorias de la política, llamadas a predict).
+    """
+    batch_size = min(batch_size, num_games)
+    batch = BatchDominoGame(batch_size, num_players, teams, seed=seed, max_pip=max_pip, layout_pip=layout_pip)
+    rng = np.random.default_rng(None if seed is None else seed + 1)
+    active = np.ones(batch_size, dtype=bool)
+    started = batch_size
+    wins = 0
+    calls = 0
+
+    while active.any():
+        masks = batch.valid_move_masks()
+        has_moves = masks.any(axis=1)
+        actions = np.full(batch_size, PASS, dtype=np.int64)
+
+        on_turn = active & has_moves & (batch.current_player == policy_seat)
+        if on_turn.any():
+            obs = batch.observations()[on_turn]
+            actions[on_turn] = predict(obs, masks[on_turn])
+            calls += 1
+
+        bots = active & has_moves & ~on_turn
+        if bots.any():
+            actions[bots] = sample_random_actions(masks[bots], rng)
+
+        batch.step(actions, mask=active)
+
+        finished = active & batch.game_over
+        if finished.any():
+            winners = batch.winner[finished]
+            if teams and num_players == 4:
+                wins += int((winners % 2 == policy_seat % 2).sum())
+            else:
+                wins += int((winners == policy_seat).sum())
+
+            # Reponer partidas hasta llegar a num_games
+            rows = np.flatnonzero(finished)
+            refill = rows[:max(0, num_games - started)]
+            started += len(refill)
+            active[rows] = False
+            if len(refill):
+                refill_mask = np.zeros(batch_size, dtype=bool)
+                refill_mask[refill] = True
+                batch.reset(refill_mask)
+                active[refill] = True
+
+    return wins, calls
+
+
+if __name__ == "__main__":
+    # Throughput de referencia con jugadores aleatorios
+    NUM_GAMES = 4096
+    STEPS = 200
+    batch = BatchDominoGame(NUM_GAMES, num_players=4, seed=0)
+    rng = np.random.default_rng(1)
+
+    start = time.time()
+    finished = 0
+    for _ in range(STEPS):
+        actions = sample_random_actions(batch.valid_move_masks(), rng)
+        _, dones = batch.step(actions)
+        finished += int(dones.sum())
+        batch.reset(dones)
+    total = time.time() - start
+    print(f"⚡ {NUM_GAMES} partidas en paralelo: {NUM_GAMES * STEPS / total:,.0f} pasos/s, "
+          f"{finished / total:,.0f} partidas/s")
@@ -0,0 +1,223 @@
+import glob
+import os
+import time
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, IterableDataset, get_worker_info
+from domino_batch import BatchDominoGame, PASS, evaluate_policy
+from domino_engine import MAX_PIP
+from domino_layout import obs_layout
+from domino_records import GameArchive, FLAG_TEAMS, hands_from_deals, move_actions, record_hand_size, record_max_pip
+from domino_symmetry import augment_batch
+
+# --- CONFIGURACIÓN ---
+# Mismo juego que train_domino.py (4 jugadores sin equipos): la red preentrenada
+# arranca PPO con las observaciones que verá allí (cuentas de los tres rivales)
+ARCHIVE_FORMAT = "ffa"
+ARCHIVE_NUM_PLAYERS = 4
+ARCHIVE_PATH = "partidas/mcts_ffa.dom"          # Se genera con tournament.py si no existe
+ARCHIVE_GAMES = 2000
+ARCHIVE_AGENTS = ["mcts:200"] * ARCHIVE_NUM_PLAYERS
+DATASET_DIR = "datasets/bc_mcts_ffa"
+OUTPUT_MODEL = "modelos_domino_mask/domino_bc"
+WINNERS_ONLY = True         # Clonar solo las jugadas del bando que ganó cada partida
+SHARD_SIZE = 1 << 20        # Muestras por shard
+EPOCHS = 10
+BATCH_SIZE = 1024
+LEARNING_RATE = 1e-3
+LOADER_WORKERS = 2
+# Renombrar los puntos de cada muestra al azar (domino_symmetry). Desactivado: la
+# política pierde la noción de soltar las fichas gordas, que decide los cierres
+AUGMENT = False
+EVAL_GAMES = 2000
+# Las observaciones se guardan como uint8 * OBS_SCALE: los extremos y las fichas valen 0/1
+# y las cuentas de los rivales son múltiplos de 1/7 (doble seis) o 1/10 (doble nueve)
+OBS_SCALE = 70
+LAYOUT = obs_layout(MAX_PIP)    # Plantilla de doble nueve para cualquier juego de fichas
+
+
+# --- 1. DATASET: repetir partidas grabadas y extraer (obs, máscara, acción) ---
+def iter_samples(archive, batch_size=8192, winners_only=False):
+    """
+    Reproduce las partidas de un GameArchive en BatchDominoGame y genera, por
+    cada jugada (los pases no son decisiones), lotes de:
+        obs    (k, 133) uint8  observación de DominoEnv * OBS_SCALE (exacta)
+        masks  (k, 110) bool   jugadas válidas
+        action (k,)     uint8  acción jugada (ficha_idx * 2 + lado)
+    Cada partida se reproduce con su juego de fichas (max_pip y hand_size del
+    registro) en la plantilla del doble nueve.
+    """
+    for records in archive.batches(batch_size):
+        # Partidas del mismo tipo juntas: (max_pip, hand_size, jugadores, equipos)
+        group = np.stack([record_max_pip(records), record_hand_size(records),
+                          records['num_players'], records['flags'] & FLAG_TEAMS], axis=1)
+        kinds, which = np.unique(group, axis=0, return_inverse=True)
+        for k, (max_pip, hand_size, num_players, teams) in enumerate(kinds.tolist()):
+            recs = records[which.ravel() == k]
+            teams = bool(teams)
+            game = BatchDominoGame(len(recs), num_players, teams, max_pip=max_pip, hand_size=hand_size,
+                                   layout_pip=LAYOUT.max_pip)
+            game.load_deals(hands_from_deals(recs)[:, :num_players], recs['starter'])
+            moves = move_actions(recs)
+            num_moves = recs['num_moves']
+            winner = recs['winner'].astype(np.int64)
+
+            for t in range(int(num_moves.max())):
+                actions = moves[:, t].astype(np.int64)
+                live = t < num_moves
+                chosen = live & (actions >= 0)
+                if winners_only:
+                    player = game.current_player
+                    chosen &= (winner % 2 == player % 2) if teams else (winner == player)
+                if chosen.any():
+                    masks = game.valid_move_masks()[chosen]
+                    acts = actions[chosen]
+                    if not masks[np.arange(len(acts)), acts].all():
+                        raise ValueError("Archivo corrupto: jugada ilegal en la reproducción")
+                    obs = game.observations()[chosen]
+                    yield np.rint(obs * OBS_SCALE).astype(np.uint8), masks, acts.astype(np.uint8)
+                game.step(np.where(actions >= 0, actions, PASS), mask=live)
+
+
+def build_dataset(archive_path, out_dir, shard_size=SHARD_SIZE, winners_only=False):
+    """Escribe el dataset en shards .npy (obs, máscara empaquetada, acción). Devuelve nº de muestras."""
+    os.makedirs(out_dir, exist_ok=True)
+    archive = GameArchive(archive_path)
+    buffers, size, shard, total = [], 0, 0, 0
+
+    def write(parts, shard):
+        obs, masks, acts = (np.concatenate(x) for x in zip(*parts))
+        base = os.path.join(out_dir, f"shard_{shard:05d}")
+        np.save(base + "_obs.npy", obs)
+        np.save(base + "_mask.npy", np.packbits(masks, axis=1))
+        np.save(base + "_act.npy", acts)
+
+    for obs, masks, acts in iter_samples(archive, winners_only=winners_only):
+        buffers.append((obs, masks, acts))
+        size += len(acts)
+        total += len(acts)
+        if size >= shard_size:
+            write(buffers, shard)
+            buffers, size, shard = [], 0, shard + 1
+    if buffers:
+        write(buffers, shard)
+    return total
+
+
+class ShardDataset(IterableDataset):
+    """
+    Lee los shards con np.load(mmap_mode='r') y entrega minibatches ya
+    formados. Con DataLoader(num_workers > 0) cada proceso se queda con una
+    parte de los shards y el DataLoader precarga lotes mientras se entrena.
+    Con augment cada muestra sale con una permutación de puntos aleatoria,
+    distinta en cada época.
+    """
+    def __init__(self, directory, batch_size=BATCH_SIZE, shuffle=True, seed=0, augment=False):
+        self.shards = sorted(p[:-len("_obs.npy")] for p in glob.glob(os.path.join(directory, "shard_*_obs.npy")))
+        if not self.shards:
+            raise FileNotFoundError(f"No hay shards en {directory}")
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.seed = seed
+        self.augment = augment
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def __iter__(self):
+        info = get_worker_info()
+        shards = self.shards if info is None else self.shards[info.id::info.num_workers]
+        rng = np.random.default_rng((self.seed, self.epoch, 0 if info is None else info.id))
+        if self.shuffle:
+            shards = [shards[i] for i in rng.permutation(len(shards))]
+
+        for base in shards:
+            obs = np.load(base + "_obs.npy", mmap_mode='r')
+            masks = np.load(base + "_mask.npy", mmap_mode='r')
+            acts = np.load(base + "_act.npy", mmap_mode='r')
+            order = rng.permutation(len(acts)) if self.shuffle else np.arange(len(acts))
+            for start in range(0, len(order), self.batch_size):
+                idx = np.sort(order[start:start + self.batch_size])  # Lectura más secuencial del mmap
+                masks_idx = np.unpackbits(masks[idx], axis=1, count=LAYOUT.num_actions).astype(bool)
+                batch = (obs[idx], masks_idx, acts[idx].astype(np.int64))
+                if self.augment:
+                    batch = augment_batch(*batch, rng)
+                yield (torch.from_numpy(batch[0].astype(np.float32) / OBS_SCALE),
+                       torch.from_numpy(batch[1]),
+                       torch.from_numpy(batch[2]))
+
+
+# --- 2. PREENTRENAMIENTO SUPERVISADO ---
+def pretrain(model, directory, epochs=EPOCHS, batch_size=BATCH_SIZE, lr=LEARNING_RATE,
+             num_workers=LOADER_WORKERS, augment=AUGMENT, verbose=True):
+    """
+    Ajusta la política de un MaskablePPO a las jugadas del dataset con
+    entropía cruzada enmascarada (-log p(acción) bajo la distribución con
+    las jugadas ilegales enmascaradas). Solo se toca la rama de la política;
+    el optimizador de PPO no se usa, así el ajuste fino empieza limpio.
+    Devuelve [(época, pérdida media, acierto)].
+    """
+    policy = model.policy
+    dataset = ShardDataset(directory, batch_size, augment=augment)
+    loader = DataLoader(dataset, batch_size=None, num_workers=num_workers,
+                        prefetch_factor=4 if num_workers else None, persistent_workers=num_workers > 0)
+    optimizer = torch.optim.Adam(policy.parameters(), lr=lr)
+    history = []
+
+    policy.set_training_mode(True)
+    for epoch in range(epochs):
+        dataset.set_epoch(epoch)
+        start = time.time()
+        loss_sum, hits, seen = 0.0, 0, 0
+        for obs, masks, acts in loader:
+            dist = policy.get_distribution(obs.to(policy.device), action_masks=masks.numpy())
+            acts = acts.to(policy.device)
+            loss = -dist.log_prob(acts).mean()
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+
+            loss_sum += loss.item() * len(acts)
+            hits += int((dist.distribution.probs.argmax(dim=1) == acts).sum())
+            seen += len(acts)
+        history.append((epoch, loss_sum / seen, hits / seen))
+        if verbose:
+            print(f"📚 Época {epoch + 1}/{epochs} | pérdida {loss_sum / seen:.4f} | "
+                  f"acierto {hits / seen * 100:.1f}% | {seen / (time.time() - start):,.0f} muestras/s")
+    policy.set_training_mode(False)
+    return history
+
+
+def main():
+    from sb3_contrib import MaskablePPO
+    from tournament import run_tournament
+    from domino_vec_env import DominoVecEnv
+
+    print("🚀 BEHAVIOR CLONING (preentrenamiento de la política)")
+    print("=" * 50)
+
+    if not os.path.exists(ARCHIVE_PATH):
+        print(f"🎮 Generando {ARCHIVE_GAMES} partidas {' vs '.join(ARCHIVE_AGENTS)} en {ARCHIVE_PATH} ...")
+        os.makedirs(os.path.dirname(ARCHIVE_PATH), exist_ok=True)
+        run_tournament(ARCHIVE_AGENTS, ARCHIVE_FORMAT, ARCHIVE_GAMES, record=ARCHIVE_PATH)
+
+    if not glob.glob(os.path.join(DATASET_DIR, "shard_*_obs.npy")):
+        start = time.time()
+        n = build_dataset(ARCHIVE_PATH, DATASET_DIR, winners_only=WINNERS_ONLY)
+        print(f"📦 Dataset: {n:,} jugadas en {DATASET_DIR} ({time.time() - start:.1f} s)")
+
+    # Mismo MlpPolicy que train_domino.py: los pesos se cargan tal cual antes de PPO
+    model = MaskablePPO("MlpPolicy", DominoVecEnv(1), device='cpu', learning_rate=0.0001)
+    pretrain(model, DATASET_DIR)
+    model.save(OUTPUT_MODEL)
+    print(f"✅ Modelo preentrenado guardado en {OUTPUT_MODEL}.zip")
+
+    predict = lambda obs, masks: model.predict(obs, action_masks=masks, deterministic=True)[0]
+    wins, _ = evaluate_policy(predict, EVAL_GAMES, num_players=ARCHIVE_NUM_PLAYERS, seed=0)
+    print(f"🏆 {wins}/{EVAL_GAMES} victorias contra {ARCHIVE_NUM_PLAYERS - 1} bots aleatorios "
+          f"({wins / EVAL_GAMES * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+import math
+import numpy as np
+from domino_engine import ALL_PIECES, PIECE_INDEX, PIECE_BITS, PIP_MASKS, iter_mask
+
+# --- CREENCIAS SOBRE LAS MANOS OCULTAS ---
+# Lo que un jugador sabe de las fichas que no ve: cada rival tiene tantas fichas
+# como le quedan (información pública) y, cada vez que pasa, demuestra que no
+# tiene ninguna con los extremos de ese momento. Las fichas que nadie ha
+# recibido (el pozo: 15 con 4 jugadores, 35 con 2) pueden ser cualquiera.
+# Un reparto es consistente si respeta las dos cosas; el muestreador los saca
+# todos con la misma probabilidad y sin bucles de rechazo.
+NUM_PIECES = len(ALL_PIECES)
+FULL_MASK = (1 << NUM_PIECES) - 1
+SAMPLE_BATCH = 1024         # Repartos por llamada al muestreador en iter_worlds
+POOL = -1                   # Dueño de las fichas del pozo (y de la mesa) en los repartos muestreados
+
+
+class BeliefTracker:
+    """
+    Fichas posibles de cada rival desde el punto de vista de `me`, como
+    máscaras de 55 bits sobre ALL_PIECES, y tamaño de cada mano. Se puede
+    pasar como hook de DominoGame (recorder=tracker: start_game() en reset y
+    record_move() en cada step) o reconstruirse desde una partida con
+    from_game(), que da lo mismo: un pase nunca deja de ser cierto, porque las
+    fichas solo salen de las manos.
+    """
+    def __init__(self, me, num_players=4):
+        self.me = me
+        self.num_players = num_players
+        self.opponents = [p for p in range(num_players) if p != me]
+        self.pieces = FULL_MASK     # Fichas del juego (menos con doble seis)
+        self.hand = 0               # Mis fichas
+        self.board = 0              # Fichas en la mesa
+        self.possible = [0] * num_players
+        self.sizes = [0] * num_players
+
+    @classmethod
+    def from_game(cls, game, me):
+        tracker = cls(me, game.num_players)
+        tracker.start_game(game)
+        for p, l_val, r_val in game.passes:
+            tracker.observe_pass(p, l_val, r_val)
+        return tracker
+
+    # --- Actualización ---
+    def start_game(self, game):
+        hands = game.hands
+        self.pieces = _mask(game.all_pieces)
+        self.hand = _mask(hands[self.me])
+        self.board = _mask(game.mesa)
+        unknown = self.unknown()
+        self.possible = [0 if p == self.me else unknown for p in range(self.num_players)]
+        self.sizes = [len(hands[p]) for p in range(self.num_players)]
+
+    def record_move(self, game, action):
+        # Tras step(): el turno ya avanzó salvo que la partida haya terminado
+        player = game.current_player if game.game_over else (game.current_player - 1) % self.num_players
+        if action is None:
+            _, l_val, r_val = game.passes[-1]
+            self.observe_pass(player, l_val, r_val)
+        else:
+            self.observe_play(player, action[0])
+
+    def observe_pass(self, player, l_val, r_val):
+        if player != self.me and l_val != -1:
+            self.possible[player] &= ~(PIP_MASKS[l_val] | PIP_MASKS[r_val])
+
+    def observe_play(self, player, ficha):
+        bit = PIECE_BITS[PIECE_INDEX[ficha]]
+        self.board |= bit
+        self.hand &= ~bit
+        self.sizes[player] -= 1
+        for p in self.opponents:
+            self.possible[p] &= ~bit
+
+    # --- Consultas ---
+    def unknown(self):
+        """Fichas que `me` no ve: manos rivales y pozo."""
+        return self.pieces & ~self.hand & ~self.board
+
+    def pool_size(self):
+        return bin(self.unknown()).count("1") - sum(self.sizes[p] for p in self.opponents)
+
+    def possible_matrix(self):
+        """(num_players, 55) bool: qué fichas puede tener cada rival (mi fila son mis fichas)."""
+        out = np.zeros((self.num_players, NUM_PIECES), dtype=bool)
+        for p in range(self.num_players):
+            out[p, list(iter_mask(self.hand if p == self.me else self.possible[p]))] = True
+        return out
+
+    def sample(self, n, rng):
+        """
+        n repartos consistentes uniformes: (n, 55) int8 con el dueño de cada
+        ficha (POOL = pozo o mesa). Si las restricciones no admiten ninguno
+        (p.ej. manos puestas a mano con set_hand) se ignoran los pases.
+        """
+        plan = _deal_plan(self)
+        if plan is None:
+            relaxed = BeliefTracker(self.me, self.num_players)
+            relaxed.pieces, relaxed.hand, relaxed.board, relaxed.sizes = self.pieces, self.hand, self.board, self.sizes
+            relaxed.possible = [0 if p == self.me else self.unknown() for p in range(self.num_players)]
+            plan = _deal_plan(relaxed)
+        return _draw(plan, self, n, rng)
+
+
+def _mask(tiles):
+    mask = 0
+    for f in tiles:
+        mask |= PIECE_BITS[PIECE_INDEX[f]]
+    return mask
+
+
+# --- MUESTREO EXACTO ---
+# Las fichas desconocidas se agrupan en clases según qué rivales pueden tenerlas
+# (como mucho 2^3 con 4 jugadores; el pozo las admite todas). Un reparto queda
+# determinado, salvo el orden dentro de cada clase, por cuántas fichas de cada
+# clase recibe cada dueño; hay pocas combinaciones que cuadren con los tamaños
+# de mano y cada una pesa el producto de multinomiales de sus clases. Se elige
+# una combinación con su peso y se barajan las clases: reparto uniforme exacto.
+def _deal_plan(tracker):
+    """[(fichas de la clase, tabla de dueños (A, n_clase))] y probabilidades (A,), o None si no hay reparto."""
+    holders = tracker.opponents + [POOL]
+    caps = [tracker.sizes[p] for p in tracker.opponents] + [tracker.pool_size()]
+    if min(caps) < 0:
+        return None
+
+    classes = {}
+    if not tracker.unknown():
+        return ([], np.ones(1)) if not any(caps) else None
+    for i in iter_mask(tracker.unknown()):
+        bit = PIECE_BITS[i]
+        key = tuple(p for p in tracker.opponents if tracker.possible[p] & bit) + (POOL,)
+        classes.setdefault(key, []).append(i)
+    # Primero las clases más restringidas: se podan antes las combinaciones imposibles
+    classes = sorted(((np.array(tiles), [holders.index(h) for h in key]) for key, tiles in classes.items()),
+                     key=lambda c: len(c[1]))
+
+    # reach[c][h]: fichas de las clases c.. que puede recibir el dueño h
+    reach = [[0] * len(holders) for _ in range(len(classes) + 1)]
+    for c in range(len(classes) - 1, -1, -1):
+        reach[c] = reach[c + 1][:]
+        for h in classes[c][1]:
+            reach[c][h] += len(classes[c][0])
+
+    allocations, weights = [], []
+
+    def assign(c, caps, counts, weight):
+        n, allowed = len(classes[c][0]), classes[c][1]
+        if c == len(classes) - 1:
+            # La última clase se lleva exactamente lo que falta
+            split = tuple(caps[h] for h in allowed)
+            if sum(split) == n:
+                allocations.append(counts + [split])
+                weights.append(weight * _multinomial(n, split))
+            return
+        for split in _splits(n, [caps[h] for h in allowed]):
+            rest = caps[:]
+            for h, k in zip(allowed, split):
+                rest[h] -= k
+            if all(rest[h] <= reach[c + 1][h] for h in range(len(holders))):
+                assign(c + 1, rest, counts + [split], weight * _multinomial(n, split))
+
+    if classes and all(caps[h] <= reach[0][h] for h in range(len(holders))):
+        assign(0, caps, [], 1)
+    if not allocations:
+        return None
+
+    plan = []
+    for c, (tiles, allowed) in enumerate(classes):
+        # Posición j de la clase -> primer dueño cuyo acumulado de fichas supera j
+        ends = np.array([counts[c] for counts in allocations]).cumsum(axis=1)
+        slot = (np.arange(len(tiles))[None, :, None] >= ends[:, None, :]).sum(axis=2)
+        plan.append((tiles, np.array([holders[h] for h in allowed], dtype=np.int8)[slot]))
+    total = sum(weights)
+    probs = np.array([w / total for w in weights])
+    return plan, probs
+
+
+def _splits(n, caps):
+    """Formas de repartir n fichas entre len(caps) dueños sin pasar de su capacidad."""
+    if len(caps) == 1:
+        if n <= caps[0]:
+            yield (n,)
+        return
+    for k in range(min(n, caps[0]), -1, -1):
+        for rest in _splits(n - k, caps[1:]):
+            yield (k,) + rest
+
+
+def _multinomial(n, split):
+    out = 1
+    for k in split:
+        out *= math.comb(n, k)
+        n -= k
+    return out
+
+
+def _draw(plan, tracker, n, rng):
+    classes, probs = plan
+    owners = np.full((n, NUM_PIECES), POOL, dtype=np.int8)
+    owners[:, list(iter_mask(tracker.hand))] = tracker.me
+    choice = rng.choice(len(probs), size=n, p=probs) if len(probs) > 1 else np.zeros(n, dtype=np.int64)
+    rows = np.arange(n)[:, None]
+    for tiles, table in classes:
+        shuffled = rng.permuted(np.broadcast_to(tiles, (n, len(tiles))), axis=1)
+        owners[rows, shuffled] = table[choice]
+    return owners
+
+
+def marginals(owners, num_players):
+    """Frecuencia con que cada jugador tiene cada ficha en los repartos muestreados, (num_players, 55)."""
+    return np.stack([(owners == p).mean(axis=0) for p in range(num_players)])
+
+
+def deal_world(game, tracker, owners):
+    """Clon de `game` con las manos rivales de un reparto muestreado (una fila de sample())."""
+    world = game.clone()
+    for p in tracker.opponents:
+        world.set_hand(p, [ALL_PIECES[i] for i in np.flatnonzero(owners == p)])
+    return world
+
+
+def iter_worlds(game, me, rng, batch=SAMPLE_BATCH):
+    """Determinizaciones sin fin de `game` vistas por `me`, muestreadas de `batch` en `batch`."""
+    tracker = BeliefTracker.from_game(game, me)
+    while True:
+        for owners in tracker.sample(batch, rng):
+            yield deal_world(game, tracker, owners)
@@ -0,0 +1,257 @@
+import argparse
+import hashlib
+import os
+import random
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from domino_engine import DominoGame, PIECE_INDEX, ALL_PIECES
+from domino_symmetry import canonical_key, inverse, permute_move
+
+# --- CONFIGURACIÓN POR DEFECTO ---
+BOOK_PATH = "modelos_domino_mask/opening_book.bin"
+BOOK_PLIES = 2              # Jugadas (incluidos pases) desde el reparto que cubre el libro
+BOOK_GAMES = 20_000         # Partidas de autojuego para rellenarlo
+BOOK_ROLLOUTS = 2000        # Iteraciones de MCTS por posición del libro
+CACHE_SIZE = 4096           # Entradas del LRU en memoria
+CHUNK_SIZE = 100            # Partidas por tarea del pool
+
+# --- FORMATO EN DISCO ---
+# Cabecera de 16 bytes y entradas de 9 bytes ordenadas por clave, para buscar con
+# np.searchsorted directamente sobre el np.memmap:
+#   key     8 B  hash de la posición canónica
+#   action  1 B  jugada en el marco canónico: ficha_idx * 2 + lado (como DominoEnv)
+BOOK_MAGIC = b"DOMBOOK\x01"
+HEADER_SIZE = 16
+FLAG_SYMMETRIC = 1
+ENTRY_DTYPE = np.dtype([('key', '<u8'), ('action', 'u1')])
+
+
+def ply(game):
+    return len(game.mesa) + len(game.passes)
+
+
+def position_key(game, symmetric=True):
+    """
+    (hash de 64 bits, perm) de la posición desde el punto de vista del jugador
+    en turno: su mano, la mesa, los extremos, los pases y su asiento. Con
+    symmetric las posiciones que solo difieren en el nombre de los puntos
+    comparten clave (domino_symmetry); perm lleva la partida al marco canónico.
+    Ojo: la simetría ignora la suma de puntos de los cierres, así que una
+    entrada vale para toda la clase aunque se calculase con una sola.
+    """
+    if symmetric:
+        key, perm = canonical_key(game, game.current_player)
+    else:
+        me = game.current_player
+        key = (game.num_players, game.teams, me, sorted(game.hands[me]), sorted(game.mesa),
+               tuple(game.extremos), tuple(game.passes))
+        perm = np.arange(10)
+    digest = hashlib.blake2b(repr(key).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little'), perm
+
+
+def _encode_move(move, perm):
+    ficha, lado = permute_move(move, perm)
+    return PIECE_INDEX[ficha] * 2 + (lado == 'R')
+
+
+def _decode_move(action, perm):
+    return permute_move((ALL_PIECES[action >> 1], 'R' if action & 1 else 'L'), inverse(perm))
+
+
+class OpeningBook:
+    """
+    Libro de aperturas: jugada recomendada para las primeras `max_plies`
+    jugadas de cada partida. Las entradas del fichero se leen con np.memmap
+    (nada se carga entero) y delante hay un LRU de `cache_size` posiciones,
+    que también recuerda las que no están en el libro. add() acumula entradas
+    nuevas en memoria hasta save().
+    """
+    def __init__(self, path=None, max_plies=BOOK_PLIES, cache_size=CACHE_SIZE, symmetric=True):
+        self.path = path
+        self.max_plies = max_plies
+        self.cache_size = cache_size
+        self.symmetric = symmetric
+        self.entries = np.zeros(0, dtype=ENTRY_DTYPE)
+        if path is not None and os.path.exists(path):
+            self.entries, self.symmetric = read_book(path)
+        self.pending = {}
+        self._cache = OrderedDict()
+        self.lookups = self.hits = self.cache_hits = 0
+
+    def __len__(self):
+        return len(self.entries) + len(self.pending)
+
+    def _find(self, key):
+        if key in self.pending:
+            return self.pending[key]
+        keys = self.entries['key']
+        i = int(np.searchsorted(keys, key))
+        if i < len(keys) and keys[i] == key:
+            return int(self.entries['action'][i])
+        return None
+
+    def lookup(self, game):
+        """Jugada del libro para el jugador en turno, o None si la posición no está (o ya no es apertura)."""
+        if ply(game) >= self.max_plies:
+            return None
+        self.lookups += 1
+        key, perm = position_key(game, self.symmetric)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            action = self._cache[key]
+        else:
+            action = self._find(key)
+            self._cache[key] = action
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        if action is None:
+            return None
+        move = _decode_move(action, perm)
+        # Una colisión de hash no puede colar una jugada ilegal
+        if move not in game.get_valid_moves(game.current_player):
+            return None
+        self.hits += 1
+        return move
+
+    def add(self, game, move):
+        key, perm = position_key(game, self.symmetric)
+        action = _encode_move(move, perm)
+        self.pending[key] = action
+        self._cache.pop(key, None)
+        return key, action
+
+    def save(self, path=None):
+        """
+        Mezcla las entradas nuevas con las del fichero y lo reescribe (de forma
+        atómica). El memmap del fichero anterior se suelta antes de sustituirlo:
+        en Windows no se puede reemplazar un fichero que sigue mapeado. Otros
+        OpeningBook abiertos sobre el mismo fichero lo impedirían igualmente.
+        """
+        path = path or self.path
+        # merge_entries copia a memoria: después ya no queda ninguna referencia al memmap
+        self.entries = merge_entries(self.entries, list(self.pending.items()))
+        write_book(path, self.entries, self.symmetric)
+        self.path = path
+        self.entries, _ = read_book(path)
+        self.pending = {}
+        return path
+
+    def stats(self):
+        return {'size': len(self), 'lookups': self.lookups, 'hits': self.hits,
+                'hit_rate': self.hits / self.lookups if self.lookups else 0.0,
+                'cache_hits': self.cache_hits, 'cached': len(self._cache)}
+
+
+def read_book(path):
+    """(entradas memmap, symmetric) de un fichero de libro."""
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    if header[:len(BOOK_MAGIC)] != BOOK_MAGIC:
+        raise ValueError(f"{path} no es un libro de aperturas")
+    symmetric = bool(header[8] & FLAG_SYMMETRIC)
+    count = (os.path.getsize(path) - HEADER_SIZE) // ENTRY_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=ENTRY_DTYPE), symmetric
+    return np.memmap(path, dtype=ENTRY_DTYPE, mode='r', offset=HEADER_SIZE, shape=(count,)), symmetric
+
+
+def write_book(path, entries, symmetric=True):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(BOOK_MAGIC + bytes([FLAG_SYMMETRIC if symmetric else 0]) + bytes(HEADER_SIZE - len(BOOK_MAGIC) - 1))
+        f.write(np.ascontiguousarray(entries, dtype=ENTRY_DTYPE).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def merge_entries(entries, new):
+    """Entradas ordenadas y sin claves repetidas; ante un duplicado gana la nueva (la última de `new`)."""
+    added = np.array(new, dtype=ENTRY_DTYPE) if new else np.zeros(0, dtype=ENTRY_DTYPE)
+    # Al revés: np.unique se queda con la primera aparición de cada clave, o sea la más reciente
+    merged = np.concatenate([np.asarray(entries), added])[::-1]
+    _, first = np.unique(merged['key'], return_index=True)
+    return merged[first]
+
+
+# --- CONSTRUCCIÓN (búsqueda offline) ---
+_worker_book = None
+
+
+def _init_worker(path, max_plies, symmetric):
+    global _worker_book
+    _worker_book = OpeningBook(path, max_plies, symmetric=symmetric)
+
+
+def fill_games(start, count, seed, num_players, teams, rollouts):
+    """
+    Autojuego de las partidas [start, start + count) hasta max_plies: en cada
+    posición que aún no está en el libro se busca con MCTS y se juega esa
+    jugada. Devuelve las entradas nuevas [(clave, acción)].
+    """
+    from domino_mcts import MCTSPlayer
+    book = _worker_book
+    new = []
+    for game_idx in range(start, start + count):
+        game_seed = seed * 1_000_003 + game_idx
+        random.seed(game_seed)
+        bot = MCTSPlayer(rollouts=rollouts, seed=game_seed)
+        game = DominoGame(num_players, teams)
+        while not game.game_over and ply(game) < book.max_plies:
+            moves = game.get_valid_moves(game.current_player)
+            move = book.lookup(game) if len(moves) > 1 else None
+            if move is None:
+                move = bot.choose_move(game)
+                if len(moves) > 1:
+                    new.append(book.add(game, move))
+            game.step(move)
+    return new
+
+
+def build_book(path=BOOK_PATH, num_games=BOOK_GAMES, num_players=4, teams=False, max_plies=BOOK_PLIES,
+               rollouts=BOOK_ROLLOUTS, seed=0, workers=None, symmetric=True):
+    """Amplía (o crea) el libro de `path` con num_games partidas de autojuego en paralelo."""
+    workers = workers or os.cpu_count()
+    if os.path.exists(path):
+        symmetric = read_book(path)[1]
+    book = OpeningBook(path, max_plies, symmetric=symmetric)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(path if os.path.exists(path) else None, max_plies, symmetric)) as pool:
+        futures = [pool.submit(fill_games, s, min(CHUNK_SIZE, num_games - s), seed, num_players, teams, rollouts)
+                   for s in range(0, num_games, CHUNK_SIZE)]
+        for fut in futures:
+            # En orden de tarea: el libro no depende del número de procesos
+            for key, action in fut.result():
+                book.pending.setdefault(key, action)
+    before = len(book.entries)
+    book.save(path)
+    return len(book.entries) - before, len(book.entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construye o amplía el libro de aperturas con MCTS offline")
+    parser.add_argument("--path", default=BOOK_PATH)
+    parser.add_argument("--games", type=int, default=BOOK_GAMES)
+    parser.add_argument("--players", type=int, default=4, choices=(2, 4))
+    parser.add_argument("--teams", action="store_true")
+    parser.add_argument("--plies", type=int, default=BOOK_PLIES)
+    parser.add_argument("--rollouts", type=int, default=BOOK_ROLLOUTS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    print(f"📖 LIBRO DE APERTURAS | {args.games} partidas | {args.plies} jugadas | MCTS {args.rollouts}")
+    print("=" * 60)
+    start = time.time()
+    added, total = build_book(args.path, args.games, args.players, args.teams, args.plies,
+                              args.rollouts, args.seed, args.workers)
+    print(f"✅ {added:,} posiciones nuevas, {total:,} en total ({time.time() - start:.1f} s)")
+    print(f"💾 {args.path} ({os.path.getsize(args.path) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import random
+import time
+import numpy as np
+from domino_belief import iter_worlds
+from domino_engine import PIECE_INDEX
+from domino_mcts import player_won
+
+EXACT, LOWER, UPPER = 0, 1, 2
+DEADLINE_CHECK = 256
+
+
+class SearchAborted(Exception):
+    """Se superó el límite de nodos o de tiempo de una decisión."""
+
+
+class Zobrist:
+    """Claves de 64 bits para (manos, extremos, jugador en turno, pases)."""
+    def __init__(self, num_players, seed=0):
+        rng = random.Random(seed)
+        self.hand = [[rng.getrandbits(64) for _ in range(len(PIECE_INDEX))] for _ in range(num_players)]
+        self.end = [[rng.getrandbits(64) for _ in range(11)] for _ in range(2)]  # índice v + 1 (-1 = vacío)
+        self.turn = [rng.getrandbits(64) for _ in range(num_players)]
+        self.passes = [rng.getrandbits(64) for _ in range(num_players + 1)]
+
+    def hash(self, game):
+        h = 0
+        for p, hand in game.hands.items():
+            for f in hand:
+                h ^= self.hand[p][PIECE_INDEX[f]]
+        h ^= self.end[0][game.extremos[0] + 1] ^ self.end[1][game.extremos[1] + 1]
+        h ^= self.turn[game.current_player] ^ self.passes[game.pass_count]
+        return h
+
+    def child(self, h, game, move, before):
+        """Hash tras game.push(move) a partir del hash previo, en O(1)."""
+        l0, r0, p0, pc0 = before
+        if move is not None:
+            h ^= self.hand[p0][PIECE_INDEX[move[0]]]
+        l1, r1 = game.extremos
+        if l1 != l0: h ^= self.end[0][l0 + 1] ^ self.end[0][l1 + 1]
+        if r1 != r0: h ^= self.end[1][r0 + 1] ^ self.end[1][r1 + 1]
+        if game.current_player != p0: h ^= self.turn[p0] ^ self.turn[game.current_player]
+        if game.pass_count != pc0: h ^= self.passes[pc0] ^ self.passes[game.pass_count]
+        return h
+
+
+class TranspositionTable:
+    """
+    Tabla de tamaño fijo (potencia de 2) indexada por hash. Reemplazo: una
+    entrada de una búsqueda anterior siempre se sustituye; dentro de la misma
+    búsqueda se conserva la que cubre más fichas restantes.
+    """
+    def __init__(self, size_log2=18):
+        self.size = 1 << size_log2
+        self._mask = self.size - 1
+        self.keys = [None] * self.size
+        self.entries = [None] * self.size
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+
+    def new_search(self):
+        self.generation += 1
+
+    def get(self, key):
+        self.probes += 1
+        i = key & self._mask
+        if self.keys[i] == key:
+            entry = self.entries[i]
+            # Los valores dependen del jugador que busca: solo sirven en la misma búsqueda
+            if entry[4] == self.generation:
+                self.hits += 1
+                return entry
+        return None
+
+    def put(self, key, depth, value, flag, move):
+        i = key & self._mask
+        old = self.entries[i]
+        if old is None or self.keys[i] == key or old[4] != self.generation or depth >= old[0]:
+            self.keys[i] = key
+            self.entries[i] = (depth, value, flag, move, self.generation)
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+
+class EndgameSolver:
+    """
+    Alfa-beta exacto sobre estados de DominoGame con información perfecta.
+    Valor +1 si gana `me` (o su equipo) y -1 si no. Con más de dos bandos se
+    asume que todos los rivales juegan contra `me` (búsqueda paranoica).
+
+    choose_move() aplica el solver a varios mundos muestreados (las manos
+    rivales no se ven) y elige la jugada que gana en más de ellos.
+    node_limit / time_ms: presupuesto por decisión (time_ms None = sin límite
+    de tiempo); al agotarse se lanza SearchAborted.
+    """
+    def __init__(self, samples=12, node_limit=200_000, tt_size_log2=18, seed=None, time_ms=None):
+        self.samples = samples
+        self.node_limit = node_limit
+        self.time_ms = time_ms
+        self.tt = TranspositionTable(tt_size_log2)
+        self.rng = random.Random(seed)
+        self._zobrist = {}
+        self.stats = {}
+
+    def solve(self, game, me):
+        """Valor exacto de la posición (mundo conocido) para `me` y su mejor jugada."""
+        self._start(game, me)
+        try:
+            world = game.clone()
+            return self._root(world, self._z.hash(world), -1, 1)
+        finally:
+            self._finish()
+
+    def choose_move(self, game):
+        me = game.current_player
+        moves = game.get_valid_moves(me)
+        if len(moves) <= 1:
+            return moves[0] if moves else None
+
+        self._start(game, me)
+        try:
+            score = {m: 0 for m in moves}
+            worlds = iter_worlds(game, me, np.random.default_rng(self.rng.getrandbits(64)), self.samples)
+            for _ in range(self.samples):
+                world = next(worlds)
+                h = self._z.hash(world)
+                for m in moves:
+                    before = (world.extremos[0], world.extremos[1], me, world.pass_count)
+                    world.push(m)
+                    score[m] += self._alphabeta(world, self._z.child(h, world, m, before), -1, 1)
+                    world.pop()
+        finally:
+            # Con SearchAborted las estadísticas también deben ser las de esta decisión
+            self._finish()
+        return max(moves, key=score.get)
+
+    # --- Búsqueda ---
+    def _start(self, game, me):
+        self.me = me
+        self.teams = game.teams and game.num_players == 4
+        z = self._zobrist.get(game.num_players)
+        if z is None:
+            z = self._zobrist[game.num_players] = Zobrist(game.num_players)
+        self._z = z
+        self.tt.new_search()
+        self.tt.probes = self.tt.hits = 0
+        self.nodes = 0
+        self._t0 = time.perf_counter()
+        self._deadline = self._t0 + self.time_ms / 1000.0 if self.time_ms else None
+
+    def _finish(self):
+        elapsed = time.perf_counter() - self._t0
+        self.stats = {
+            'nodes': self.nodes,
+            'ms': elapsed * 1000.0,
+            'nps': self.nodes / elapsed if elapsed > 0 else 0.0,
+            'tt_hit_rate': self.tt.hit_rate,
+        }
+
+    def _is_ally(self, player):
+        if self.teams:
+            return player % 2 == self.me % 2
+        return player == self.me
+
+    def _root(self, game, h, alpha, beta):
+        best_move = None
+        best = -2
+        for m in game.get_valid_moves(self.me) or [None]:
+            before = (game.extremos[0], game.extremos[1], self.me, game.pass_count)
+            game.push(m)
+            v = self._alphabeta(game, self._z.child(h, game, m, before), alpha, beta)
+            game.pop()
+            if v > best:
+                best, best_move = v, m
+                alpha = max(alpha, v)
+            if alpha >= beta:
+                break
+        return best, best_move
+
+    def _alphabeta(self, game, h, alpha, beta):
+        if game.game_over:
+            return 1 if player_won(game, self.me) else -1
+
+        self.nodes += 1
+        if self.nodes > self.node_limit:
+            raise SearchAborted()
+        # El reloj solo se consulta cada DEADLINE_CHECK nodos
+        if self._deadline is not None and self.nodes % DEADLINE_CHECK == 0 and time.perf_counter() > self._deadline:
+            raise SearchAborted()
+
+        tt_move = None
+        entry = self.tt.get(h)
+        if entry is not None:
+            _, value, flag, tt_move, _ = entry
+            if flag == EXACT:
+                return value
+            if flag == LOWER: alpha = max(alpha, value)
+            else: beta = min(beta, value)
+            if alpha >= beta:
+                return value
+
+        player = game.current_player
+        moves = game.get_valid_moves(player) or [None]
+        if tt_move is not None and tt_move in moves and moves[0] != tt_move:
+            moves = [tt_move] + [m for m in moves if m != tt_move]
+
+        maximize = self._is_ally(player)
+        a0, b0 = alpha, beta
+        best = -2 if maximize else 2
+        best_move = None
+        depth = len(game.mesa)
+        for m in moves:
+            before = (game.extremos[0], game.extremos[1], player, game.pass_count)
+            game.push(m)
+            v = self._alphabeta(game, self._z.child(h, game, m, before), alpha, beta)
+            game.pop()
+            if maximize:
+                if v > best: best, best_move = v, m
+                alpha = max(alpha, v)
+            else:
+                if v < best: best, best_move = v, m
+                beta = min(beta, v)
+            if alpha >= beta:
+                break
+
+        flag = UPPER if best <= a0 else LOWER if best >= b0 else EXACT
+        # Menos fichas en mesa = más juego por delante = entrada más valiosa
+        self.tt.put(h, -depth, best, flag, best_move)
+        return best
+
+
+def tiles_left(game):
+    """Fichas que quedan en todas las manos."""
+    return sum(len(h) for h in game.hands.values())
+
+
+def endgame_move(solver, game, max_tiles):
+    """Jugada del solver con max_tiles fichas en manos o menos; None si no aplica o se agotó su presupuesto."""
+    if tiles_left(game) > max_tiles:
+        return None
+    try:
+        return solver.choose_move(game)
+    except SearchAborted:
+        return None
@@ -1,22 +1,60 @@
 import random
+import numpy as np
+
+# --- JUEGO DE FICHAS ---
+# Por defecto doble nueve (55 fichas, manos de 10). max_pip elige otro juego,
+# p.ej. doble seis (28 fichas, manos de 7), y hand_size el tamaño de las manos.
+MAX_PIP = 9
+HAND_SIZES = {6: 7, 9: 10}      # Mano estándar de cada juego (si no, la de doble nueve)
+
+
+def make_pieces(max_pip=MAX_PIP):
+    """Fichas del doble max_pip en el orden de all_pieces: (0,0), (0,1), ..., (max_pip, max_pip)."""
+    return [(i, j) for i in range(max_pip + 1) for j in range(i, max_pip + 1)]
+
+
+def default_hand_size(max_pip):
+    return HAND_SIZES.get(max_pip, 10)
+
 
 class DominoGame:
-    def __init__(self, num_players=4, teams=False):
+    def __init__(self, num_players=4, teams=False, recorder=None, rng=None, max_pip=MAX_PIP, hand_size=None):
         self.num_players = num_players
         self.teams = teams
-        self.all_pieces = [(i, j) for i in range(10) for j in range(i, 10)]
+        # Hook opcional (p.ej. domino_records.GameRecorder): start_game() en reset, record_move() en step
+        self.recorder = recorder
+        # Generador propio (np.random.Generator) para barajar y sortear la salida;
+        # None = el módulo random global, como siempre
+        self.rng = rng
+        self.max_pip = max_pip
+        self.hand_size = hand_size or default_hand_size(max_pip)
+        self.all_pieces = make_pieces(max_pip)
+        if self.hand_size * num_players > len(self.all_pieces):
+            raise ValueError(f"No hay fichas para {num_players} manos de {self.hand_size} en el doble {max_pip}")
         self.reset()
 
-    def reset(self):
+    def _draw_deal(self):
+        """(orden de las fichas de all_pieces, sorteo de salida o None) con el generador de la partida."""
+        if self.rng is None:
+            orden = list(range(len(self.all_pieces)))
+            random.shuffle(orden)
+            return orden, None
+        return self.rng.permutation(len(self.all_pieces)).tolist(), int(self.rng.integers(self.num_players))
+
+    def reset(self, deal=None):
+        """
+        Reparte una partida nueva. deal = (orden, sorteo), p.ej. una fila de
+        seeded_deals() o deal_batch(), fija el reparto en lugar de barajar.
+        """
         # 1. Barajar REALMENTE bien
-        self.piezas = self.all_pieces[:]
-        random.shuffle(self.piezas)
+        orden, lot = self._draw_deal() if deal is None else _as_list(deal)
+        self.piezas = [self.all_pieces[i] for i in orden]
         
         # 2. Repartir
         self.hands = {}
         for p in range(self.num_players):
-            start = p * 10
-            end = start + 10
+            start = p * self.hand_size
+            end = start + self.hand_size
             self.hands[p] = self.piezas[start:end]
             
         self.mesa = [] 
@@ -28,27 +66,48 @@ class DominoGame:
         self.center_tile = None 
         
         # 3. Decidir quién sale
-        self.current_player, self.start_reason = self._find_starting_player()
+        self.current_player, self.start_reason = self._find_starting_player(lot)
         
         self.winner = -1
         self.game_over = False
         self.pass_count = 0
+
+        # Caché de jugadas válidas por jugador; se invalida al colocar ficha
+        self._moves_cache = {}
+        # Pila de deshacer para push()/pop()
+        self._undo = []
+        # Pases: (jugador, extremo_izq, extremo_der) -> no tiene ninguno de esos valores
+        self.passes = []
+
+        if self.recorder is not None:
+            self.recorder.start_game(self)
         
         return self._get_state()
 
-    def _find_starting_player(self):
+    def _find_starting_player(self, lot=None):
         # Prioridad: Doble más alto
-        for d in range(9, -1, -1):
+        for d in range(self.max_pip, -1, -1):
             ficha = (d, d)
             for p in range(self.num_players):
                 if ficha in self.hands[p]:
                     return p, f"Salida por Doble {d}"
         
         # Si nadie tiene dobles (raro en doble 9), aleatorio
-        starter = random.randint(0, self.num_players - 1)
-        return starter, "Sorteo Aleatorio (Nadie tenía dobles)"
+        return self._draw_starter(lot), "Sorteo Aleatorio (Nadie tenía dobles)"
+
+    def _draw_starter(self, lot):
+        if lot is None:
+            return random.randint(0, self.num_players - 1)
+        return int(lot) % self.num_players
 
     def get_valid_moves(self, player):
+        # La lista devuelta es compartida: no modificarla
+        moves = self._moves_cache.get(player)
+        if moves is None:
+            moves = self._moves_cache[player] = self._compute_valid_moves(player)
+        return moves
+
+    def _compute_valid_moves(self, player):
         hand = self.hands[player]
         if self.center_tile is None:
             return [(f, 'L') for f in hand] 
@@ -81,12 +140,15 @@ class DominoGame:
         
         if action is None:
             self.pass_count += 1
+            self.passes.append((player, self.extremos[0], self.extremos[1]))
         else:
             ficha, lado = action
             if ficha not in self.hands[player]:
                 return -100, True 
 
             self.hands[player].remove(ficha)
+            # Pasar no cambia manos ni extremos: solo se invalida al jugar
+            self._moves_cache.clear()
             
             # --- FIX: Actualizar la lista 'mesa' ---
             self.mesa.append(ficha)
@@ -125,15 +187,80 @@ class DominoGame:
         if len(self.hands[player]) == 0:
             self.winner = player
             self.game_over = True
-            return 100, True
-        
-        if self.pass_count >= self.num_players:
+            result = 100, True
+        elif self.pass_count >= self.num_players:
             self.game_over = True
             self.winner = self._calculate_winner_by_points()
-            return 0, True
-            
-        self.current_player = (self.current_player + 1) % self.num_players
-        return 0, False
+            result = 0, True
+        else:
+            self.current_player = (self.current_player + 1) % self.num_players
+            result = 0, False
+
+        if self.recorder is not None:
+            self.recorder.record_move(self, action)
+        return result
+
+    # --- BÚSQUEDA: clonar y hacer/deshacer jugadas ---
+    def clone(self):
+        """
+        Copia independiente para explorar jugadas. Comparte lo inmutable
+        (all_pieces, piezas, tuplas de fichas y registros de history_*) y
+        copia solo los contenedores que step() modifica. El clon empieza con
+        la pila de deshacer vacía.
+        """
+        new = self.__class__.__new__(self.__class__)
+        new.__dict__.update(self.__dict__)
+        new.hands = {p: h[:] for p, h in self.hands.items()}
+        new.mesa = self.mesa[:]
+        new.extremos = self.extremos[:]
+        new.history_left = self.history_left[:]
+        new.history_right = self.history_right[:]
+        new.passes = self.passes[:]
+        new._moves_cache = dict(self._moves_cache)
+        new._undo = []
+        new.recorder = None  # Las copias de búsqueda no se graban
+        return new
+
+    def push(self, move):
+        """
+        step() que se puede deshacer con pop(). Es para búsqueda: el recorder
+        no ve estas jugadas (no hay forma de deshacer un record_move()).
+        """
+        player = self.current_player
+        hand = self.hands[player][:] if move is not None else None
+        self._undo.append((move, player, hand, self.extremos[:], self.center_tile,
+                           self.pass_count, self.winner, self.game_over))
+        recorder, self.recorder = self.recorder, None
+        try:
+            return self.step(move)
+        finally:
+            self.recorder = recorder
+
+    def pop(self):
+        """Deshace la última jugada hecha con push() y la devuelve."""
+        move, player, hand, extremos, center, pass_count, winner, game_over = self._undo.pop()
+        if move is None:
+            self.passes.pop()
+        if hand is not None and len(self.hands[player]) != len(hand):
+            self.hands[player] = hand
+            self.mesa.pop()
+            if center is not None:
+                if move[1] == 'L': self.history_left.pop()
+                else: self.history_right.pop()
+            self._moves_cache.clear()
+
+        self.current_player = player
+        self.extremos = extremos
+        self.center_tile = center
+        self.pass_count = pass_count
+        self.winner = winner
+        self.game_over = game_over
+        return move
+
+    def set_hand(self, player, tiles):
+        """Sustituye la mano de un jugador (p.ej. al muestrear manos ocultas)."""
+        self.hands[player] = list(tiles)
+        self._moves_cache.clear()
 
     def _calculate_winner_by_points(self):
         sums = {p: sum(f[0]+f[1] for f in h) for p, h in self.hands.items()}
@@ -143,4 +270,68 @@ class DominoGame:
             return 0 if t1 < t2 else 1
         return min(sums, key=sums.get)
         
-    def _get_state(self): return {}
\ No newline at end of file
+    def _get_state(self): return {}
+
+# --- TABLAS POR ÍNDICE DE FICHA ---
+# Índice fijo de cada ficha dentro de all_pieces (mismo orden que DominoGame) y
+# máscaras de 55 bits sobre esos índices (domino_belief). Los juegos más pequeños
+# usan los mismos índices: el doble seis es un subconjunto del doble nueve.
+ALL_PIECES = make_pieces(MAX_PIP)
+PIECE_INDEX = {f: idx for idx, f in enumerate(ALL_PIECES)}
+PIECE_BITS = [1 << idx for idx in range(len(ALL_PIECES))]
+# PIP_MASKS[v]: todas las fichas que contienen el valor v
+PIP_MASKS = [sum(1 << idx for idx, f in enumerate(ALL_PIECES) if v in f) for v in range(10)]
+
+
+# --- REPARTOS EN BLOQUE ---
+# Un reparto es (orden, sorteo): el orden de las fichas de all_pieces (las
+# hand_size primeras para el jugador 0, etc.) y un entero para el sorteo de salida si nadie tiene dobles
+# (sorteo % num_jugadores). Con DominoGame.reset(deal=...) se juega tal cual.
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _splitmix64(x):
+    x = x + _GOLDEN
+    x = (x ^ (x >> np.uint64(30))) * _MIX_1
+    x = (x ^ (x >> np.uint64(27))) * _MIX_2
+    return x ^ (x >> np.uint64(31))
+
+
+def seeded_deals(seeds, num_pieces=len(ALL_PIECES)):
+    """
+    Repartos de las partidas con semillas `seeds` (N,), en una sola operación
+    vectorizada: (órdenes (N, num_pieces), sorteos (N,)). Cada reparto depende
+    solo de su semilla, así que una partida se repite sola, sin rehacer el lote.
+    """
+    seeds = np.asarray(seeds).astype(np.uint64)[:, None]
+    with np.errstate(over='ignore'):
+        keys = _splitmix64(_splitmix64(seeds) + np.arange(num_pieces + 1, dtype=np.uint64))
+    return np.argsort(keys[:, :-1], axis=1), keys[:, -1] >> np.uint64(1)
+
+
+def _as_list(deal):
+    # Indexar listas con enteros de Python es bastante más rápido que con np.int64
+    orden, lot = deal
+    return (orden.tolist() if isinstance(orden, np.ndarray) else orden), lot
+
+
+def seeded_deal(seed, num_pieces=len(ALL_PIECES)):
+    """Reparto de una sola partida: el mismo que su fila en seeded_deals()."""
+    orders, lots = seeded_deals([seed], num_pieces)
+    return orders[0], lots[0]
+
+
+def deal_batch(n, rng, num_players=4, num_pieces=len(ALL_PIECES)):
+    """n repartos de un np.random.Generator con una sola permutación vectorizada: (órdenes (n, num_pieces), sorteos (n,))."""
+    orders = rng.permuted(np.broadcast_to(np.arange(num_pieces), (n, num_pieces)), axis=1)
+    return orders, rng.integers(0, num_players, size=n)
+
+
+def iter_mask(mask):
+    """Devuelve los índices de los bits activos en orden ascendente."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
@@ -1,38 +1,99 @@
 import gymnasium as gym
 import numpy as np
 from gymnasium import spaces
-from domino_engine import DominoGame
+from domino_engine import DominoGame, MAX_PIP, deal_batch, seeded_deal
+from domino_layout import ObsLayout, obs_layout
+
+SIDE_INDEX = {'L': 0, 'R': 1}
+DEAL_BATCH = 256  # Repartos que cada DominoEnv saca de golpe de su generador
+
+
+# --- TABLAS DE CODIFICACIÓN (O(1)) del doble nueve ---
+LAYOUT = obs_layout(MAX_PIP)
+TILE_INDEX = LAYOUT.tile_index
+_TILE_INDEX = LAYOUT.tile_list
+ACTION_TILES = LAYOUT.action_tiles
+ACTION_SIDES = LAYOUT.action_sides
+
+
+def encode_obs(game, player, layout=LAYOUT):
+    """Observación de DominoEnv (133 floats con doble nueve) para cualquier jugador, construida desde cero."""
+    tiles = layout.tile_list
+    obs = np.zeros(layout.obs_size, dtype=np.float32)
+    for v1, v2 in game.hands[player]:
+        obs[tiles[v1][v2]] = 1.0
+    if game.extremos[0] != -1:
+        obs[layout.left + game.extremos[0]] = 1.0
+        obs[layout.right + game.extremos[1]] = 1.0
+    for v1, v2 in game.mesa:
+        obs[layout.board + tiles[v1][v2]] = 1.0
+    if game.num_players == 4:
+        for p in (1, 2, 3):
+            obs[layout.counts - 1 + p] = len(game.hands[p]) / game.hand_size
+    elif game.num_players == 2:
+        obs[layout.counts] = len(game.hands[1]) / game.hand_size
+    return obs
+
+
+def encode_mask(valid_moves, layout=LAYOUT):
+    """Máscara de acciones (110 con doble nueve) a partir de una lista de jugadas (ficha, lado)."""
+    tiles = layout.tile_list
+    mask = np.zeros(layout.num_actions, dtype=bool)
+    for (v1, v2), lado in valid_moves:
+        mask[tiles[v1][v2] * 2 + SIDE_INDEX[lado]] = True
+    return mask
 
 class DominoEnv(gym.Env):
     metadata = {'render.modes': ['human']}
 
-    def __init__(self):
+    def __init__(self, max_pip=MAX_PIP, hand_size=None, layout_pip=None):
         super(DominoEnv, self).__init__()
-        self.game = DominoGame()
+        self.game = DominoGame(max_pip=max_pip, hand_size=hand_size)
+        self._deals = []
+
+        # layout_pip: plantilla de observación y acciones (por defecto la del propio juego).
+        # Con layout_pip=9 una partida de doble seis usa los mismos espacios que el doble nueve
+        self.layout = obs_layout(max_pip if layout_pip is None else layout_pip)
+        if self.layout.max_pip < max_pip:
+            raise ValueError(f"El doble {max_pip} no cabe en la plantilla del doble {self.layout.max_pip}")
         
-        # 110 Acciones posibles
-        self.action_space = spaces.Discrete(110)
+        # 110 Acciones posibles con doble nueve
+        self.action_space = spaces.Discrete(self.layout.num_actions)
 
-        # Vector de 133: Mano(55) + Extremos(20) + Mesa(55) + Cuentas Rival(3)
-        self.observation_space = spaces.Box(low=0, high=1, shape=(133,), dtype=np.float32)
+        # Vector de 133 con doble nueve: Mano(55) + Extremos(20) + Mesa(55) + Cuentas Rival(3)
+        self.observation_space = spaces.Box(low=0, high=1, shape=(self.layout.obs_size,), dtype=np.float32)
 
     def reset(self, seed=None, options=None):
+        """
+        seed fija la secuencia de repartos de este entorno (el motor baraja con
+        self.np_random). options={'deal_seed': s} juega el reparto de
+        seeded_deal(s), p.ej. para repetir una partida concreta de un torneo.
+        """
         super().reset(seed=seed)
-        self.game.reset()
+        self.game.rng = self.np_random
+        if seed is not None:
+            self._deals = []
+        deal_seed = (options or {}).get('deal_seed')
+        self.game.reset(deal=self._next_deal() if deal_seed is None
+                        else seeded_deal(deal_seed, len(self.game.all_pieces)))
+        self._reset_obs_buffers()
         return self._get_obs(), {}
 
+    def _next_deal(self):
+        # Los repartos salen de DEAL_BATCH en DEAL_BATCH: una permutación vectorizada en vez de barajar en cada reset
+        if not self._deals:
+            orders, lots = deal_batch(DEAL_BATCH, self.np_random, self.game.num_players, len(self.game.all_pieces))
+            self._deals = list(zip(orders.tolist(), lots.tolist()))[::-1]
+        return self._deals.pop()
+
     def step(self, action_idx):
         ficha, lado = self._decode_action(action_idx)
         player = self.game.current_player
         
         valid_moves = self.game.get_valid_moves(player)
         
-        real_move = None
-        for vm in valid_moves:
-            f_valid, l_valid = vm
-            if set(f_valid) == set(ficha) and l_valid == lado:
-                real_move = vm
-                break
+        # ficha ya viene ordenada de ACTION_TILES, igual que en get_valid_moves
+        real_move = (ficha, lado) if (ficha, lado) in valid_moves else None
         
         if not valid_moves:
             _, game_done = self.game.step(None)
@@ -42,6 +103,7 @@ class DominoEnv(gym.Env):
             return self._get_obs(), -10, True, False, {}
         else:
             reward_points, game_done = self.game.step(real_move)
+            self._update_obs_buffers(player, ficha)
             
             if game_done:
                 if self.game.winner == player:
@@ -54,73 +116,85 @@ class DominoEnv(gym.Env):
         terminated = game_done
         return self._get_obs(), reward, terminated, False, {}
 
+    def step_with_mask(self, action_idx):
+        """step() + action_masks() del siguiente estado en una sola llamada."""
+        obs, reward, terminated, truncated, info = self.step(action_idx)
+        return obs, reward, terminated, truncated, info, self.action_masks()
+
     def action_masks(self):
-        mask = np.zeros(110, dtype=bool)
         player = self.game.current_player
-        valid_moves = self.game.get_valid_moves(player)
-        
-        if not valid_moves:
-            return mask 
-
-        for move in valid_moves:
-            ficha, lado = move
-            idx = self._encode_action(ficha, lado)
-            if idx < 110:
-                mask[idx] = True
-        return mask
+        return encode_mask(self.game.get_valid_moves(player), self.layout)
 
     def _encode_action(self, ficha, lado):
-        f_sorted = tuple(sorted(ficha))
         try:
-            ficha_idx = self.game.all_pieces.index(f_sorted)
+            ficha_idx = self.layout.tile_list[ficha[0]][ficha[1]]
             lado_idx = 0 if lado == 'L' else 1
             return ficha_idx * 2 + lado_idx
         except:
             return 0
 
     def _get_obs(self):
-        player = self.game.current_player
-        hand = self.game.hands[player]
-        mesa_fichas = self.game.mesa
-        extremos = self.game.extremos
-        
-        hand_vec = np.zeros(55, dtype=np.float32)
-        for f in hand:
-            hand_vec[self._get_ficha_index(f)] = 1.0
-            
-        left_vec = np.zeros(10, dtype=np.float32)
-        right_vec = np.zeros(10, dtype=np.float32)
-        if extremos[0] != -1:
-            left_vec[extremos[0]] = 1.0
-            right_vec[extremos[1]] = 1.0
-            
-        board_vec = np.zeros(55, dtype=np.float32)
-        for f in mesa_fichas:
-            board_vec[self._get_ficha_index(f)] = 1.0
-            
-        # Observación de oponentes (Normalizada 0-1)
-        opp_counts = np.zeros(3, dtype=np.float32)
-        if self.game.num_players == 4:
-            opp_counts[0] = len(self.game.hands[1]) / 10.0
-            opp_counts[1] = len(self.game.hands[2]) / 10.0
-            opp_counts[2] = len(self.game.hands[3]) / 10.0
-        elif self.game.num_players == 2:
-            opp_counts[0] = len(self.game.hands[1]) / 10.0
-            opp_counts[1] = 0.0 
-            opp_counts[2] = 0.0
-            
-        return np.concatenate([hand_vec, left_vec, right_vec, board_vec, opp_counts])
+        # Copia barata del buffer persistente del jugador en turno
+        return self._obs_buffers[self.game.current_player].copy()
+
+    def _reset_obs_buffers(self):
+        """Reconstruye desde cero una observación por jugador tras reset()."""
+        game = self.game
+        layout = self.layout
+        tiles = layout.tile_list
+        buffers = np.zeros((game.num_players, layout.obs_size), dtype=np.float32)
+
+        hands = game.hands
+        for p in range(game.num_players):
+            for v1, v2 in hands[p]:
+                buffers[p, tiles[v1][v2]] = 1.0
+        self._hand_sizes = [len(hands[p]) for p in range(game.num_players)]
+
+        # Extremos y mesa (vacíos salvo que el juego venga ya empezado)
+        if game.extremos[0] != -1:
+            buffers[:, layout.left + game.extremos[0]] = 1.0
+            buffers[:, layout.right + game.extremos[1]] = 1.0
+        for v1, v2 in game.mesa:
+            buffers[:, layout.board + tiles[v1][v2]] = 1.0
+
+        # Observación de oponentes (Normalizada 0-1), por asiento absoluto
+        for p in range(game.num_players):
+            col = self._opp_count_col(p)
+            if col is not None:
+                buffers[:, col] = self._hand_sizes[p] / game.hand_size
+
+        self._obs_buffers = buffers
+
+    def _update_obs_buffers(self, player, ficha):
+        """Aplica en sitio el efecto de que player coloque ficha."""
+        buffers = self._obs_buffers
+        layout = self.layout
+        idx = layout.tile_list[ficha[0]][ficha[1]]
+        buffers[player, idx] = 0.0
+        buffers[:, layout.board + idx] = 1.0
+
+        buffers[:, layout.left:layout.board] = 0.0
+        buffers[:, layout.left + self.game.extremos[0]] = 1.0
+        buffers[:, layout.right + self.game.extremos[1]] = 1.0
+
+        self._hand_sizes[player] -= 1
+        col = self._opp_count_col(player)
+        if col is not None:
+            buffers[:, col] = self._hand_sizes[player] / self.game.hand_size
+
+    def _opp_count_col(self, player):
+        # 4 jugadores: asientos 1..3 -> columnas 130..132; 2 jugadores: asiento 1 -> 130 (doble nueve)
+        if self.game.num_players == 4 and player > 0:
+            return self.layout.counts - 1 + player
+        if self.game.num_players == 2 and player == 1:
+            return self.layout.counts
+        return None
 
     def _get_ficha_index(self, ficha):
-        f_sorted = tuple(sorted(ficha))
         try:
-            return self.game.all_pieces.index(f_sorted)
+            return self.layout.tile_list[ficha[0]][ficha[1]]
         except:
             return 0
 
     def _decode_action(self, action_idx):
-        ficha_idx = action_idx // 2
-        lado_idx = action_idx % 2
-        ficha = self.game.all_pieces[ficha_idx]
-        lado = 'L' if lado_idx == 0 else 'R'
-        return ficha, lado
\ No newline at end of file
+        return self.layout.action_tiles[action_idx], self.layout.action_sides[action_idx]
\ No newline at end of file
@@ -0,0 +1,44 @@
+import numpy as np
+from domino_engine import MAX_PIP, make_pieces
+
+
+class ObsLayout:
+    """
+    Posiciones de la observación y de las acciones para fichas del doble
+    max_pip (N fichas, V = max_pip + 1 valores):
+        [0, N)            mano del jugador en turno
+        [left, left + V)  extremo izquierdo (one-hot)
+        [right, right+V)  extremo derecho (one-hot)
+        [board, board+N)  fichas en la mesa
+        [counts, +3)      fichas de los rivales / hand_size (asientos 1..3)
+    y acción = ficha_idx * 2 + lado. Con doble nueve: 133 floats y 110 acciones.
+    Un juego más pequeño cabe en la plantilla de uno mayor (sus fichas son un
+    subconjunto), así una misma red sirve para doble seis y doble nueve.
+    """
+    def __init__(self, max_pip):
+        self.max_pip = max_pip
+        self.pieces = make_pieces(max_pip)
+        n, v = len(self.pieces), max_pip + 1
+        self.num_pieces = n
+        self.num_actions = 2 * n
+        self.left, self.right, self.board = n, n + v, n + 2 * v
+        self.counts = 2 * n + 2 * v
+        self.obs_size = self.counts + 3
+        # TILE_INDEX[a][b]: índice de la ficha (a, b) en la plantilla, en cualquier orden
+        self.tile_index = np.zeros((v, v), dtype=np.int64)
+        for idx, (a, b) in enumerate(self.pieces):
+            self.tile_index[a, b] = self.tile_index[b, a] = idx
+        self.tile_list = self.tile_index.tolist()  # Listas anidadas: más rápidas para consultas escalares
+        # Decodificación acción -> (ficha, lado)
+        self.action_tiles = [self.pieces[a // 2] for a in range(self.num_actions)]
+        self.action_sides = ['L' if a % 2 == 0 else 'R' for a in range(self.num_actions)]
+
+
+_LAYOUTS = {}
+
+
+def obs_layout(max_pip=MAX_PIP):
+    layout = _LAYOUTS.get(max_pip)
+    if layout is None:
+        layout = _LAYOUTS[max_pip] = ObsLayout(max_pip)
+    return layout
@@ -0,0 +1,232 @@
+import glob
+import os
+import numpy as np
+from stable_baselines3.common.callbacks import BaseCallback
+from domino_batch import PASS, sample_random_actions
+from domino_engine import MAX_PIP
+from domino_numpy_policy import NumpyPolicy, export_policy
+from domino_vec_env import DominoVecEnv
+
+
+class OpponentPool:
+    """
+    Rivales congelados para el entrenamiento por liga. Cada rival es una
+    NumpyPolicy exportada de un checkpoint (None = bot aleatorio, que solo se
+    usa mientras no haya checkpoints).
+
+    Muestreo priorizado: peso = (tasa de victorias del rival contra el
+    aprendiz) ** power, con suavizado (w + 1) / (n + 2) para que los rivales
+    nuevos se prueben enseguida.
+    """
+    def __init__(self, max_size=10, power=2.0, seed=None):
+        self.max_size = max_size
+        self.power = power
+        self.rng = np.random.default_rng(seed)
+        self.names = []
+        self.paths = []             # .npz de cada rival (None = bot aleatorio)
+        self.policies = []
+        self.games = np.zeros(0, dtype=np.int64)
+        self.wins = np.zeros(0, dtype=np.int64)
+        # Los rivales retirados no se borran: hay partidas en curso que los referencian por índice
+        self.active = np.zeros(0, dtype=bool)
+
+    def __len__(self):
+        return int(self.active.sum())
+
+    def add(self, name, path):
+        """Incorpora el rival exportado en `path` (None = bot aleatorio)."""
+        if name in self.names:
+            return
+        if path is not None:
+            # Con el primer checkpoint real el bot aleatorio deja la liga
+            for i, p in enumerate(self.policies):
+                if p is None: self.active[i] = False
+        live = np.flatnonzero(self.active)
+        if len(live) >= self.max_size:
+            self.active[live[0]] = False  # El más antiguo
+        self.names.append(name)
+        self.paths.append(path)
+        self.policies.append(NumpyPolicy(path) if path is not None else None)
+        self.games = np.append(self.games, 0)
+        self.wins = np.append(self.wins, 0)
+        self.active = np.append(self.active, True)
+
+    def refresh(self, directory, prefix="domino_checkpoint"):
+        """Añade los checkpoints de CheckpointCallback que aún no estén en la liga."""
+        def steps(path):
+            return int(path.rsplit("_", 2)[-2])
+        for path in sorted(glob.glob(os.path.join(directory, f"{prefix}_*_steps.zip")), key=steps):
+            base = path[:-len(".zip")]
+            name = os.path.basename(base)
+            if name in self.names:
+                continue
+            npz = base + ".npz"
+            if not os.path.exists(npz):
+                export_policy(base, npz)
+            self.add(name, npz)
+        if not self.names:
+            self.add("random", None)
+
+    def weights(self):
+        win_rate = (self.wins + 1) / (self.games + 2)
+        w = np.where(self.active, win_rate ** self.power, 0.0)
+        return w / w.sum()
+
+    def sample(self, k):
+        return self.rng.choice(len(self.names), size=k, p=self.weights())
+
+    def record(self, opponents, opponent_won):
+        np.add.at(self.games, opponents, 1)
+        np.add.at(self.wins, opponents, opponent_won.astype(np.int64))
+
+    def get_state(self):
+        return {
+            'names': list(self.names), 'paths': list(self.paths),
+            'games': self.games.copy(), 'wins': self.wins.copy(), 'active': self.active.copy(),
+            'rng': self.rng.bit_generator.state,
+        }
+
+    def set_state(self, state):
+        self.names = list(state['names'])
+        self.paths = list(state['paths'])
+        self.policies = [NumpyPolicy(p) if p is not None else None for p in self.paths]
+        self.games = state['games'].copy()
+        self.wins = state['wins'].copy()
+        self.active = state['active'].copy()
+        self.rng.bit_generator.state = state['rng']
+
+    def summary(self):
+        return [(self.names[i], int(self.games[i]), int(self.wins[i])) for i in np.flatnonzero(self.active)]
+
+
+class LeagueVecEnv(DominoVecEnv):
+    """
+    DominoVecEnv de autojuego: la política que entrena solo controla
+    learner_seat y el resto de asientos los juega un rival de la liga,
+    sorteado por partida. Entre dos step() del aprendiz los rivales avanzan
+    dentro del propio entorno, con una inferencia por lotes por rival.
+
+    Recompensas del aprendiz: 0.1 por jugada, 100 / -20 al terminar la
+    partida (la termine quien la termine) y -10 por jugada inválida.
+    """
+    def __init__(self, num_envs, pool, num_players=4, teams=False, seed=None, learner_seat=0, max_pip=MAX_PIP,
+                 layout_pip=None):
+        self.pool = pool
+        self.learner_seat = learner_seat
+        self.opponent = np.zeros(num_envs, dtype=np.int64)
+        self._bot_rng = np.random.default_rng(None if seed is None else seed + 1)
+        super().__init__(num_envs, num_players, teams, seed=seed, max_pip=max_pip, layout_pip=layout_pip)
+
+    def reset(self):
+        super().reset()
+        self._new_games(np.ones(self.num_envs, dtype=bool))
+        return self._get_obs()
+
+    def step_wait(self):
+        game = self.game
+        actions = self._actions
+
+        masks = game.valid_move_masks()
+        has_moves = masks.any(axis=1)
+        chosen_ok = masks[self._rows, actions]
+        invalid = has_moves & ~chosen_ok
+
+        step_actions = np.where(has_moves, actions, PASS)
+        game.step(step_actions, mask=~invalid)
+        self._play_opponents()
+
+        finished = game.game_over & ~invalid
+        won = finished & self._learner_won()
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        rewards[has_moves & ~finished] = 0.1
+        rewards[won] = 100
+        rewards[finished & ~won] = -20
+        rewards[invalid] = -10
+        dones = finished | invalid
+
+        if finished.any():
+            self.pool.record(self.opponent[finished], ~won[finished])
+
+        obs = self._get_obs()
+        infos = [{} for _ in range(self.num_envs)]
+        if dones.any():
+            for i in np.flatnonzero(dones):
+                infos[i]["terminal_observation"] = obs[i].copy()
+                infos[i]["TimeLimit.truncated"] = False
+            game.reset(dones)
+            self._new_games(dones)
+            obs = self._get_obs()
+        return obs, rewards, dones, infos
+
+    def get_state(self):
+        state = super().get_state()
+        state.update(opponent=self.opponent.copy(), bot_rng=self._bot_rng.bit_generator.state,
+                     pool=self.pool.get_state())
+        return state
+
+    def set_state(self, state):
+        super().set_state(state)
+        self.opponent[:] = state['opponent']
+        self._bot_rng.bit_generator.state = state['bot_rng']
+        self.pool.set_state(state['pool'])
+
+    # --- Rivales ---
+    def _new_games(self, mask):
+        rows = np.flatnonzero(mask)
+        self.opponent[rows] = self.pool.sample(len(rows))
+        self._play_opponents()
+
+    def _play_opponents(self):
+        """Avanza todas las partidas hasta que vuelva a tocarle al aprendiz (o terminen)."""
+        game = self.game
+        while True:
+            turn = ~game.game_over & (game.current_player != self.learner_seat)
+            if not turn.any():
+                return
+            masks = game.valid_move_masks()
+            acting = turn & masks.any(axis=1)
+            actions = np.full(self.num_envs, PASS, dtype=np.int64)
+            if acting.any():
+                obs = game.observations()
+                for opp in np.unique(self.opponent[acting]):
+                    rows = acting & (self.opponent == opp)
+                    policy = self.pool.policies[opp]
+                    if policy is None:
+                        actions[rows] = sample_random_actions(masks[rows], self._bot_rng)
+                    else:
+                        actions[rows] = policy.predict(obs[rows], action_masks=masks[rows])[0]
+            game.step(actions, mask=turn)
+
+    def _learner_won(self):
+        winner = self.game.winner
+        if self.game.teams and self.game.num_players == 4:
+            return (winner >= 0) & (winner % 2 == self.learner_seat % 2)
+        return winner == self.learner_seat
+
+
+class LeagueCallback(BaseCallback):
+    """Incorpora a la liga los checkpoints nuevos antes de cada rollout y registra sus estadísticas."""
+    def __init__(self, pool, checkpoint_dir, prefix="domino_checkpoint", verbose=0):
+        super().__init__(verbose)
+        self.pool = pool
+        self.checkpoint_dir = checkpoint_dir
+        self.prefix = prefix
+        self._last = (0, 0)
+
+    def _on_rollout_start(self):
+        before = len(self.pool.names)
+        self.pool.refresh(self.checkpoint_dir, self.prefix)
+        if self.verbose and len(self.pool.names) != before:
+            print(f"🏟️  Liga: {len(self.pool)} rivales ({self.pool.names[-1]})")
+
+    def _on_rollout_end(self):
+        games, wins = int(self.pool.games.sum()), int(self.pool.wins.sum())
+        played = games - self._last[0]
+        if played:
+            # Solo las partidas terminadas en este rollout
+            self.logger.record("league/learner_win_rate", 1 - (wins - self._last[1]) / played)
+        self.logger.record("league/pool_size", len(self.pool))
+        self._last = (games, wins)
+
+    def _on_step(self):
+        return True
@@ -0,0 +1,226 @@
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from domino_belief import SAMPLE_BATCH, BeliefTracker, deal_world, iter_worlds
+from domino_gym import encode_obs, encode_mask, _TILE_INDEX, SIDE_INDEX
+
+# Fichas en manos a partir de las que se usa el solver exacto: con 14 una decisión
+# del solver tarda ~15 ms de mediana (1v1), menos que 500 iteraciones de MCTS
+ENDGAME_TILES = 14
+# Parte de time_ms que puede gastar el solver; si aborta, MCTS usa lo que quede
+ENDGAME_TIME_SHARE = 0.5
+
+
+def player_won(game, player):
+    """True si player (o su equipo en 2 vs 2) ganó la partida terminada."""
+    if game.winner < 0:
+        return False
+    if game.teams and game.num_players == 4:
+        # winner es el jugador que dominó o el equipo (0/1) en un cierre
+        return game.winner % 2 == player % 2
+    return game.winner == player
+
+
+def sample_world(game, me, rng):
+    """
+    Determinización: reparte las fichas que `me` no ve entre los rivales,
+    respetando el tamaño de cada mano y los valores que cada rival ha
+    demostrado no tener al pasar (game.passes). Para muchos mundos seguidos
+    es mucho más barato domino_belief.iter_worlds, que los saca por lotes.
+    """
+    tracker = BeliefTracker.from_game(game, me)
+    owners = tracker.sample(1, np.random.default_rng(rng.getrandbits(64)))[0]
+    return deal_world(game, tracker, owners)
+
+
+class _Node:
+    __slots__ = ('move', 'player', 'parent', 'children', 'visits', 'wins', 'avail', 'prior')
+
+    def __init__(self, move, player, parent, prior=None):
+        self.move = move
+        self.player = player        # Quién hizo la jugada que lleva a este nodo
+        self.parent = parent
+        self.children = {}
+        self.visits = 0
+        self.wins = 0
+        self.avail = 1              # Veces que la jugada estuvo disponible (ISMCTS)
+        self.prior = prior
+
+    def score(self, c):
+        q = self.wins / self.visits
+        if self.prior is not None:
+            # PUCT con la probabilidad de la red como prior
+            return q + c * self.prior * math.sqrt(self.avail) / (1 + self.visits)
+        return q + c * math.sqrt(math.log(self.avail) / self.visits)
+
+
+def _search(game, me, rollouts, time_ms, seed, priors, c):
+    """ISMCTS de observador único. Devuelve ({jugada: visitas}, iteraciones)."""
+    rng = random.Random(seed)
+    worlds = iter_worlds(game, me, np.random.default_rng(seed),
+                         SAMPLE_BATCH if rollouts is None else min(rollouts, SAMPLE_BATCH))
+    root = _Node(None, None, None)
+    deadline = time.perf_counter() + time_ms / 1000.0 if time_ms else None
+
+    n = 0
+    while (rollouts is None or n < rollouts) and (deadline is None or time.perf_counter() < deadline):
+        world = next(worlds)
+        node = root
+
+        # 1. Selección / expansión sobre el mundo muestreado
+        while not world.game_over:
+            player = world.current_player
+            moves = world.get_valid_moves(player) or [None]
+            children = node.children
+            untried = []
+            for m in moves:
+                child = children.get(m)
+                if child is None: untried.append(m)
+                else: child.avail += 1
+
+            if untried:
+                m = rng.choice(untried)
+                prior = priors.get(m) if priors is not None and node is root else None
+                node = children[m] = _Node(m, player, node, prior)
+                world.step(m)
+                break
+
+            node = max((children[m] for m in moves), key=lambda ch: ch.score(c))
+            world.step(node.move)
+
+        # 2. Simulación aleatoria hasta el final
+        while not world.game_over:
+            moves = world.get_valid_moves(world.current_player)
+            world.step(rng.choice(moves) if moves else None)
+
+        # 3. Retropropagación desde el punto de vista de cada jugador
+        while node is not None:
+            node.visits += 1
+            if node.player is not None and player_won(world, node.player):
+                node.wins += 1
+            node = node.parent
+        n += 1
+
+    return {m: ch.visits for m, ch in root.children.items()}, n
+
+
+class PolicyPrior:
+    """
+    Probabilidades de la política como prior de la raíz. `model` puede ser un
+    MaskablePPO, una NumpyPolicy o una ruta (".npz" = runtime NumPy sin torch).
+    """
+    def __init__(self, model="modelos_domino_mask/domino_pro"):
+        if isinstance(model, str):
+            from domino_numpy_policy import load_policy
+            model = load_policy(model)
+        self.model = model
+
+    def __call__(self, game, player):
+        moves = game.get_valid_moves(player)
+        obs, mask = encode_obs(game, player), encode_mask(moves)
+        if hasattr(self.model, 'action_probs'):
+            probs = self.model.action_probs(obs, mask)
+        else:
+            import torch
+            policy = self.model.policy
+            obs, _ = policy.obs_to_tensor(obs)
+            with torch.no_grad():
+                dist = policy.get_distribution(obs, action_masks=mask)
+                probs = dist.distribution.probs[0].cpu().numpy()
+        return {m: float(probs[_TILE_INDEX[m[0][0]][m[0][1]] * 2 + SIDE_INDEX[m[1]]]) for m in moves}
+
+
+class MCTSPlayer:
+    """
+    Jugador de búsqueda (Information-Set MCTS) para cualquier asiento.
+
+    rollouts: iteraciones por decisión (None = sin límite).
+    time_ms:  presupuesto de tiempo por decisión (None = sin límite).
+    prior:    callable (game, player) -> {jugada: prob}, p.ej. PolicyPrior().
+    workers:  >1 reparte la búsqueda entre procesos y suma las visitas de la raíz.
+    endgame_tiles: con esa cantidad de fichas en manos o menos se usa el
+              solver exacto (EndgameSolver); 0 lo desactiva. Con time_ms el
+              solver tiene ENDGAME_TIME_SHARE del presupuesto de la decisión.
+    book:     domino_book.OpeningBook que se consulta antes de buscar.
+    """
+    def __init__(self, rollouts=1000, time_ms=None, c=0.7, prior=None, workers=1, seed=None,
+                 endgame_tiles=ENDGAME_TILES, book=None):
+        if rollouts is None and time_ms is None:
+            raise ValueError("MCTSPlayer necesita rollouts o time_ms")
+        self.rollouts = rollouts
+        self.time_ms = time_ms
+        self.c = c
+        self.prior = prior
+        self.workers = workers
+        self.rng = random.Random(seed)
+        self._pool = None
+        self.last_stats = {}
+        self.book = book
+
+        self.endgame_tiles = endgame_tiles
+        self.endgame = None
+        if endgame_tiles:
+            # Import diferido: domino_endgame depende de este módulo
+            from domino_endgame import EndgameSolver
+            self.endgame = EndgameSolver(seed=self.rng.getrandbits(32),
+                                         time_ms=time_ms * ENDGAME_TIME_SHARE if time_ms else None)
+
+    def choose_move(self, game):
+        """Devuelve la jugada (ficha, lado) para el jugador en turno, o None si pasa."""
+        me = game.current_player
+        moves = game.get_valid_moves(me)
+        if len(moves) <= 1:
+            return moves[0] if moves else None
+
+        if self.book is not None:
+            move = self.book.lookup(game)
+            if move is not None:
+                self.last_stats = {'book': True}
+                return move
+
+        start = time.perf_counter()
+        if self.endgame is not None:
+            move = self._endgame_move(game)
+            if move is not None:
+                return move
+
+        priors = self.prior(game, me) if self.prior is not None else None
+        # time_ms es por decisión: lo que haya gastado un solver abortado se descuenta
+        time_ms = self.time_ms
+        if time_ms:
+            time_ms = max(1.0, time_ms - (time.perf_counter() - start) * 1000.0)
+
+        if self.workers <= 1:
+            visits, n = _search(game, me, self.rollouts, time_ms, self.rng.getrandbits(32), priors, self.c)
+        else:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            per_worker = None if self.rollouts is None else max(1, self.rollouts // self.workers)
+            futures = [self._pool.submit(_search, game, me, per_worker, time_ms,
+                                         self.rng.getrandbits(32), priors, self.c)
+                       for _ in range(self.workers)]
+            visits, n = {}, 0
+            for fut in futures:
+                v, k = fut.result()
+                n += k
+                for m, cnt in v.items():
+                    visits[m] = visits.get(m, 0) + cnt
+
+        elapsed = time.perf_counter() - start
+        self.last_stats = {'iterations': n, 'ms': elapsed * 1000.0, 'visits': visits}
+        return max(visits, key=visits.get)
+
+    def _endgame_move(self, game):
+        """Jugada del solver exacto, o None si no aplica o se agotó su presupuesto."""
+        from domino_endgame import endgame_move
+        move = endgame_move(self.endgame, game, self.endgame_tiles)
+        if move is not None:
+            self.last_stats = dict(self.endgame.stats, solver=True)
+        return move
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
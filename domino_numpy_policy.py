@@ -0,0 +1,91 @@
+import sys
+import numpy as np
+
+ACTIVATIONS = {
+    'tanh': np.tanh,
+    'relu': lambda x: np.maximum(x, 0.0),
+}
+MASKED_LOGIT = np.float32(-1e8)  # Mismo valor que MaskableCategorical de sb3_contrib
+
+
+def export_policy(model, out_path):
+    """
+    Guarda en un .npz los pesos de la MlpPolicy (solo la rama de la política:
+    el valor no hace falta para jugar). `model` puede ser una ruta o un MaskablePPO.
+    """
+    import torch.nn as nn
+    if isinstance(model, str):
+        from sb3_contrib import MaskablePPO
+        model = MaskablePPO.load(model, device='cpu')
+    policy = model.policy
+
+    act = {nn.Tanh: 'tanh', nn.ReLU: 'relu'}.get(policy.activation_fn)
+    if act is None:
+        raise ValueError(f"Activación no soportada: {policy.activation_fn.__name__}")
+
+    layers = [m for m in policy.mlp_extractor.policy_net if isinstance(m, nn.Linear)]
+    layers.append(policy.action_net)
+    arrays = {}
+    for i, layer in enumerate(layers):
+        arrays[f'w{i}'] = layer.weight.detach().cpu().numpy().T.astype(np.float32)
+        arrays[f'b{i}'] = layer.bias.detach().cpu().numpy().astype(np.float32)
+    np.savez_compressed(out_path, activation=act, num_layers=len(layers), **arrays)
+    return out_path
+
+
+class NumpyPolicy:
+    """
+    Política exportada con export_policy() ejecutada solo con NumPy.
+    predict() tiene la misma firma que MaskablePPO.predict: con deterministic
+    el argmax de los logits con las acciones ilegales enmascaradas y si no una
+    muestra de action_probs() con el generador de la política (semilla seed).
+    """
+    def __init__(self, path, seed=None):
+        self.rng = np.random.default_rng(seed)
+        with np.load(path) as data:
+            n = int(data['num_layers'])
+            self.weights = [(data[f'w{i}'], data[f'b{i}']) for i in range(n)]
+            self.activation = ACTIVATIONS[str(data['activation'])]
+
+    def logits(self, obs):
+        x = np.asarray(obs, dtype=np.float32)
+        *hidden, (w, b) = self.weights
+        for hw, hb in hidden:
+            x = self.activation(x @ hw + hb)
+        return x @ w + b
+
+    def masked_logits(self, obs, action_masks=None):
+        logits = self.logits(obs)
+        if action_masks is not None:
+            logits = np.where(np.asarray(action_masks, dtype=bool), logits, MASKED_LOGIT)
+        return logits
+
+    def action_probs(self, obs, action_masks=None):
+        """Distribución de la política sobre las 110 acciones."""
+        logits = self.masked_logits(obs, action_masks)
+        e = np.exp(logits - logits.max(axis=-1, keepdims=True))
+        return e / e.sum(axis=-1, keepdims=True)
+
+    def predict(self, obs, state=None, episode_start=None, deterministic=True, action_masks=None):
+        if deterministic:
+            return self.masked_logits(obs, action_masks).argmax(axis=-1), None
+        # Muestreo por inversión de la acumulada, una uniforme por fila
+        cdf = self.action_probs(obs, action_masks).cumsum(axis=-1)
+        u = self.rng.random(cdf.shape[:-1] + (1,)) * cdf[..., -1:]
+        return np.minimum((cdf <= u).sum(axis=-1), cdf.shape[-1] - 1), None
+
+
+def load_policy(path):
+    """NumpyPolicy si la ruta es un .npz; si no, el MaskablePPO de SB3 (carga torch)."""
+    if path.endswith(".npz"):
+        return NumpyPolicy(path)
+    from sb3_contrib import MaskablePPO
+    return MaskablePPO.load(path, device='cpu')
+
+
+if __name__ == "__main__":
+    # Uso: python domino_numpy_policy.py [modelo_sb3] [salida.npz]
+    src = sys.argv[1] if len(sys.argv) > 1 else "modelos_domino_mask/domino_pro"
+    dst = sys.argv[2] if len(sys.argv) > 2 else src + ".npz"
+    export_policy(src, dst)
+    print(f"✅ Política exportada: {dst}")
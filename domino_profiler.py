@@ -0,0 +1,204 @@
+import functools
+import importlib
+import json
+import os
+import time
+from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.vec_env import SubprocVecEnv
+
+# --- FASES INSTRUMENTADAS ---
+# (módulo, clase, método) -> fase. enable() sustituye cada método por una versión
+# cronometrada y disable() deja el original: desactivado el coste es cero.
+TARGETS = [
+    ("domino_engine", "DominoGame", "_compute_valid_moves", "move_gen"),
+    ("domino_engine", "DominoGame", "step", "engine_step"),
+    ("domino_gym", "DominoEnv", "_get_obs", "obs_encoding"),
+    ("domino_gym", "DominoEnv", "_reset_obs_buffers", "obs_encoding"),
+    ("domino_gym", "DominoEnv", "_update_obs_buffers", "obs_encoding"),
+    ("domino_gym", "DominoEnv", "action_masks", "mask_building"),
+    ("domino_gym", "DominoEnv", "step", "env_overhead"),
+    ("domino_batch", "BatchDominoGame", "observations", "obs_encoding"),
+    ("domino_batch", "BatchDominoGame", "valid_move_masks", "mask_building"),
+    ("domino_batch", "BatchDominoGame", "step", "engine_step"),
+    ("domino_vec_env", "DominoVecEnv", "step_wait", "env_overhead"),
+    ("domino_league", "LeagueVecEnv", "step_wait", "env_overhead"),
+    ("domino_numpy_policy", "NumpyPolicy", "predict", "inference"),
+]
+PHASES = ("move_gen", "obs_encoding", "mask_building", "engine_step", "inference", "env_overhead")
+
+
+class Profiler:
+    """
+    Llamadas y tiempo por fase en el proceso actual. Los tiempos son
+    exclusivos: lo que tarda una fase instrumentada dentro de otra (p.ej.
+    move_gen dentro de action_masks) se descuenta de la de fuera, así que las
+    fases suman el total sin contar nada dos veces. Pensado para un solo hilo.
+    """
+    def __init__(self):
+        self.calls = {p: 0 for p in PHASES}
+        self.total_ns = {p: 0 for p in PHASES}
+        self._stack = []
+
+    def wrap(self, phase, fn):
+        calls, total_ns, stack = self.calls, self.total_ns, self._stack
+        calls.setdefault(phase, 0)
+        total_ns.setdefault(phase, 0)
+        clock = time.perf_counter_ns
+
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            stack.append(0)
+            t0 = clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                dt = clock() - t0
+                inner = stack.pop()
+                calls[phase] += 1
+                total_ns[phase] += dt - inner
+                if stack:
+                    stack[-1] += dt
+        timed.__wrapped_phase__ = phase
+        return timed
+
+    def reset(self):
+        # En sitio: los métodos instrumentados guardan referencias a estos dicts
+        for phase in self.calls:
+            self.calls[phase] = 0
+            self.total_ns[phase] = 0
+
+    def report(self):
+        """Resumen serializable a JSON del proceso actual."""
+        return {'pid': os.getpid(), 'phases': _phase_stats(self.calls, self.total_ns)}
+
+
+def _phase_stats(calls, total_ns):
+    return {p: {'calls': calls[p], 'total_s': total_ns[p] / 1e9,
+                'mean_us': total_ns[p] / calls[p] / 1e3 if calls[p] else 0.0}
+            for p in calls}
+
+
+PROFILER = Profiler()
+_patched = []   # (objeto, atributo, original, estaba en vars(objeto))
+
+
+def instrument(obj, name, phase):
+    """Cronometra obj.name como `phase` (clase o instancia) hasta disable()."""
+    own = name in vars(obj)
+    original = getattr(obj, name)
+    if getattr(original, '__wrapped_phase__', None) is not None:
+        return
+    setattr(obj, name, PROFILER.wrap(phase, original))
+    _patched.append((obj, name, original, own))
+
+
+def enable():
+    """Instrumenta las clases de TARGETS en este proceso (los módulos que no se puedan importar se ignoran)."""
+    if _patched:
+        return
+    for module, cls, method, phase in TARGETS:
+        try:
+            klass = getattr(importlib.import_module(module), cls)
+        except ImportError:
+            continue
+        # Solo donde se define: las subclases que no lo redefinen heredan la versión cronometrada
+        if method in vars(klass):
+            instrument(klass, method, phase)
+
+
+def instrument_policy(policy):
+    """Cronometra como 'inference' el forward de una política de SB3 (lo que llama collect_rollouts)."""
+    instrument(policy, "forward", "inference")
+
+
+def disable():
+    """Restaura todos los métodos originales."""
+    while _patched:
+        obj, name, original, own = _patched.pop()
+        if own:
+            setattr(obj, name, original)
+        else:
+            delattr(obj, name)  # Era un método de la clase tapado en la instancia
+
+
+def is_enabled():
+    return bool(_patched)
+
+
+def merge_reports(reports):
+    """
+    Agrega informes (p.ej. uno por tarea de un pool): total por fase y
+    detalle por proceso, sumando los informes que vienen del mismo pid.
+    """
+    total = ({}, {})
+    per_pid = {}
+    for report in reports:
+        for acc in (total, per_pid.setdefault(report['pid'], ({}, {}))):
+            calls, total_ns = acc
+            for phase, stats in report['phases'].items():
+                calls[phase] = calls.get(phase, 0) + stats['calls']
+                total_ns[phase] = total_ns.get(phase, 0) + round(stats['total_s'] * 1e9)
+    return {'phases': _phase_stats(*total),
+            'workers': [{'pid': pid, 'phases': _phase_stats(*acc)} for pid, acc in per_pid.items()]}
+
+
+def write_json(path, report):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def print_report(report):
+    phases = report['phases']
+    total = sum(s['total_s'] for s in phases.values()) or 1.0
+    print(f"⏱️  {'Fase':<14}{'Llamadas':>12}{'Total (s)':>12}{'µs/llamada':>12}{'%':>8}")
+    for phase, s in sorted(phases.items(), key=lambda kv: -kv[1]['total_s']):
+        if s['calls']:
+            print(f"   {phase:<14}{s['calls']:>12,}{s['total_s']:>12.3f}{s['mean_us']:>12.2f}{s['total_s'] / total * 100:>7.1f}%")
+
+
+class ProfilerCallback(BaseCallback):
+    """
+    Registra en TensorBoard (profile/<fase>_ms y profile/<fase>_share) el
+    tiempo de cada fase durante el último rollout, sumando el proceso
+    principal y, con SubprocVecEnv, cada trabajador (ver attach_worker). El
+    acumulado por proceso se escribe además en `json_path`.
+    """
+    def __init__(self, json_path=None, verbose=0):
+        super().__init__(verbose)
+        self.json_path = json_path
+        self._last = {}
+
+    def _on_training_start(self):
+        enable()
+        instrument_policy(self.model.policy)
+
+    def _reports(self):
+        reports = [PROFILER.report()]
+        if isinstance(self.training_env, SubprocVecEnv):
+            reports += self.training_env.env_method("profile_report")
+        return reports
+
+    def _on_rollout_end(self):
+        merged = merge_reports(self._reports())
+        spent = {p: s['total_s'] - self._last.get(p, 0.0) for p, s in merged['phases'].items()}
+        total = sum(spent.values()) or 1.0
+        for phase, seconds in spent.items():
+            self.logger.record(f"profile/{phase}_ms", seconds * 1000)
+            self.logger.record(f"profile/{phase}_share", seconds / total)
+        self._last = {p: s['total_s'] for p, s in merged['phases'].items()}
+        if self.json_path:
+            write_json(self.json_path, merged)
+
+    def _on_training_end(self):
+        if self.verbose:
+            print_report(merge_reports(self._reports()))
+
+    def _on_step(self):
+        return True
+
+
+def attach_worker(env):
+    """En un proceso de SubprocVecEnv: instrumenta y expone el informe para env_method('profile_report')."""
+    enable()
+    env.profile_report = PROFILER.report
+    return env
@@ -0,0 +1,287 @@
+import os
+import numpy as np
+from domino_engine import ALL_PIECES, MAX_PIP, PIECE_INDEX, DominoGame
+
+# --- FORMATO BINARIO ---
+# Cabecera de 16 bytes y después registros de RECORD_SIZE bytes, uno por partida.
+# Las fichas se numeran siempre como en ALL_PIECES (doble nueve), también las de un
+# juego más pequeño; hand_size es el número de fichas de cada mano en `deal`.
+#   deal        28 B  asiento de cada ficha (nibble; 0xF = no repartida), 55 nibbles + relleno
+#   num_players  1 B
+#   flags        1 B  bit 0: equipos, bit 1: terminó por cierre, bits 4-7: max_pip del juego
+#                     (0 = doble nueve, como en los registros anteriores)
+#   starter      1 B  jugador que salió
+#   winner       1 B  DominoGame.winner (-1 si se cortó antes de terminar)
+#   num_moves    1 B
+#   moves      223 B  ficha_idx * 2 + lado (igual que DominoEnv), PASS_BYTE = pasar
+MAGIC = b"DOMREC\x00\x01"
+HEADER_SIZE = 16
+RECORD_SIZE = 256
+MAX_MOVES = 223
+PASS_BYTE = 0xFF
+PAD_BYTE = 0xFE
+NO_SEAT = 0xF
+FLAG_TEAMS = 1
+FLAG_BLOCKED = 2
+FLAG_PIP_SHIFT = 4
+
+RECORD_DTYPE = np.dtype([
+    ('deal', np.uint8, 28),
+    ('num_players', np.uint8),
+    ('flags', np.uint8),
+    ('starter', np.uint8),
+    ('winner', np.int8),
+    ('num_moves', np.uint8),
+    ('moves', np.uint8, MAX_MOVES),
+])
+assert RECORD_DTYPE.itemsize == RECORD_SIZE
+
+
+def _header():
+    return MAGIC + RECORD_SIZE.to_bytes(2, 'little') + bytes(HEADER_SIZE - len(MAGIC) - 2)
+
+
+class GameRecorder:
+    """
+    Hook de grabación para DominoGame: DominoGame(..., recorder=rec) llama a
+    start_game() en cada reset() y a record_move() en cada step() válido
+    (la partida se cierra al terminar, o sin ganador si se reinicia antes).
+    Una partida sin ninguna jugada no se guarda: así el reset() del
+    constructor no deja un registro vacío si después se llama a reset().
+    Los registros se acumulan en memoria; con `path` se vuelcan al fichero
+    cada `flush_every` partidas y al cerrar. Sin `path`, take() devuelve los
+    bytes (p.ej. para mandarlos desde un proceso trabajador).
+    """
+    def __init__(self, path=None, flush_every=4096):
+        self.path = path
+        self.flush_every = flush_every
+        self.buffer = bytearray()
+        self.games = 0
+        self._game = None
+        if path is not None and (not os.path.exists(path) or os.path.getsize(path) == 0):
+            with open(path, "wb") as f:
+                f.write(_header())
+
+    def start_game(self, game):
+        # Una partida sin terminar se guarda igualmente (winner = -1); una sin jugadas, no
+        self._discard_empty()
+        if self._game is not None:
+            self._finish()
+        seats = [NO_SEAT] * 56
+        for p, hand in game.hands.items():
+            for f in hand:
+                seats[PIECE_INDEX[f]] = p
+        self._game = game
+        self._deal = bytes(seats[i] | (seats[i + 1] << 4) for i in range(0, 56, 2))
+        self._starter = game.current_player
+        self._moves = bytearray()
+
+    def record_move(self, game, action):
+        if action is None:
+            self._moves.append(PASS_BYTE)
+        else:
+            ficha, lado = action
+            self._moves.append(PIECE_INDEX[ficha] * 2 + (lado == 'R'))
+        if game.game_over:
+            self._finish()
+
+    def _discard_empty(self):
+        if self._game is not None and not self._moves:
+            self._game = None
+
+    def _finish(self):
+        game = self._game
+        moves = self._moves
+        if len(moves) > MAX_MOVES:
+            raise ValueError(f"Partida de {len(moves)} jugadas: el formato admite {MAX_MOVES}")
+        flags = FLAG_TEAMS if game.teams else 0
+        if game.max_pip != MAX_PIP:
+            flags |= game.max_pip << FLAG_PIP_SHIFT
+        if game.game_over and game.pass_count >= game.num_players:
+            flags |= FLAG_BLOCKED
+        self.buffer += self._deal
+        self.buffer += bytes((game.num_players, flags, self._starter, game.winner & 0xFF, len(moves)))
+        self.buffer += moves
+        self.buffer += bytes([PAD_BYTE]) * (MAX_MOVES - len(moves))
+        self.games += 1
+        self._game = None
+        if self.path is not None and self.games % self.flush_every == 0:
+            self.flush()
+
+    def take(self):
+        """Devuelve y vacía los registros acumulados."""
+        data, self.buffer = bytes(self.buffer), bytearray()
+        return data
+
+    def flush(self):
+        if self.path is not None and self.buffer:
+            append_records(self.path, self.take())
+
+    def close(self):
+        self._discard_empty()
+        if self._game is not None:
+            self._finish()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def append_records(path, data):
+    """Añade registros ya codificados (bytes de GameRecorder.take()) a un archivo."""
+    new = not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, "ab") as f:
+        if new:
+            f.write(_header())
+        f.write(data)
+
+
+class GameArchive:
+    """
+    Lectura de un archivo de partidas con np.memmap: nada se carga ni se
+    convierte a objetos de Python hasta que se accede a un lote, así que
+    sirve para archivos de varios GB.
+    """
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        if header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} no es un archivo de partidas")
+        if int.from_bytes(header[8:10], 'little') != RECORD_SIZE:
+            raise ValueError(f"{path}: tamaño de registro no soportado")
+        count = (os.path.getsize(path) - HEADER_SIZE) // RECORD_SIZE
+        self.records = np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=HEADER_SIZE, shape=(count,))
+
+    def __len__(self):
+        return len(self.records)
+
+    def batches(self, batch_size=65536):
+        """Lotes consecutivos de registros (vistas estructuradas del memmap)."""
+        for start in range(0, len(self.records), batch_size):
+            yield self.records[start:start + batch_size]
+
+
+def unpack_deals(records):
+    """Asiento de cada ficha, (B, 55) uint8 (NO_SEAT = no repartida)."""
+    deal = records['deal']
+    seats = np.stack([deal & 0xF, deal >> 4], axis=-1).reshape(len(records), 56)
+    return seats[:, :len(ALL_PIECES)]
+
+
+def record_max_pip(records):
+    """max_pip del juego de cada registro, (B,)."""
+    pip = (records['flags'] >> FLAG_PIP_SHIFT).astype(np.int64)
+    return np.where(pip == 0, MAX_PIP, pip)
+
+
+def record_hand_size(records):
+    """Fichas de cada mano en el reparto de cada registro, (B,)."""
+    return (unpack_deals(records) == 0).sum(axis=1)
+
+
+def hands_from_deals(records):
+    """Manos iniciales como máscara (B, P, 55) bool."""
+    seats = unpack_deals(records)
+    num_players = int(records['num_players'].max()) if len(records) else 0
+    return seats[:, None, :] == np.arange(num_players, dtype=np.uint8)[None, :, None]
+
+
+def move_actions(records):
+    """Jugadas como acciones de DominoEnv, (B, MAX_MOVES) int16: -1 = pasar, -2 = relleno."""
+    moves = records['moves'].astype(np.int16)
+    moves[moves == PASS_BYTE] = -1
+    moves[moves == PAD_BYTE] = -2
+    return moves
+
+
+def games_lost_by(records, seat):
+    """Índices de las partidas que no ganó `seat` (ni su equipo, si se jugó por equipos)."""
+    winner = records['winner'].astype(np.int64)
+    teams = (records['flags'] & FLAG_TEAMS).astype(bool) & (records['num_players'] == 4)
+    won = np.where(teams, (winner >= 0) & (winner % 2 == seat % 2), winner == seat)
+    return np.flatnonzero(~won)
+
+
+def record_moves(record):
+    """Jugadas de un registro como acciones de DominoGame: (ficha, lado) o None = pasar."""
+    return [None if b == PASS_BYTE else (ALL_PIECES[b >> 1], 'R' if b & 1 else 'L')
+            for b in record['moves'][:record['num_moves']]]
+
+
+def initial_game(record):
+    """DominoGame con el reparto (y el juego de fichas) del registro, antes de la primera jugada."""
+    num_players = int(record['num_players'])
+    game = DominoGame(num_players, bool(record['flags'] & FLAG_TEAMS), max_pip=int(record_max_pip(record[None])[0]),
+                      hand_size=int(record_hand_size(record[None])[0]))
+    seats = unpack_deals(record[None])[0]
+    for p in range(num_players):
+        game.set_hand(p, [ALL_PIECES[i] for i in np.flatnonzero(seats == p)])
+    game.current_player = int(record['starter'])
+    game.start_reason = f"Sale el jugador {game.current_player}"
+    return game
+
+
+def replay_game(record):
+    """Reconstruye la partida de un registro como un DominoGame terminado."""
+    game = initial_game(record)
+    for move in record_moves(record):
+        game.step(move)
+    return game
+
+
+class ReplayTimeline:
+    """
+    Acceso aleatorio a las posiciones de una partida grabada. Se reproduce una
+    vez guardando un clone() cada `keyframe_every` jugadas; position(i) parte
+    del keyframe anterior, así que saltar a cualquier jugada cuesta como mucho
+    keyframe_every - 1 step().
+    """
+    def __init__(self, record, keyframe_every=8):
+        self.keyframe_every = keyframe_every
+        self.moves = record_moves(record)
+        self.players = []           # Quién hizo cada jugada
+        self.keyframes = []
+        game = initial_game(record)
+        for i, move in enumerate(self.moves):
+            if i % keyframe_every == 0:
+                self.keyframes.append(game.clone())
+            self.players.append(game.current_player)
+            game.step(move)
+        if len(self.moves) % keyframe_every == 0:
+            self.keyframes.append(game.clone())
+
+    def __len__(self):
+        """Número de posiciones: el reparto y una más por jugada."""
+        return len(self.moves) + 1
+
+    def position(self, i):
+        """Copia de la partida tras las primeras `i` jugadas (se puede modificar libremente)."""
+        i = min(max(i, 0), len(self.moves))
+        k = i // self.keyframe_every
+        game = self.keyframes[k].clone()
+        for move in self.moves[k * self.keyframe_every:i]:
+            game.step(move)
+        return game
+
+
+if __name__ == "__main__":
+    # Resumen de un archivo: python domino_records.py partidas.dom
+    import sys
+    import time
+    archive = GameArchive(sys.argv[1])
+    start = time.perf_counter()
+    winners = np.zeros(5, dtype=np.int64)
+    moves = blocked = 0
+    for batch in archive.batches():
+        winners += np.bincount(batch['winner'].astype(np.int64) + 1, minlength=5)[:5]
+        moves += int(batch['num_moves'].sum())
+        blocked += int((batch['flags'] & FLAG_BLOCKED).astype(bool).sum())
+    total = time.perf_counter() - start
+    n = max(len(archive), 1)
+    print(f"📂 {sys.argv[1]}: {len(archive):,} partidas ({os.path.getsize(sys.argv[1]) / 2**20:.1f} MB)")
+    print(f"   Jugadas por partida: {moves / n:.1f} | Cierres: {blocked / n * 100:.1f}%")
+    print("   Victorias por asiento: " + " | ".join(f"{p}: {winners[p + 1]}" for p in range(4)))
+    print(f"⚡ Leído en {total * 1000:.0f} ms ({len(archive) / max(total, 1e-9):,.0f} partidas/s)")
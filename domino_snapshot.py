@@ -0,0 +1,177 @@
+import glob
+import io
+import os
+import pickle
+import random
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import torch
+from stable_baselines3.common.callbacks import BaseCallback
+
+SNAPSHOT_PREFIX = "snapshot"
+
+
+def capture_state(model):
+    """
+    Estado completo del entrenamiento en memoria: pesos y optimizador (vía
+    model.save), contador de pasos, última observación, generadores de
+    python/numpy/torch y, si el VecEnv lo soporta, el estado de sus partidas.
+    """
+    buf = io.BytesIO()
+    model.save(buf)
+    env = model.get_env()
+    return {
+        'model': buf.getvalue(),
+        'num_timesteps': model.num_timesteps,
+        'rng': {
+            'python': random.getstate(),
+            'numpy': np.random.get_state(),
+            'torch': torch.get_rng_state(),
+        },
+        'env': env.get_state() if hasattr(env, 'get_state') else None,
+    }
+
+
+def write_snapshot(path, state):
+    """Escritura atómica: fichero temporal + fsync + os.replace."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return path
+
+
+def snapshot_steps(path):
+    """Pasos de entrenamiento de un snapshot, leídos del nombre del fichero."""
+    return int(path.rsplit("_", 2)[-2])
+
+
+def list_snapshots(directory):
+    """Snapshots de `directory` ordenados por número de pasos."""
+    paths = glob.glob(os.path.join(directory, f"{SNAPSHOT_PREFIX}_*_steps.pkl"))
+    return sorted(paths, key=snapshot_steps)
+
+
+def latest_snapshot(directory):
+    paths = list_snapshots(directory)
+    return paths[-1] if paths else None
+
+
+def load_snapshot(path, env, algo=None, device='cpu'):
+    """
+    Reconstruye el modelo de un snapshot sobre `env` y restaura los
+    generadores y el estado del entorno para continuar exactamente donde se
+    quedó. Seguir con model.learn(restantes, reset_num_timesteps=False).
+    """
+    if algo is None:
+        from sb3_contrib import MaskablePPO as algo
+    with open(path, "rb") as f:
+        state = pickle.load(f)
+
+    # Con el estado del entorno se conserva _last_obs y learn() no lo reinicia;
+    # sin él (p.ej. SubprocVecEnv) las partidas empiezan de cero
+    model = algo.load(io.BytesIO(state['model']), env=env, device=device,
+                      force_reset=state['env'] is None)
+    if state['env'] is not None:
+        env.set_state(state['env'])
+    random.setstate(state['rng']['python'])
+    np.random.set_state(state['rng']['numpy'])
+    torch.set_rng_state(state['rng']['torch'])
+    return model
+
+
+def ignore_stop_signals():
+    """
+    Para los procesos de SubprocVecEnv: ignorar SIGINT/SIGTERM y dejar que
+    el proceso principal decida cuándo parar. Terminan igual cuando se cierra
+    el VecEnv o muere el principal (se cierran sus tuberías).
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+
+class SnapshotCallback(BaseCallback):
+    """
+    Guarda snapshots reanudables cada `interval_s` segundos y al recibir
+    SIGINT/SIGTERM. Se capturan al empezar un rollout (justo después de
+    train()), que es el único punto donde basta con el estado anterior para
+    continuar de forma idéntica. La escritura a disco va en un hilo aparte.
+
+    Tras una señal se guarda el snapshot, se espera a que llegue a disco y se
+    detiene learn(); `stopped` queda a True. Un segundo Ctrl+C aborta ya.
+
+    Con SubprocVecEnv, Ctrl+C llega a todo el grupo de procesos: los
+    trabajadores tienen que llamar a ignore_stop_signals() en la factory de
+    su entorno (como train_domino.make_env). Si no, mueren al instante y el
+    rollout en curso falla al hablar con sus tuberías antes de llegar al
+    snapshot. Sus partidas no se guardan: al reanudar empiezan de cero.
+    """
+    def __init__(self, directory, interval_s=600, keep=3, verbose=0):
+        super().__init__(verbose)
+        self.directory = directory
+        self.interval_s = interval_s
+        self.keep = keep
+        self.stopped = False
+        self._stop_requested = False
+        self._writer = ThreadPoolExecutor(max_workers=1)
+        self._pending = None
+        self._old_handlers = {}
+        os.makedirs(directory, exist_ok=True)
+
+    # --- Señales ---
+    def _on_signal(self, signum, frame):
+        print(f"\n🛑 Señal {signal.Signals(signum).name}: se guardará un snapshot al terminar el rollout actual...")
+        self._stop_requested = True
+        # Un segundo Ctrl+C corta sin esperar
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    def _on_training_start(self):
+        self._last = time.monotonic()
+        if threading.current_thread() is threading.main_thread():
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                self._old_handlers[sig] = signal.signal(sig, self._on_signal)
+
+    def _on_training_end(self):
+        for sig, handler in self._old_handlers.items():
+            signal.signal(sig, handler)
+        self._old_handlers = {}
+        self.wait()
+
+    # --- Snapshots ---
+    def _on_rollout_start(self):
+        due = time.monotonic() - self._last >= self.interval_s
+        if not (due or self._stop_requested):
+            return
+        self.snapshot()
+        if self._stop_requested:
+            self.wait()
+            self.stopped = True
+
+    def snapshot(self):
+        """Captura el estado (hilo de entrenamiento) y lo escribe en segundo plano."""
+        state = capture_state(self.model)
+        path = os.path.join(self.directory, f"{SNAPSHOT_PREFIX}_{self.model.num_timesteps}_steps.pkl")
+        self.wait()  # Como mucho una escritura en vuelo
+        self._pending = self._writer.submit(self._write, path, state)
+        self._last = time.monotonic()
+        return path
+
+    def _write(self, path, state):
+        write_snapshot(path, state)
+        for old in list_snapshots(self.directory)[:-self.keep]:
+            os.remove(old)
+        if self.verbose:
+            print(f"💾 Snapshot: {path}")
+
+    def wait(self):
+        if self._pending is not None:
+            self._pending.result()
+            self._pending = None
+
+    def _on_step(self):
+        return not self.stopped
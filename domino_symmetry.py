@@ -0,0 +1,216 @@
+import numpy as np
+from domino_engine import ALL_PIECES, MAX_PIP, PIECE_INDEX
+from domino_layout import obs_layout
+
+# --- SIMETRÍA POR PERMUTACIÓN DE PUNTOS ---
+# Los 10 valores del doble nueve son intercambiables: renombrar los puntos con
+# una permutación sigma (ficha (a, b) -> (sigma[a], sigma[b])) da una partida con
+# las mismas jugadas legales. Solo lo rompen la suma de puntos al cerrarse la
+# partida y la salida por el doble más alto, así que las formas canónicas sirven
+# para compartir entradas de cachés y libros de aperturas y para aumentar datos
+# de la política, no para comparar valores que dependan del recuento.
+#
+# Una permutación se representa como perm[valor_original] = valor_nuevo.
+# Observaciones, máscaras y fichas usan la plantilla de DominoEnv del doble nueve.
+LAYOUT = obs_layout(MAX_PIP)
+NUM_VALUES = LAYOUT.max_pip + 1
+NUM_PIECES = LAYOUT.num_pieces
+PIECE_A = np.array([a for a, _ in LAYOUT.pieces])
+PIECE_B = np.array([b for _, b in LAYOUT.pieces])
+PAIR_INDEX = LAYOUT.tile_index                      # Índice de la ficha {a, b} en cualquier orden
+IDENTITY = np.arange(NUM_VALUES)
+# Tramos de la observación
+OBS_HAND = slice(0, NUM_PIECES)
+OBS_LEFT = slice(LAYOUT.left, LAYOUT.left + NUM_VALUES)
+OBS_RIGHT = slice(LAYOUT.right, LAYOUT.right + NUM_VALUES)
+OBS_BOARD = slice(LAYOUT.board, LAYOUT.board + NUM_PIECES)
+
+# Etiquetas de ficha: desconocida, mía, en la mesa y, con información completa, HAND + dueño
+UNKNOWN, MINE, BOARD, HAND = 0, 1, 2, 3
+
+
+# --- PERMUTACIONES SOBRE FICHAS, OBSERVACIONES Y ACCIONES ---
+def tile_map(perm):
+    """Índice nuevo de cada ficha: (55,) o (B, 55) para perm (10,) o (B, 10)."""
+    perm = np.asarray(perm)
+    return PAIR_INDEX[perm[..., PIECE_A], perm[..., PIECE_B]]
+
+
+def action_map(perm):
+    """Acción nueva de cada acción de DominoEnv (110,) o (B, 110); el lado no cambia."""
+    tiles = tile_map(perm)
+    return (tiles[..., :, None] * 2 + np.arange(2)).reshape(*tiles.shape[:-1], 2 * NUM_PIECES)
+
+
+def inverse(perm):
+    perm = np.asarray(perm)
+    inv = np.empty_like(perm)
+    np.put_along_axis(inv, perm, np.broadcast_to(IDENTITY, perm.shape), axis=-1)
+    return inv
+
+
+def permute_obs(obs, perm):
+    """Aplica perm a observaciones de DominoEnv (133,) o (B, 133); las cuentas de fichas no cambian."""
+    obs = np.asarray(obs)
+    perm = np.broadcast_to(perm, obs.shape[:-1] + (NUM_VALUES,))
+    tiles = tile_map(perm)
+    out = obs.copy()
+    for part, index in ((OBS_HAND, tiles), (OBS_LEFT, perm), (OBS_RIGHT, perm), (OBS_BOARD, tiles)):
+        np.put_along_axis(out[..., part], index, obs[..., part], axis=-1)
+    return out
+
+
+def permute_mask(mask, perm):
+    """Aplica perm a máscaras de acciones (110,) o (B, 110)."""
+    mask = np.asarray(mask)
+    perm = np.broadcast_to(perm, mask.shape[:-1] + (NUM_VALUES,))
+    out = np.empty_like(mask)
+    np.put_along_axis(out, action_map(perm), mask, axis=-1)
+    return out
+
+
+def permute_action(action, perm):
+    """Acción de la partida original -> acción en la partida permutada (una perm para todas o una por acción)."""
+    action = np.asarray(action)
+    amap = action_map(perm)
+    amap = np.broadcast_to(amap, np.broadcast_shapes(action.shape, amap.shape[:-1]) + amap.shape[-1:])
+    return np.take_along_axis(amap, action[..., None], axis=-1)[..., 0]
+
+
+def unpermute_action(action, perm):
+    """Inversa de permute_action: acción elegida en la forma canónica -> acción real."""
+    return permute_action(action, inverse(perm))
+
+
+def permute_move(move, perm):
+    """Lo mismo para una jugada de DominoGame (ficha, lado); None (pasar) se queda igual."""
+    if move is None:
+        return None
+    (a, b), lado = move
+    return ALL_PIECES[PAIR_INDEX[perm[a], perm[b]]], lado
+
+
+# --- FORMA CANÓNICA ---
+def _refine(labels, vertex, colors):
+    """Refinamiento de colores (1-WL) sobre el grafo de puntos con las fichas como aristas etiquetadas."""
+    while True:
+        sigs = [(colors[v], vertex[v], labels[v][v],
+                 tuple(sorted((labels[v][u], colors[u]) for u in range(NUM_VALUES) if u != v)))
+                for v in range(NUM_VALUES)]
+        ranks = {s: r for r, s in enumerate(sorted(set(sigs)))}
+        new = [ranks[s] for s in sigs]
+        if len(ranks) == len(set(colors)):
+            return new
+        colors = new
+
+
+def _twins(labels, a, b):
+    """El intercambio a <-> b no cambia nada: mismas fichas con todos los demás puntos."""
+    return labels[a][a] == labels[b][b] and all(labels[a][c] == labels[b][c] for c in range(NUM_VALUES) if c not in (a, b))
+
+
+def _encode(labels, vertex, perm):
+    inv = inverse(np.asarray(perm))
+    return (tuple(vertex[v] for v in inv),
+            tuple(labels[inv[i]][inv[j]] for i in range(NUM_VALUES) for j in range(i, NUM_VALUES)))
+
+
+def _search(labels, vertex, colors):
+    colors = _refine(labels, vertex, colors)
+    cells = {}
+    for v, c in enumerate(colors):
+        cells.setdefault(c, []).append(v)
+    cell = next((cells[c] for c in sorted(cells) if len(cells[c]) > 1), None)
+    if cell is None:
+        return _encode(labels, vertex, colors), colors
+
+    # Se individualiza un punto de la celda; entre gemelos basta con probar uno
+    reps = []
+    for v in cell:
+        if not any(_twins(labels, v, r) for r in reps):
+            reps.append(v)
+    best = None
+    for v in reps:
+        split = [2 * c + (c == colors[v] and u != v) for u, c in enumerate(colors)]
+        result = _search(labels, vertex, split)
+        if best is None or result[0] < best[0]:
+            best = result
+    return best
+
+
+def canonical_permutation(labels, vertex):
+    """
+    Permutación que lleva a la forma canónica. labels[a][b] (10x10 simétrica)
+    es la etiqueta de la ficha {a, b} y vertex[v] la de cada punto (p.ej.
+    si es extremo). Dos estados que se diferencian solo en el nombre de los
+    puntos reciben la misma forma canónica. Devuelve (perm, clave hashable).
+    """
+    key, colors = _search(labels, vertex, [0] * NUM_VALUES)
+    return np.array(colors), key
+
+
+def obs_labels(obs):
+    """Etiquetas de fichas y puntos desde el punto de vista de una observación de DominoEnv."""
+    obs = np.asarray(obs)
+    tiles = np.where(obs[OBS_HAND] > 0.5, MINE, np.where(obs[OBS_BOARD] > 0.5, BOARD, UNKNOWN))
+    labels = tiles[PAIR_INDEX].tolist()
+    vertex = list(zip((obs[OBS_LEFT] > 0.5).tolist(), (obs[OBS_RIGHT] > 0.5).tolist()))
+    return labels, vertex
+
+
+def canonicalize_obs(obs, mask=None):
+    """
+    Forma canónica de una observación (y su máscara). Devuelve
+    (obs_canónica, máscara_canónica o None, perm); la acción elegida en la
+    forma canónica se traduce a la partida real con unpermute_action(a, perm).
+    """
+    perm, _ = canonical_permutation(*obs_labels(obs))
+    return permute_obs(obs, perm), (permute_mask(mask, perm) if mask is not None else None), perm
+
+
+def game_labels(game, player=None):
+    """
+    Etiquetas de un DominoGame: con `player`, lo que ese jugador sabe (sus
+    fichas, la mesa y los pases); sin él, el estado completo (dueño de cada
+    ficha). Los pases marcan los puntos que cada jugador no tiene.
+    """
+    owner = np.full(NUM_PIECES, UNKNOWN)
+    for f in game.mesa:
+        owner[PIECE_INDEX[f]] = BOARD
+    for p in range(game.num_players):
+        if player is None or p == player:
+            for f in game.hands[p]:
+                owner[PIECE_INDEX[f]] = MINE if player is not None else HAND + p
+    passed = [0] * NUM_VALUES
+    for p, left, right in game.passes:
+        for v in (left, right):
+            if v >= 0:
+                passed[v] |= 1 << p
+    l_end, r_end = game.extremos
+    vertex = [(v == l_end, v == r_end, passed[v]) for v in range(NUM_VALUES)]
+    return owner[PAIR_INDEX].tolist(), vertex
+
+
+def canonical_key(game, player=None):
+    """
+    Clave de caché igual para todas las partidas equivalentes salvo nombre de
+    los puntos. Devuelve (clave, perm): las jugadas guardadas bajo la clave se
+    traducen a esta partida con permute_move(jugada, inverse(perm)).
+    """
+    perm, key = canonical_permutation(*game_labels(game, player))
+    return (game.num_players, game.teams, game.current_player, game.pass_count, player) + key, perm
+
+
+# --- AUMENTO DE DATOS ---
+def random_permutations(n, rng):
+    """n permutaciones aleatorias de los 10 puntos, (n, 10)."""
+    return rng.permuted(np.broadcast_to(IDENTITY, (n, NUM_VALUES)), axis=1)
+
+
+def augment_batch(obs, masks, actions, rng):
+    """
+    Renombra los puntos de cada muestra con una permutación aleatoria
+    distinta: (obs, máscaras, acciones) equivalentes para la política.
+    """
+    perms = random_permutations(len(actions), rng)
+    return permute_obs(obs, perms), permute_mask(masks, perms), permute_action(actions, perms)
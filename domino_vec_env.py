@@ -0,0 +1,110 @@
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import VecEnv
+from domino_batch import BatchDominoGame, PASS
+from domino_engine import MAX_PIP
+
+
+class DominoVecEnv(VecEnv):
+    """
+    VecEnv nativo de DominoEnv sobre BatchDominoGame: las N partidas viven en
+    un solo proceso y cada step() avanza todas con operaciones de NumPy.
+
+    Reproduce DominoEnv.step (recompensas 100 / -20 / 0.1 / 0, -10 por jugada
+    inválida) y la observación de 133 floats. Las partidas terminadas se
+    reinician solas y la observación final queda en info["terminal_observation"].
+    action_masks() devuelve la máscara apilada (N, 110) para MaskablePPO.
+    """
+    def __init__(self, num_envs, num_players=4, teams=False, seed=None, max_pip=MAX_PIP, hand_size=None,
+                 layout_pip=None):
+        # Juego de fichas y plantilla como en DominoEnv (doble nueve: 133 floats y 110 acciones)
+        self.game = BatchDominoGame(num_envs, num_players, teams, seed=seed, max_pip=max_pip,
+                                    hand_size=hand_size, layout_pip=layout_pip)
+        layout = self.game.layout
+        observation_space = spaces.Box(low=0, high=1, shape=(layout.obs_size,), dtype=np.float32)
+        action_space = spaces.Discrete(layout.num_actions)
+        self.render_mode = None
+        super().__init__(num_envs, observation_space, action_space)
+
+        self._rows = np.arange(num_envs)
+        self._obs = np.zeros((num_envs, layout.obs_size), dtype=np.float32)
+        self._actions = None
+
+    # --- API VecEnv ---
+    def reset(self):
+        if self._seeds[0] is not None:
+            self.game.rng = np.random.default_rng(self._seeds[0])
+        self._reset_seeds()
+        self._reset_options()
+        self.game.reset()
+        return self._get_obs()
+
+    def step_async(self, actions):
+        self._actions = np.asarray(actions, dtype=np.int64)
+
+    def step_wait(self):
+        game = self.game
+        actions = self._actions
+        player = game.current_player.copy()
+
+        masks = game.valid_move_masks()
+        has_moves = masks.any(axis=1)
+        chosen_ok = masks[self._rows, actions]
+        invalid = has_moves & ~chosen_ok
+
+        # Sin jugadas: el motor pasa. Jugada inválida: no se toca la partida.
+        step_actions = np.where(has_moves, actions, PASS)
+        _, dones = game.step(step_actions, mask=~invalid)
+
+        played = has_moves & chosen_ok
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        rewards[played & ~dones] = 0.1
+        won = played & dones & (game.winner == player)
+        rewards[won] = 100
+        rewards[played & dones & ~won] = -20
+        rewards[invalid] = -10
+        dones = dones | invalid
+
+        obs = self._get_obs()
+        infos = [{} for _ in range(self.num_envs)]
+        if dones.any():
+            for i in np.flatnonzero(dones):
+                infos[i]["terminal_observation"] = obs[i].copy()
+                infos[i]["TimeLimit.truncated"] = False
+            game.reset(dones)
+            obs = self._get_obs()
+        return obs, rewards, dones, infos
+
+    def close(self):
+        pass
+
+    def action_masks(self):
+        return self.game.valid_move_masks()
+
+    def get_attr(self, attr_name, indices=None):
+        value = getattr(self, attr_name)
+        return [value for _ in self._get_indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        result = getattr(self, method_name)(*method_args, **method_kwargs)
+        if indices is None and method_name == "action_masks":
+            # Ya viene apilado (N, 110): get_action_masks hace np.stack por filas
+            return result
+        return [result for _ in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
+
+    # --- Snapshots ---
+    def get_state(self):
+        return {'game': self.game.get_state()}
+
+    def set_state(self, state):
+        self.game.set_state(state['game'])
+
+    # --- Observación ---
+    def _get_obs(self):
+        return self.game.observations(out=self._obs).copy()
@@ -1,9 +1,17 @@
 import pygame
 import sys
+import math
 import random
-from sb3_contrib import MaskablePPO
+import os
+import argparse
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from domino_gym import DominoEnv
 from domino_engine import DominoGame
+from domino_mcts import MCTSPlayer, PolicyPrior
+from domino_numpy_policy import load_policy
+from domino_records import GameArchive, ReplayTimeline, games_lost_by
+from domino_book import BOOK_PATH, OpeningBook
 
 # --- CONFIGURACIÓN VISUAL ---
 SCREEN_WIDTH = 1280
@@ -18,14 +26,87 @@ TILE_W = 38
 TILE_H = 76
 GAP = 2
 
+MODEL_PATH = "modelos_domino_mask/domino_pro"
+
+# Bots: "random" o "mcts" (búsqueda con la red como prior si hay modelo)
+BOT_TYPE = "mcts"
+MCTS_TIME_MS = 400
+ENDGAME_TILES = 14  # Con tan pocas fichas en manos los bots juegan con el solver exacto
+MIN_TURN_MS = 500   # Tiempo mínimo que se muestra cada turno de bot / cada "¡PASO!"
+
+# Repeticiones (python gui_domino.py --replay partidas.dom)
+REPLAY_SPEED = 2.0          # Jugadas por segundo al reproducir
+REPLAY_KEYFRAME_EVERY = 8   # Cada cuántas jugadas se guarda una copia de la partida para saltar
+
 # Márgenes de seguridad
 MARGIN_TOP = 120
 MARGIN_BOTTOM = 150
 MARGIN_LEFT = 100
 MARGIN_RIGHT = 100
 
+class SnakeLayout:
+    """
+    Disposición en serpiente de una rama de la mesa. Guarda dónde se quedó:
+    extend() solo coloca las fichas de history que aún no estaban.
+    """
+    def __init__(self, start_x, start_y, start_direction):
+        self.items = []
+        self.curr_x, self.curr_y = start_x, start_y
+        self.direction = start_direction 
+        self.vertical_dir = -1 if start_direction == 1 else 1
+
+    def extend(self, history):
+        """Coloca las fichas nuevas de history y las devuelve."""
+        new = []
+        step_long = TILE_H + GAP
+        step_short = TILE_W + GAP
+        
+        for move in history[len(self.items):]:
+            ficha = move['ficha']
+            conector = move['conector']
+            nuevo = move['nuevo_extremo']
+            is_double = (ficha[0] == ficha[1])
+            direction = self.direction
+            
+            draw_x, draw_y = self.curr_x, self.curr_y
+            draw_vertical = False
+            val_left, val_right = 0, 0
+            offset = 0
+            
+            if is_double:
+                draw_vertical = True
+                draw_y = self.curr_y - (TILE_H - TILE_W)//2
+                if direction == -1: draw_x = self.curr_x - TILE_W 
+                val_left, val_right = ficha[0], ficha[1]
+                offset = step_short
+            else:
+                draw_vertical = False
+                if direction == -1: draw_x = self.curr_x - TILE_H
+                if direction == 1: val_left, val_right = conector, nuevo
+                else: val_left, val_right = nuevo, conector
+                offset = step_long
+
+            new.append({'x': draw_x, 'y': draw_y, 'v1': val_left, 'v2': val_right, 'vert': draw_vertical})
+            self.curr_x += (offset * direction)
+            
+            limit_right = SCREEN_WIDTH - MARGIN_RIGHT
+            limit_left = MARGIN_LEFT
+            next_x = self.curr_x + (step_long * direction)
+            hit_right = (direction == 1) and (next_x > limit_right)
+            hit_left = (direction == -1) and (next_x < limit_left)
+            
+            if hit_right or hit_left:
+                self.direction *= -1
+                if self.direction == 1: self.curr_x = limit_left
+                else: self.curr_x = limit_right
+                self.curr_y += (step_long * self.vertical_dir)
+                self.vertical_dir *= -1
+        self.items.extend(new)
+        return new
+
+
 class DominoGUI:
-    def __init__(self):
+    def __init__(self, bots=True):
         pygame.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Dominó Pro v3 - Snake AI (Espiral Fixed)")
@@ -33,12 +114,48 @@ class DominoGUI:
         self.big_font = pygame.font.SysFont("Segoe UI", 40, bold=True)
         self.clock = pygame.time.Clock()
         
-        print("Cargando IA...")
-        try:
-            self.model = MaskablePPO.load("modelos_domino_mask/domino_pro")
-        except:
-            self.model = None
-            print("⚠️ Modo Random (Modelo no encontrado)")
+        self.model = None
+        if bots:
+            print("Cargando IA...")
+            try:
+                # El .npz exportado evita cargar torch/SB3 (arranque mucho más rápido)
+                path = MODEL_PATH + ".npz" if os.path.exists(MODEL_PATH + ".npz") else MODEL_PATH
+                self.model = load_policy(path)
+            except:
+                print("⚠️ Modo Random (Modelo no encontrado)")
+
+        self.bot = None
+        if bots and BOT_TYPE == "mcts":
+            prior = PolicyPrior(self.model) if self.model is not None else None
+            # Las primeras jugadas salen del libro de aperturas (domino_book.py) si existe
+            book = OpeningBook(BOOK_PATH) if os.path.exists(BOOK_PATH) else None
+            self.bot = MCTSPlayer(rollouts=None, time_ms=MCTS_TIME_MS, prior=prior,
+                                  endgame_tiles=ENDGAME_TILES, book=book)
+
+        # Los bots piensan en un hilo aparte sobre una copia de la partida:
+        # la ventana sigue dibujando a 30 FPS mientras tanto
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.bot_future = None
+        self.turn_started = 0
+
+        # Sprites de fichas y mesa incremental (ver reset_board / sync_board)
+        self.sprites = {}
+        self.board_surface = None
+        self.board_game = None
+        self.layouts = None
+        self.dynamic_rects = []
+        self.full_redraw = True
+
+        # Repeticiones (ver load_replay)
+        self.archive = None
+        self.replay_games = []
+        self.replay_game_idx = 0
+        self.timeline = None
+        self.replay_move = 0
+        self.replay_clock = 0.0
+        self.replay_speed = REPLAY_SPEED
+        self.replay_playing = False
+        self.replay_dragging = False
 
         self.state = "MENU"
         self.game = None
@@ -78,101 +195,123 @@ class DominoGUI:
             px, py = pips_map[i]
             pygame.draw.circle(surface, DOT_COLOR, (int(cx + px*offset), int(cy + py*offset)), r)
 
-    def draw_tile_graphic(self, x, y, v1, v2, vertical=True, selected=False):
+    def render_tile(self, surface, x, y, v1, v2, vertical=True, selected=False):
+        """Dibuja una ficha con primitivas (sombra, borde y puntos). Solo se usa al crear sprites."""
         w, h = (TILE_W, TILE_H) if vertical else (TILE_H, TILE_W)
         rect = pygame.Rect(x, y, w, h)
         
-        pygame.draw.rect(self.screen, (20,20,20), (x+2, y+2, w, h), border_radius=4)
-        pygame.draw.rect(self.screen, TILE_COLOR, rect, border_radius=4)
+        pygame.draw.rect(surface, (20,20,20), (x+2, y+2, w, h), border_radius=4)
+        pygame.draw.rect(surface, TILE_COLOR, rect, border_radius=4)
         
         color_borde = HIGHLIGHT if selected else (80,80,80)
-        pygame.draw.rect(self.screen, color_borde, rect, 2 if selected else 1, border_radius=4)
+        pygame.draw.rect(surface, color_borde, rect, 2 if selected else 1, border_radius=4)
         
         half = TILE_W
         
         if vertical:
-            pygame.draw.line(self.screen, (150,150,150), (x+4, y+h//2), (x+w-4, y+h//2), 1)
-            self.draw_pips(self.screen, x, y, v1, half, True)
-            self.draw_pips(self.screen, x, y+h//2, v2, half, True)
+            pygame.draw.line(surface, (150,150,150), (x+4, y+h//2), (x+w-4, y+h//2), 1)
+            self.draw_pips(surface, x, y, v1, half, True)
+            self.draw_pips(surface, x, y+h//2, v2, half, True)
         else:
-            pygame.draw.line(self.screen, (150,150,150), (x+w//2, y+4), (x+w//2, y+h-4), 1)
-            self.draw_pips(self.screen, x, y, v1, half, False)
-            self.draw_pips(self.screen, x+w//2, y, v2, half, False)
-        
-        return rect
+            pygame.draw.line(surface, (150,150,150), (x+w//2, y+4), (x+w//2, y+h-4), 1)
+            self.draw_pips(surface, x, y, v1, half, False)
+            self.draw_pips(surface, x+w//2, y, v2, half, False)
 
-    def calculate_snake_layout(self, history, start_x, start_y, start_direction):
-        layout = []
-        curr_x, curr_y = start_x, start_y
-        direction = start_direction 
-        vertical_dir = -1 if start_direction == 1 else 1
-        step_long = TILE_H + GAP
-        step_short = TILE_W + GAP
-        
-        for move in history:
-            ficha = move['ficha']
-            conector = move['conector']
-            nuevo = move['nuevo_extremo']
-            is_double = (ficha[0] == ficha[1])
-            
-            draw_x, draw_y = curr_x, curr_y
-            draw_vertical = False
-            val_left, val_right = 0, 0
-            offset = 0
-            
-            if is_double:
-                draw_vertical = True
-                draw_y = curr_y - (TILE_H - TILE_W)//2
-                if direction == -1: draw_x = curr_x - TILE_W 
-                val_left, val_right = ficha[0], ficha[1]
-                offset = step_short
-            else:
-                draw_vertical = False
-                if direction == -1: draw_x = curr_x - TILE_H
-                if direction == 1: val_left, val_right = conector, nuevo
-                else: val_left, val_right = nuevo, conector
-                offset = step_long
+    def tile_sprite(self, v1, v2, vertical, selected=False):
+        """Superficie prerenderizada de la ficha (con sombra), cacheada por (v1, v2, orientación, selección)."""
+        key = (v1, v2, vertical, selected)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            w, h = (TILE_W, TILE_H) if vertical else (TILE_H, TILE_W)
+            sprite = pygame.Surface((w + 2, h + 2), pygame.SRCALPHA)
+            self.render_tile(sprite, 0, 0, v1, v2, vertical, selected)
+            self.sprites[key] = sprite
+        return sprite
 
-            layout.append({'x': draw_x, 'y': draw_y, 'v1': val_left, 'v2': val_right, 'vert': draw_vertical})
-            curr_x += (offset * direction)
-            
-            limit_right = SCREEN_WIDTH - MARGIN_RIGHT
-            limit_left = MARGIN_LEFT
-            next_x = curr_x + (step_long * direction)
-            hit_right = (direction == 1) and (next_x > limit_right)
-            hit_left = (direction == -1) and (next_x < limit_left)
-            
-            if hit_right or hit_left:
-                direction *= -1
-                if direction == 1: curr_x = limit_left
-                else: curr_x = limit_right
-                curr_y += (step_long * vertical_dir)
-                vertical_dir *= -1
-        return layout
-
-    def draw_board(self):
-        cx, cy = SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2
-        if self.game.center_tile is None: return
-
-        c_ficha = self.game.center_tile
-        c_vert = (c_ficha[0] == c_ficha[1])
-        start_x = cx - (TILE_W//2 if c_vert else TILE_H//2)
-        start_y = cy - (TILE_W//2) 
-        self.draw_tile_graphic(start_x, start_y, c_ficha[0], c_ficha[1], c_vert)
-        
-        off_x = (TILE_W if c_vert else TILE_H) + GAP
-        r_x = start_x + off_x
-        r_y = start_y + (TILE_H//2 if c_vert else TILE_W//2) - TILE_W//2
-        layout_r = self.calculate_snake_layout(self.game.history_right, r_x, r_y, 1)
-        for item in layout_r: self.draw_tile_graphic(item['x'], item['y'], item['v1'], item['v2'], item['vert'])
+    def draw_tile_graphic(self, x, y, v1, v2, vertical=True, selected=False, surface=None):
+        """Pega el sprite de la ficha; devuelve el rect de la ficha (sin la sombra)."""
+        (surface or self.screen).blit(self.tile_sprite(v1, v2, vertical, selected), (x, y))
+        w, h = (TILE_W, TILE_H) if vertical else (TILE_H, TILE_W)
+        return pygame.Rect(x, y, w, h)
+
+    # --- MESA: superficie persistente, solo se pintan las fichas nuevas ---
+    def reset_board(self):
+        self.board_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.board_surface.fill(BG_COLOR)
+        self.board_game = self.game
+        self.layouts = None
+        self.dynamic_rects = []
+        self.full_redraw = True
+
+    def sync_board(self):
+        """Añade a board_surface las fichas jugadas desde el último frame; devuelve sus rects."""
+        game = self.game
+        if self.board_game is not game or (self.layouts is not None and (
+                len(game.history_left) < len(self.layouts['L'].items) or
+                len(game.history_right) < len(self.layouts['R'].items))):
+            self.reset_board()
+        if game.center_tile is None:
+            return []
+
+        dirty = []
+        if self.layouts is None:
+            cx, cy = SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2
+            c_ficha = game.center_tile
+            c_vert = (c_ficha[0] == c_ficha[1])
+            start_x = cx - (TILE_W//2 if c_vert else TILE_H//2)
+            start_y = cy - (TILE_W//2) 
+            dirty.append(self.draw_tile_graphic(start_x, start_y, c_ficha[0], c_ficha[1], c_vert,
+                                                surface=self.board_surface))
             
-        l_x = start_x - GAP
-        l_y = start_y + (TILE_H//2 if c_vert else TILE_W//2) - TILE_W//2
-        layout_l = self.calculate_snake_layout(self.game.history_left, l_x, l_y, -1)
-        for item in layout_l: self.draw_tile_graphic(item['x'], item['y'], item['v1'], item['v2'], item['vert'])
+            off_x = (TILE_W if c_vert else TILE_H) + GAP
+            r_x = start_x + off_x
+            r_y = start_y + (TILE_H//2 if c_vert else TILE_W//2) - TILE_W//2
+            l_x = start_x - GAP
+            l_y = r_y
+            self.layouts = {'R': SnakeLayout(r_x, r_y, 1), 'L': SnakeLayout(l_x, l_y, -1)}
+
+        for side, history in (('R', game.history_right), ('L', game.history_left)):
+            for item in self.layouts[side].extend(history):
+                dirty.append(self.draw_tile_graphic(item['x'], item['y'], item['v1'], item['v2'], item['vert'],
+                                                    surface=self.board_surface))
+                item['rect'] = dirty[-1]
+                # Si las ramas se cruzan, la izquierda queda encima (mismo orden que un repintado completo)
+                if side == 'R':
+                    for other in self.layouts['L'].items:
+                        if other['rect'].colliderect(item['rect']):
+                            self.draw_tile_graphic(other['x'], other['y'], other['v1'], other['v2'], other['vert'],
+                                                   surface=self.board_surface)
+        # Incluir la sombra (+2 px) en la zona a refrescar
+        return [r.inflate(2, 2).move(1, 1) for r in dirty]
 
-    def draw_hands(self):
+    # --- FRAME: mesa incremental + capa dinámica ---
+    def begin_frame(self):
+        """
+        Pinta en pantalla las fichas nuevas de la mesa y repone el fondo de lo
+        dibujado en el frame anterior; después se vuelve a pintar encima la
+        capa dinámica. Devuelve los rects de mesa a refrescar.
+        """
+        board_dirty = self.sync_board()
+        if self.full_redraw:
+            self.screen.blit(self.board_surface, (0, 0))
+        else:
+            for r in board_dirty + self.dynamic_rects:
+                self.screen.blit(self.board_surface, r, r)
+        return board_dirty
+
+    def end_frame(self, board_dirty, drawn):
+        """Actualiza en pantalla solo las zonas que cambiaron (o todo, tras reset_board)."""
+        if self.full_redraw:
+            pygame.display.flip()
+            self.full_redraw = False
+        else:
+            pygame.display.update(board_dirty + self.dynamic_rects + drawn)
+        self.dynamic_rects = drawn
+
+    def draw_hands(self, reveal=False):
+        """Mano propia y dorsos de los rivales (o sus fichas, con reveal); devuelve los rects pintados."""
         self.tile_rects = [] 
+        drawn = []
         hand = self.game.hands[0]
         total_w = len(hand) * (TILE_W + 5)
         start_x = (SCREEN_WIDTH - total_w) // 2
@@ -183,18 +322,38 @@ class DominoGUI:
             offset = -15 if sel else 0
             rect = self.draw_tile_graphic(start_x + i*(TILE_W+5), y + offset, f[0], f[1], True, sel)
             self.tile_rects.append((rect, i, f))
+            drawn.append(rect.inflate(2, 2).move(1, 1))
             
         for p in range(1, self.game.num_players):
             n = len(self.game.hands[p])
-            if p==1:
+            if reveal:
+                drawn += self.draw_open_hand(p)
+            elif p==1:
                 h = n*25; sy = (SCREEN_HEIGHT - h)//2; sx = SCREEN_WIDTH - 50
-                for k in range(n): pygame.draw.rect(self.screen, (80,60,40), (sx, sy+k*25, 40, 20), border_radius=3)
+                for k in range(n): drawn.append(pygame.draw.rect(self.screen, (80,60,40), (sx, sy+k*25, 40, 20), border_radius=3))
             elif p==2:
                 w = n*25; sx = (SCREEN_WIDTH - w)//2; sy = 20
-                for k in range(n): pygame.draw.rect(self.screen, (80,60,40), (sx+k*25, sy, 20, 40), border_radius=3)
+                for k in range(n): drawn.append(pygame.draw.rect(self.screen, (80,60,40), (sx+k*25, sy, 20, 40), border_radius=3))
             elif p==3:
                 h = n*25; sy = (SCREEN_HEIGHT - h)//2; sx = 10
-                for k in range(n): pygame.draw.rect(self.screen, (80,60,40), (sx, sy+k*25, 40, 20), border_radius=3)
+                for k in range(n): drawn.append(pygame.draw.rect(self.screen, (80,60,40), (sx, sy+k*25, 40, 20), border_radius=3))
+        return drawn
+
+    def draw_open_hand(self, p):
+        """Fichas de un rival boca arriba, en su lado de la mesa (repeticiones)."""
+        hand = self.game.hands[p]
+        drawn = []
+        for k, f in enumerate(hand):
+            if p == 2:
+                w = len(hand) * (TILE_W + 5)
+                x, y, vert = (SCREEN_WIDTH - w)//2 + k*(TILE_W+5), 10, True
+            else:
+                h = len(hand) * (TILE_W + 4)
+                x = SCREEN_WIDTH - TILE_H - 12 if p == 1 else 10
+                x, y, vert = x, (SCREEN_HEIGHT - h)//2 + k*(TILE_W+4), False
+            rect = self.draw_tile_graphic(x, y, f[0], f[1], vert)
+            drawn.append(rect.inflate(2, 2).move(1, 1))
+        return drawn
 
     def draw_menu(self):
         self.screen.fill((20, 20, 25))
@@ -220,29 +379,201 @@ class DominoGUI:
             
             # FIX: Solo procesar si el input no está bloqueado por el cooldown
             if click and rect.collidepoint(mx, my) and not input_blocked:
+                self.cancel_bot_turn()
                 self.game = DominoGame(n, tm)
                 self.state = "PLAY"
                 self.selected_tile_idx = None
                 self.last_click_time = current_time # Actualizamos el tiempo para el nuevo juego
                 pygame.time.delay(100)
 
+    # --- TURNOS DE LOS BOTS (en segundo plano) ---
+    def choose_bot_move(self, game):
+        """Se ejecuta en el hilo del bot sobre una copia: nunca toca self.game."""
+        if self.bot is not None:
+            return self.bot.choose_move(game)
+        moves = game.get_valid_moves(game.current_player)
+        return random.choice(moves) if moves else None
+
+    def update_bot_turn(self):
+        """Lanza la decisión del bot si hace falta y la aplica cuando está lista (y pasó MIN_TURN_MS)."""
+        if self.bot_future is None:
+            self.turn_started = pygame.time.get_ticks()
+            self.bot_future = self.executor.submit(self.choose_bot_move, self.game.clone())
+            return
+        if not self.bot_future.done() or pygame.time.get_ticks() - self.turn_started < MIN_TURN_MS:
+            return
+        move = self.bot_future.result()
+        self.bot_future = None
+        self.turn_started = 0
+        self.game.step(move)
+
+    def cancel_bot_turn(self):
+        # Si ya está calculando no se puede interrumpir: su resultado simplemente se descarta
+        if self.bot_future is not None:
+            self.bot_future.cancel()
+            self.bot_future = None
+        self.turn_started = 0
+
+    def draw_thinking(self, player):
+        """Indicador animado junto a la mano del bot que está pensando."""
+        positions = {1: (SCREEN_WIDTH - 130, SCREEN_HEIGHT // 2), 2: (SCREEN_WIDTH // 2, 90),
+                     3: (130, SCREEN_HEIGHT // 2)}
+        cx, cy = positions.get(player, (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
+        t = pygame.time.get_ticks() / 1000.0
+        for k in range(8):
+            angle = t * 2 * math.pi + k * math.pi / 4
+            shade = 80 + k * 22
+            pygame.draw.circle(self.screen, (shade, shade, shade),
+                               (int(cx + 14 * math.cos(angle)), int(cy + 14 * math.sin(angle))), 3)
+        label = self.font.render("pensando...", True, (255, 255, 255))
+        label_rect = self.screen.blit(label, (cx - label.get_width() // 2, cy + 22))
+        return pygame.Rect(cx - 18, cy - 18, 36, 36).union(label_rect)
+
+    # --- REPETICIONES ---
+    def load_replay(self, path, games=None):
+        """Abre un archivo de partidas; `games` = índices a revisar (por defecto, todas)."""
+        self.archive = GameArchive(path)
+        self.replay_games = list(range(len(self.archive))) if games is None else list(games)
+        if not self.replay_games:
+            raise ValueError(f"{path}: no hay partidas que revisar")
+        self.state = "REPLAY"
+        self.open_replay_game(0)
+
+    def open_replay_game(self, idx):
+        self.replay_game_idx = idx % len(self.replay_games)
+        record = self.archive.records[self.replay_games[self.replay_game_idx]]
+        self.timeline = ReplayTimeline(record, REPLAY_KEYFRAME_EVERY)
+        self.replay_playing = False
+        self.game = None
+        self.seek_replay(0)
+
+    def seek_replay(self, move):
+        """Coloca la repetición tras `move` jugadas (saltos hacia atrás o lejanos: desde un keyframe)."""
+        move = min(max(move, 0), len(self.timeline) - 1)
+        ahead = move - self.replay_move
+        if self.game is not None and 0 <= ahead < REPLAY_KEYFRAME_EVERY:
+            # Así la mesa incremental solo pinta las fichas nuevas
+            for m in self.timeline.moves[self.replay_move:move]:
+                self.game.step(m)
+        else:
+            self.game = self.timeline.position(move)
+        self.replay_move = move
+        self.replay_clock = float(move)
+
+    def update_replay(self):
+        if not self.replay_playing:
+            return
+        self.replay_clock += self.replay_speed * self.clock.get_time() / 1000.0
+        target = int(self.replay_clock)
+        if target >= len(self.timeline) - 1:
+            target = len(self.timeline) - 1
+            self.replay_playing = False
+        if target != self.replay_move:
+            clock = self.replay_clock
+            self.seek_replay(target)
+            self.replay_clock = clock
+
+    def replay_bar(self):
+        return pygame.Rect(200, SCREEN_HEIGHT - 125, SCREEN_WIDTH - 400, 10)
+
+    def describe_move(self, i):
+        """Texto de la jugada número i (1 = primera)."""
+        if i == 0:
+            return self.game.start_reason
+        player, move = self.timeline.players[i - 1], self.timeline.moves[i - 1]
+        if move is None:
+            return f"J{player} pasa"
+        ficha, lado = move
+        return f"J{player} juega [{ficha[0]}|{ficha[1]}] por la {'izquierda' if lado == 'L' else 'derecha'}"
+
+    def draw_replay_hud(self):
+        drawn = []
+        n = len(self.timeline) - 1
+        estado = "▶" if self.replay_playing else "II"
+        head = (f"Partida {self.replay_games[self.replay_game_idx]} ({self.replay_game_idx + 1}/{len(self.replay_games)}) | "
+                f"Jugada {self.replay_move}/{n} | {estado} x{self.replay_speed:g} jug/s")
+        drawn.append(self.screen.blit(self.font.render(head, True, (255,255,255)), (20, SCREEN_HEIGHT - 100)))
+        drawn.append(self.screen.blit(self.font.render(self.describe_move(self.replay_move), True, HIGHLIGHT),
+                                      (20, SCREEN_HEIGHT - 75)))
+        if self.game.game_over:
+            win = f"GANADOR: JUGADOR {self.game.winner}" if self.game.winner >= 0 else "Partida sin terminar"
+            drawn.append(self.screen.blit(self.font.render(win, True, (255,100,100)), (20, SCREEN_HEIGHT - 50)))
+
+        bar = self.replay_bar()
+        drawn.append(pygame.draw.rect(self.screen, (60,60,60), bar, border_radius=5))
+        done = bar.copy()
+        done.width = int(bar.width * self.replay_move / max(n, 1))
+        pygame.draw.rect(self.screen, HIGHLIGHT, done, border_radius=5)
+        drawn.append(pygame.draw.circle(self.screen, (255,255,255), (done.right, bar.centery), 8))
+        return drawn
+
+    def handle_replay_event(self, e):
+        """Espacio: reproducir/pausa | ←/→: jugada | Inicio/Fin | ↑/↓: velocidad | RePág/AvPág: partida | clic/arrastre en la barra: saltar."""
+        if e.type == pygame.KEYDOWN:
+            if e.key == pygame.K_SPACE:
+                if self.replay_move >= len(self.timeline) - 1:
+                    self.seek_replay(0)
+                self.replay_playing = not self.replay_playing
+            elif e.key == pygame.K_RIGHT: self.seek_replay(self.replay_move + 1)
+            elif e.key == pygame.K_LEFT: self.seek_replay(self.replay_move - 1)
+            elif e.key == pygame.K_HOME: self.seek_replay(0)
+            elif e.key == pygame.K_END: self.seek_replay(len(self.timeline) - 1)
+            elif e.key == pygame.K_UP: self.replay_speed *= 2
+            elif e.key == pygame.K_DOWN: self.replay_speed /= 2
+            elif e.key == pygame.K_PAGEDOWN: self.open_replay_game(self.replay_game_idx + 1)
+            elif e.key == pygame.K_PAGEUP: self.open_replay_game(self.replay_game_idx - 1)
+            elif e.key == pygame.K_ESCAPE: self.quit()
+        elif e.type == pygame.MOUSEBUTTONDOWN and self.replay_bar().inflate(0, 20).collidepoint(e.pos):
+            self.replay_dragging = True
+        elif e.type == pygame.MOUSEBUTTONUP:
+            self.replay_dragging = False
+        if self.replay_dragging and e.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEMOTION):
+            bar = self.replay_bar()
+            frac = min(max((e.pos[0] - bar.x) / bar.width, 0.0), 1.0)
+            self.seek_replay(round(frac * (len(self.timeline) - 1)))
+
+    def render_replay_pngs(self, moves, out_dir):
+        """Sin ventana (SDL dummy): guarda un PNG por cada partida cargada y jugada pedida."""
+        os.makedirs(out_dir, exist_ok=True)
+        paths = []
+        for idx in range(len(self.replay_games)):
+            self.open_replay_game(idx)
+            n = len(self.timeline) - 1
+            wanted = range(n + 1) if moves is None else sorted({min(m if m >= 0 else n + 1 + m, n) for m in moves})
+            for m in wanted:
+                self.seek_replay(m)
+                board_dirty = self.begin_frame()
+                self.end_frame(board_dirty, self.draw_hands(reveal=True) + self.draw_replay_hud())
+                path = os.path.join(out_dir, f"partida_{self.replay_games[idx]:06d}_jugada_{m:03d}.png")
+                pygame.image.save(self.screen, path)
+                paths.append(path)
+        return paths
+
+    def quit(self):
+        self.cancel_bot_turn()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.bot is not None:
+            self.bot.close()
+        pygame.quit()
+        sys.exit()
+
     def run(self):
         while True:
             if self.state == "MENU":
                 self.draw_menu()
                 for e in pygame.event.get():
-                    if e.type == pygame.QUIT: pygame.quit(); sys.exit()
+                    if e.type == pygame.QUIT: self.quit()
                 pygame.display.flip()
+                self.clock.tick(30)
                 
             elif self.state == "PLAY":
-                self.screen.fill(BG_COLOR)
-                self.draw_board()
-                self.draw_hands()
+                board_dirty = self.begin_frame()
+                drawn = self.draw_hands()
                 
                 if self.game.game_over:
                     overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
                     overlay.fill((0,0,0, 180))
-                    self.screen.blit(overlay, (0,0))
+                    drawn.append(self.screen.blit(overlay, (0,0)))
                     
                     win_txt = f"¡VICTORIA!" if self.game.winner == 0 else f"GANADOR: JUGADOR {self.game.winner}"
                     col = (0, 255, 0) if self.game.winner == 0 else (255, 100, 100)
@@ -254,39 +585,37 @@ class DominoGUI:
                   
                 if not self.game.game_over:
                     turn_txt = f"Turno: {'TÚ' if self.game.current_player==0 else f'BOT {self.game.current_player}'}"
-                    self.screen.blit(self.font.render(turn_txt, True, (255,255,255)), (20, SCREEN_HEIGHT-100))
+                    drawn.append(self.screen.blit(self.font.render(turn_txt, True, (255,255,255)), (20, SCREEN_HEIGHT-100)))
                     
                     if len(self.game.mesa) == 0:
                         start_info = getattr(self.game, 'start_reason', '')
                         st = self.font.render(start_info, True, HIGHLIGHT)
-                        self.screen.blit(st, (20, 20))
+                        drawn.append(self.screen.blit(st, (20, 20)))
                 
                 if not self.game.game_over:
                     turn = self.game.current_player
                     if turn == 0: # Humano
                         if not self.game.get_valid_moves(0):
-                            self.screen.blit(self.big_font.render("¡PASO!", True, (255,0,0)), (SCREEN_WIDTH//2-50, SCREEN_HEIGHT-200))
-                            pygame.display.flip()
-                            pygame.time.delay(500)
-                            self.game.step(None)
+                            drawn.append(self.screen.blit(self.big_font.render("¡PASO!", True, (255,0,0)), (SCREEN_WIDTH//2-50, SCREEN_HEIGHT-200)))
+                            # El aviso se muestra MIN_TURN_MS sin bloquear la ventana
+                            if not self.turn_started:
+                                self.turn_started = pygame.time.get_ticks()
+                            elif pygame.time.get_ticks() - self.turn_started >= MIN_TURN_MS:
+                                self.turn_started = 0
+                                self.game.step(None)
                     else: # IA
-                        pygame.display.flip()
-                        pygame.time.delay(500)
-                        moves = self.game.get_valid_moves(turn)
-                        if moves:
-                            move = random.choice(moves)
-                            self.game.step(move)
-                        else:
-                            self.game.step(None)
+                        self.update_bot_turn()
+                        drawn.append(self.draw_thinking(turn))
 
                 for e in pygame.event.get():
-                    if e.type == pygame.QUIT: pygame.quit(); sys.exit()
+                    if e.type == pygame.QUIT: self.quit()
                     
                     if e.type == pygame.MOUSEBUTTONDOWN:
                         if self.game.game_over:
                             # FIX: Registramos el tiempo exacto del clic para activar el cooldown
                             self.last_click_time = pygame.time.get_ticks()
                             self.state = "MENU" 
+                            self.cancel_bot_turn()
                             self.game = None
                         
                         elif self.game.current_player == 0:
@@ -328,8 +657,49 @@ class DominoGUI:
                                     
                                     break
 
-                pygame.display.flip()
+                self.end_frame(board_dirty, drawn)
                 self.clock.tick(30)
 
+            elif self.state == "REPLAY":
+                self.update_replay()
+                board_dirty = self.begin_frame()
+                drawn = self.draw_hands(reveal=True) + self.draw_replay_hud()
+                for e in pygame.event.get():
+                    if e.type == pygame.QUIT: self.quit()
+                    self.handle_replay_event(e)
+                self.end_frame(board_dirty, drawn)
+                self.clock.tick(30)
+
+def parse_moves(spec):
+    """'all' -> todas; '0,10,-1' -> esas jugadas (negativas desde el final)."""
+    return None if spec == "all" else [int(x) for x in spec.split(",")]
+
+
 if __name__ == "__main__":
-    DominoGUI().run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Dominó: partida contra la IA o revisión de partidas grabadas")
+    parser.add_argument("--replay", help="Archivo de partidas (.dom) a revisar")
+    parser.add_argument("--games", help="Índices de partida separados por comas (por defecto, todas)")
+    parser.add_argument("--lost-by", type=int, metavar="SEAT", help="Solo las partidas que perdió ese asiento")
+    parser.add_argument("--png", metavar="DIR", help="Sin ventana: guardar las posiciones en PNG en DIR")
+    parser.add_argument("--moves", default="-1", help="Jugadas a guardar con --png: 'all' o p.ej. '0,20,-1' (por defecto la final)")
+    args = parser.parse_args()
+
+    if args.replay is None:
+        DominoGUI().run()
+    else:
+        if args.png:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+        archive = GameArchive(args.replay)
+        games = np.arange(len(archive))
+        if args.games:
+            games = np.array([int(x) for x in args.games.split(",")])
+        if args.lost_by is not None:
+            games = np.intersect1d(games, games_lost_by(archive.records, args.lost_by))
+        gui = DominoGUI(bots=False)
+        gui.load_replay(args.replay, games)
+        if args.png:
+            paths = gui.render_replay_pngs(parse_moves(args.moves), args.png)
+            print(f"🖼️  {len(paths)} imágenes en {args.png}")
+            gui.quit()
+        else:
+            gui.run()
\ No newline at end of file
@@ -0,0 +1,64 @@
+import random
+import numpy as np
+import pytest
+from domino_engine import DominoGame
+from domino_batch import BatchDominoGame, PASS
+from domino_gym import SIDE_INDEX, encode_obs, encode_mask
+
+NUM_GAMES = 64      # Partidas por configuración, todas en el mismo lote
+
+CONFIGS = [
+    # (num_players, teams, max_pip, layout_pip)
+    (2, False, 9, None),
+    (4, False, 9, None),
+    (4, True, 9, None),
+    (4, False, 6, 9),   # Doble seis en la plantilla del doble nueve
+]
+
+
+@pytest.mark.parametrize("num_players,teams,max_pip,layout_pip", CONFIGS)
+def test_batch_matches_domino_game_step_by_step(num_players, teams, max_pip, layout_pip):
+    games = []
+    for i in range(NUM_GAMES):
+        game = DominoGame(num_players, teams, rng=np.random.default_rng(i), max_pip=max_pip)
+        games.append(game)
+    batch = BatchDominoGame(NUM_GAMES, num_players, teams, seed=0, max_pip=max_pip, layout_pip=layout_pip)
+    for i, game in enumerate(games):
+        batch.load_game(i, game)
+    layout = batch.layout
+    rng = random.Random(num_players * 10 + max_pip)
+
+    steps = 0
+    while not batch.game_over.all():
+        obs = batch.observations()
+        masks = batch.valid_move_masks()
+        actions = np.full(NUM_GAMES, PASS, dtype=np.int64)
+        expected = []
+        for i, game in enumerate(games):
+            if game.game_over:
+                expected.append(None)
+                continue
+            player = game.current_player
+            moves = game.get_valid_moves(player)
+            np.testing.assert_array_equal(obs[i], encode_obs(game, player, layout))
+            np.testing.assert_array_equal(masks[i], encode_mask(moves, layout))
+
+            move = rng.choice(moves) if moves else None
+            if move is not None:
+                (a, b), lado = move
+                actions[i] = layout.tile_list[a][b] * 2 + SIDE_INDEX[lado]
+            expected.append(game.step(move))
+
+        rewards, dones = batch.step(actions)
+        for i, game in enumerate(games):
+            if expected[i] is not None:
+                assert (rewards[i], bool(dones[i])) == expected[i]
+            assert batch.game_over[i] == game.game_over
+            assert batch.winner[i] == game.winner
+            assert batch.current_player[i] == game.current_player
+            assert batch.hand_sizes[i].tolist() == [len(game.hands[p]) for p in range(num_players)]
+        steps += 1
+
+    assert steps > 10
+    # Con muchas partidas salen tanto victorias por vaciar la mano como cierres
+    assert len({int(w) for w in batch.winner}) > 1
@@ -0,0 +1,97 @@
+import random
+import numpy as np
+from domino_engine import DominoGame, PIECE_INDEX
+from domino_belief import POOL, NUM_PIECES, BeliefTracker, _deal_plan, iter_mask, marginals
+
+MARGINAL_ATOL = 0.014
+SAMPLES = 40_000
+
+
+def positions(num_players, seed, min_passes=1):
+    """Posiciones de partidas aleatorias en las que algún rival del jugador en turno ya pasó."""
+    rng = random.Random(seed)
+    out = []
+    for k in range(20):
+        game = DominoGame(num_players, rng=np.random.default_rng(rng.getrandbits(32)))
+        while not game.game_over:
+            me = game.current_player
+            if sum(p != me for p, _, _ in game.passes) >= min_passes:
+                out.append((game.clone(), me))
+            moves = game.get_valid_moves(me)
+            game.step(rng.choice(moves) if moves else None)
+    return out
+
+
+def rejection_sample(tracker, n, rng):
+    """Repartos uniformes de las fichas desconocidas, quedándose con los que respetan los pases."""
+    unknown = np.array(list(iter_mask(tracker.unknown())))
+    possible = tracker.possible_matrix()
+    shuffled = rng.permuted(np.broadcast_to(unknown, (n, len(unknown))), axis=1)
+    owners = np.full((n, NUM_PIECES), POOL, dtype=np.int8)
+    owners[:, list(iter_mask(tracker.hand))] = tracker.me
+    ok = np.ones(n, dtype=bool)
+    start = 0
+    for p in tracker.opponents:
+        tiles = shuffled[:, start:start + tracker.sizes[p]]
+        start += tracker.sizes[p]
+        ok &= possible[p][tiles].all(axis=1)
+        np.put_along_axis(owners, tiles, p, axis=1)
+    return owners[ok]
+
+
+def test_samples_respect_hand_sizes_passes_and_possible():
+    rng = np.random.default_rng(0)
+    for num_players in (2, 4):
+        for game, me in positions(num_players, seed=num_players)[::7]:
+            tracker = BeliefTracker.from_game(game, me)
+            possible = tracker.possible_matrix()
+            # Las manos reales son uno de los repartos consistentes
+            for p in tracker.opponents:
+                assert all(possible[p, PIECE_INDEX[f]] for f in game.hands[p])
+
+            owners = tracker.sample(200, rng)
+            board = [PIECE_INDEX[f] for f in game.mesa]
+            assert (owners[:, board] == POOL).all()
+            for p in range(num_players):
+                held = owners == p
+                assert (held.sum(axis=1) == len(game.hands[p])).all()
+                # Cada rival solo recibe fichas que puede tener; las mías no se tocan
+                assert not held[:, ~possible[p]].any()
+                if p != me:
+                    for q, l_val, r_val in game.passes:
+                        if q == p:
+                            tiles = np.flatnonzero(held.any(axis=0))
+                            assert not any(v in (l_val, r_val) for i in tiles for v in game.all_pieces[i])
+            assert ((owners == POOL).sum(axis=1) == len(game.mesa) + tracker.pool_size()).all()
+
+
+def test_deal_plan_weights_are_a_distribution():
+    for game, me in positions(4, seed=5)[::5]:
+        tracker = BeliefTracker.from_game(game, me)
+        classes, probs = _deal_plan(tracker)
+        assert np.isclose(probs.sum(), 1.0) and (probs > 0).all()
+        # Cada combinación asigna a cada rival exactamente su número de fichas
+        for a in range(len(probs)):
+            counts = {}
+            for _, table in classes:
+                for owner in table[a].tolist():
+                    counts[owner] = counts.get(owner, 0) + 1
+            assert all(counts.get(p, 0) == tracker.sizes[p] for p in tracker.opponents)
+            assert counts.get(POOL, 0) == tracker.pool_size()
+
+
+def test_marginals_match_rejection_sampling():
+    # Final de 4 jugadores con varios pases de rivales y pocas fichas desconocidas:
+    # el muestreo por rechazo (la referencia) todavía acepta algún reparto
+    game, me = next((g, me) for g, me in positions(4, seed=0, min_passes=3)
+                    if bin(BeliefTracker.from_game(g, me).unknown()).count("1") <= 22)
+    tracker = BeliefTracker.from_game(game, me)
+    assert any(tracker.possible[p] != tracker.unknown() for p in tracker.opponents)
+
+    rng = np.random.default_rng(1)
+    exact = marginals(tracker.sample(SAMPLES, rng), game.num_players)
+    accepted = []
+    while sum(len(a) for a in accepted) < SAMPLES:
+        accepted.append(rejection_sample(tracker, 100_000, rng))
+    reference = marginals(np.concatenate(accepted)[:SAMPLES], game.num_players)
+    np.testing.assert_allclose(exact, reference, atol=MARGINAL_ATOL)
@@ -0,0 +1,89 @@
+import os
+import random
+import pytest
+import domino_book
+from domino_book import OpeningBook, read_book
+from domino_engine import DominoGame, seeded_deal
+
+
+def mapped_files():
+    with open("/proc/self/maps") as f:
+        return {line.split(maxsplit=5)[5].strip() for line in f if len(line.split(maxsplit=5)) == 6}
+
+
+@pytest.fixture
+def strict_replace(monkeypatch):
+    """os.replace que falla, como en Windows, si el destino sigue mapeado en memoria."""
+    if not os.path.exists("/proc/self/maps"):
+        pytest.skip("hace falta /proc/self/maps")
+    real_replace = os.replace
+
+    def replace(src, dst):
+        if os.path.realpath(dst) in mapped_files():
+            raise PermissionError(f"{dst} sigue mapeado")
+        real_replace(src, dst)
+    monkeypatch.setattr(domino_book.os, "replace", replace)
+
+
+def opening_positions(n, seed=0):
+    """(partida, jugada) de las primeras jugadas de n repartos."""
+    rng = random.Random(seed)
+    out = []
+    for s in range(n):
+        game = DominoGame(4)
+        game.reset(deal=seeded_deal(s))
+        moves = game.get_valid_moves(game.current_player)
+        out.append((game, rng.choice(moves)))
+    return out
+
+
+def test_save_over_loaded_book(tmp_path, strict_replace):
+    path = str(tmp_path / "book.bin")
+    positions = opening_positions(40)
+
+    book = OpeningBook(path, symmetric=False)
+    for game, move in positions[:20]:
+        book.add(game, move)
+    book.save()
+    assert isinstance(book.entries, domino_book.np.memmap)
+
+    # El libro está cargado (mapeado) y se vuelve a guardar encima
+    for game, move in positions[20:]:
+        book.add(game, move)
+    book.save()
+    assert len(read_book(path)[0]) == len(book) == 40
+
+    # Y otra instancia lo carga y lo amplía también (con la primera ya cerrada:
+    # dos libros mapeando el mismo fichero se bloquean en Windows)
+    del book
+    again = OpeningBook(path)
+    for game, move in positions:
+        assert again.lookup(game) == move
+    again.add(*opening_positions(41)[40])
+    again.save()
+    assert len(OpeningBook(path)) == 41
+
+
+def test_newer_entry_replaces_saved_one(tmp_path):
+    path = str(tmp_path / "book.bin")
+    game = DominoGame(4)
+    for s in range(100):
+        game.reset(deal=seeded_deal(s))
+        moves = game.get_valid_moves(game.current_player)
+        if len(moves) > 1:
+            break
+    first, second = moves[0], moves[1]
+
+    book = OpeningBook(path)
+    book.add(game, first)
+    book.save()
+    assert book.lookup(game) == first
+
+    # Corregir una jugada ya guardada: la nueva sustituye a la del fichero
+    book.add(game, second)
+    assert book.lookup(game) == second
+    book.save()
+    assert len(book) == 1
+    assert book.lookup(game) == second
+    del book
+    assert OpeningBook(path).lookup(game) == second
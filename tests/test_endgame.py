@@ -0,0 +1,98 @@
+import random
+import numpy as np
+import pytest
+from domino_engine import DominoGame
+from domino_endgame import EndgameSolver, SearchAborted, tiles_left
+from domino_mcts import MCTSPlayer, player_won
+
+POSITIONS = 25      # Finales por configuración
+
+
+def minimax(game, me, teams):
+    """Valor paranoico (+1 gana me o su equipo, -1 no) sin poda ni tabla de transposición."""
+    if game.game_over:
+        return 1 if player_won(game, me) else -1
+    player = game.current_player
+    values = []
+    for m in list(game.get_valid_moves(player)) or [None]:
+        game.push(m)
+        values.append(minimax(game, me, teams))
+        game.pop()
+    ally = player % 2 == me % 2 if teams else player == me
+    return max(values) if ally else min(values)
+
+
+def endgame_positions(num_players, teams, max_tiles, seed):
+    """Partidas aleatorias jugadas hasta que quedan max_tiles fichas en manos o menos."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < POSITIONS:
+        game = DominoGame(num_players, teams, rng=np.random.default_rng(rng.getrandbits(32)))
+        while not game.game_over and tiles_left(game) > max_tiles:
+            moves = game.get_valid_moves(game.current_player)
+            game.step(rng.choice(moves) if moves else None)
+        if not game.game_over:
+            positions.append(game)
+    return positions
+
+
+@pytest.mark.parametrize("num_players,teams,max_tiles", [(2, False, 12), (4, False, 12), (4, True, 12)])
+def test_solve_matches_brute_force_minimax(num_players, teams, max_tiles):
+    solver = EndgameSolver(seed=0)
+    for game in endgame_positions(num_players, teams, max_tiles, seed=num_players + teams):
+        me = game.current_player
+        value, move = solver.solve(game, me)
+        assert value == minimax(game.clone(), me, teams)
+        # La jugada devuelta alcanza ese valor
+        child = game.clone()
+        child.push(move)
+        assert minimax(child, me, teams) == value
+
+
+def test_node_limit_and_deadline_abort_with_fresh_stats():
+    # Reparto completo de 4 jugadores: ~35k nodos para resolverlo
+    game = DominoGame(4, rng=np.random.default_rng(1))
+    me = game.current_player
+    solver = EndgameSolver(seed=0, node_limit=10**7)
+    solver.solve(game, me)
+    full_nodes = solver.stats['nodes']
+
+    solver.node_limit = 50
+    with pytest.raises(SearchAborted):
+        solver.solve(game, me)
+    assert solver.stats['nodes'] == 51              # Estadísticas de la búsqueda abortada, no de la anterior
+
+    timed = EndgameSolver(seed=0, node_limit=10**7, time_ms=20)
+    with pytest.raises(SearchAborted):
+        timed.solve(game, me)
+    assert 0 < timed.stats['nodes'] < full_nodes
+    assert timed.stats['ms'] < 200
+
+
+def test_mcts_player_shares_time_ms_with_solver():
+    game = DominoGame(4, rng=np.random.default_rng(1))
+    player = MCTSPlayer(rollouts=None, time_ms=40, seed=0, endgame_tiles=40)
+    player.endgame.node_limit = 10**7
+    assert player.endgame.time_ms == 20
+    move = player.choose_move(game)
+    # El solver no llega a tiempo: juega MCTS con lo que queda de la decisión
+    assert 'solver' not in player.last_stats
+    assert move in game.get_valid_moves(game.current_player)
+    assert player.last_stats['ms'] < 200
+
+
+def test_zobrist_child_matches_full_hash():
+    solver = EndgameSolver(seed=0)
+    rng = random.Random(0)
+    for num_players in (2, 4):
+        for game in endgame_positions(num_players, False, 40, seed=num_players):
+            solver._start(game, game.current_player)
+            z = solver._z
+            h = z.hash(game)
+            while not game.game_over:
+                moves = game.get_valid_moves(game.current_player)
+                m = rng.choice(moves) if moves else None
+                before = (game.extremos[0], game.extremos[1], game.current_player, game.pass_count)
+                game.push(m)
+                h = z.child(h, game, m, before)
+                assert h == z.hash(game)
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+sb3_contrib = pytest.importorskip("sb3_contrib")
+
+from domino_gym import DominoEnv
+from domino_numpy_policy import NumpyPolicy, export_policy
+
+NUM_POSITIONS = 500
+PROB_ATOL = 1e-5
+
+
+def sample_positions(n, seed=0):
+    """Observaciones y máscaras de partidas aleatorias de DominoEnv."""
+    rng = np.random.default_rng(seed)
+    env = DominoEnv()
+    obs, _ = env.reset(seed=seed)
+    obs_list, mask_list = [], []
+    while len(obs_list) < n:
+        mask = env.action_masks()
+        obs_list.append(obs)
+        mask_list.append(mask)
+        legal = np.flatnonzero(mask)
+        obs, _, done, _, _ = env.step(rng.choice(legal) if len(legal) else 0)
+        if done:
+            obs, _ = env.reset()
+    return np.array(obs_list, dtype=np.float32), np.array(mask_list)
+
+
+def small_model(activation_fn):
+    model = sb3_contrib.MaskablePPO("MlpPolicy", DominoEnv(), device='cpu', seed=0,
+                                    policy_kwargs={'net_arch': [32, 16], 'activation_fn': activation_fn})
+    # La inicialización de SB3 deja la política casi uniforme (ganancia 0.01 en
+    # action_net): se perturban los pesos para que la comparación signifique algo
+    gen = torch.Generator().manual_seed(1)
+    with torch.no_grad():
+        for param in model.policy.parameters():
+            param.add_(torch.randn(param.shape, generator=gen) * 0.5)
+    return model
+
+
+@pytest.fixture(scope="module")
+def positions():
+    return sample_positions(NUM_POSITIONS)
+
+
+@pytest.mark.parametrize("activation_fn", [torch.nn.Tanh, torch.nn.ReLU])
+def test_action_probs_match_masked_torch_distribution(tmp_path, positions, activation_fn):
+    obs, masks = positions
+    model = small_model(activation_fn)
+    policy = NumpyPolicy(export_policy(model, str(tmp_path / "policy.npz")))
+
+    obs_tensor, _ = model.policy.obs_to_tensor(obs)
+    with torch.no_grad():
+        expected = model.policy.get_distribution(obs_tensor, action_masks=masks).distribution.probs.numpy()
+    probs = policy.action_probs(obs, action_masks=masks)
+
+    np.testing.assert_allclose(probs, expected, atol=PROB_ATOL)
+    # Con alguna jugada legal, las ilegales no reciben nada (sin ninguna, toca pasar
+    # y las dos implementaciones dan la uniforme)
+    playable = masks.any(axis=1)
+    assert not probs[playable][~masks[playable]].any()
+    # La política no es trivial: si lo fuera, la comparación no probaría nada
+    assert policy.logits(obs).std(axis=1).mean() > 1.0
+
+    actions, _ = policy.predict(obs, action_masks=masks)
+    torch_actions, _ = model.predict(obs, action_masks=masks, deterministic=True)
+    np.testing.assert_array_equal(actions, torch_actions)
+
+
+def test_unsupported_activation_is_rejected(tmp_path):
+    model = small_model(torch.nn.LeakyReLU)
+    with pytest.raises(ValueError):
+        export_policy(model, str(tmp_path / "policy.npz"))
+
+
+def test_stochastic_predict_samples_action_probs(tmp_path, positions):
+    obs, masks = positions
+    policy = NumpyPolicy(export_policy(small_model(torch.nn.Tanh), str(tmp_path / "policy.npz")), seed=0)
+    playable = masks.any(axis=1)
+    obs, masks = obs[playable][:20], masks[playable][:20]
+    probs = policy.action_probs(obs, action_masks=masks)
+
+    draws = 4000
+    counts = np.zeros_like(probs)
+    for _ in range(draws):
+        actions, _ = policy.predict(obs, deterministic=False, action_masks=masks)
+        counts[np.arange(len(obs)), actions] += 1
+    assert not counts[~masks].any()
+    # Error estándar de una frecuencia con 4000 muestras: <= 0.008
+    np.testing.assert_allclose(counts / draws, probs, atol=0.04)
+
+    # Una sola observación (sin dimensión de lote) y reproducible con la misma semilla
+    a = NumpyPolicy(str(tmp_path / "policy.npz"), seed=3).predict(obs[0], deterministic=False, action_masks=masks[0])[0]
+    b = NumpyPolicy(str(tmp_path / "policy.npz"), seed=3).predict(obs[0], deterministic=False, action_masks=masks[0])[0]
+    assert a == b and masks[0][a]
@@ -0,0 +1,106 @@
+import random
+import pytest
+from domino_engine import DominoGame, seeded_deal
+
+WALKS = 40          # Partidas por número de jugadores
+WALK_OPS = 200      # push/pop aleatorios por partida
+
+
+def snapshot(game):
+    """Todo el estado que push()/pop() deben dejar como estaba."""
+    state = {
+        'hands': {p: sorted(h) for p, h in game.hands.items()},
+        'mesa': list(game.mesa),
+        'extremos': list(game.extremos),
+        'passes': list(game.passes),
+        'history_left': list(game.history_left),
+        'history_right': list(game.history_right),
+        'center_tile': game.center_tile,
+        'current_player': game.current_player,
+        'pass_count': game.pass_count,
+        'winner': game.winner,
+        'game_over': game.game_over,
+    }
+    return state
+
+
+def check_moves_cache(game):
+    # Lo que haya en la caché tiene que seguir siendo cierto tras pop()
+    for p, moves in game._moves_cache.items():
+        assert moves == game._compute_valid_moves(p)
+    for p in range(game.num_players):
+        assert game.get_valid_moves(p) == game._compute_valid_moves(p)
+
+
+def random_walk(game, rng):
+    """push/pop aleatorios comprobando cada pop(); devuelve cuántos pases se deshicieron."""
+    stack, undone_passes = [], 0
+    for _ in range(WALK_OPS):
+        if stack and (game.game_over or rng.random() < 0.4):
+            expected, move = stack.pop()
+            assert game.pop() == move
+            assert snapshot(game) == expected
+            check_moves_cache(game)
+            undone_passes += move is None
+        elif not game.game_over:
+            # Consultar la caché antes de jugar para que pop() tenga algo que invalidar
+            moves = game.get_valid_moves(game.current_player)
+            move = rng.choice(moves) if moves else None
+            stack.append((snapshot(game), move))
+            game.push(move)
+    while stack:
+        expected, move = stack.pop()
+        game.pop()
+        assert snapshot(game) == expected
+    return undone_passes
+
+
+@pytest.mark.parametrize("num_players", [2, 4])
+def test_random_push_pop_restores_state(num_players):
+    rng = random.Random(num_players)
+    undone_passes = 0
+    for seed in range(WALKS):
+        game = DominoGame(num_players)
+        game.reset(deal=seeded_deal(seed))
+        # Avanzar un poco para empezar también desde mitad de partida
+        for _ in range(rng.randrange(12)):
+            if game.game_over:
+                break
+            moves = game.get_valid_moves(game.current_player)
+            game.step(rng.choice(moves) if moves else None)
+        original = snapshot(game)
+        undone_passes += random_walk(game, rng)
+        assert snapshot(game) == original
+        check_moves_cache(game)
+    assert undone_passes > 0
+
+
+def test_pop_pass_restores_pass_count():
+    game = DominoGame(4)
+    game.reset(deal=seeded_deal(7))
+    moves = game.get_valid_moves(game.current_player)
+    game.step(moves[0])
+    before = snapshot(game)
+    for _ in range(3):
+        game.push(None)
+    assert game.pass_count == 3 and len(game.passes) == 3
+    for _ in range(3):
+        assert game.pop() is None
+    assert snapshot(game) == before
+
+
+def test_pop_game_over():
+    # Deshacer la jugada que termina la partida (por dominó o por cierre)
+    rng = random.Random(1)
+    for seed in range(20):
+        game = DominoGame(2)
+        game.reset(deal=seeded_deal(seed))
+        while True:
+            moves = game.get_valid_moves(game.current_player)
+            move = rng.choice(moves) if moves else None
+            before = snapshot(game)
+            game.push(move)
+            if game.game_over:
+                game.pop()
+                assert snapshot(game) == before
+                break
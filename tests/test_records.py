@@ -0,0 +1,99 @@
+import random
+import numpy as np
+import pytest
+from domino_engine import DominoGame, seeded_deal
+from domino_records import (FLAG_PIP_SHIFT, RECORD_DTYPE, GameArchive, GameRecorder, initial_game, record_hand_size,
+                            record_max_pip, record_moves, replay_game)
+
+
+def play_out(game, rng, search=False):
+    """Juega al azar hasta el final; con search, antes de cada jugada explora con push()/pop()."""
+    played = []
+    while not game.game_over:
+        moves = game.get_valid_moves(game.current_player)
+        if search:
+            for m in moves[:3] or [None]:
+                game.push(m)
+                if not game.game_over:
+                    follow = game.get_valid_moves(game.current_player)
+                    game.push(follow[0] if follow else None)
+                    game.pop()
+                game.pop()
+        move = rng.choice(moves) if moves else None
+        game.step(move)
+        played.append(move)
+    return played
+
+
+def records_of(recorder):
+    recorder.close()
+    return np.frombuffer(recorder.take(), dtype=RECORD_DTYPE)
+
+
+@pytest.mark.parametrize("search", [False, True])
+def test_one_game_one_record(search):
+    # El reset() del constructor no cuenta como partida
+    recorder = GameRecorder()
+    game = DominoGame(4, recorder=recorder)
+    game.reset(deal=seeded_deal(5))
+    played = play_out(game, random.Random(0), search)
+
+    records = records_of(recorder)
+    assert len(records) == 1
+    assert record_moves(records[0]) == played
+    assert int(records[0]['winner']) == game.winner
+    replayed = replay_game(records[0])
+    assert replayed.mesa == game.mesa and replayed.winner == game.winner
+
+
+def test_consecutive_games_to_file(tmp_path):
+    path = str(tmp_path / "games.dom")
+    rng = random.Random(1)
+    with GameRecorder(path, flush_every=3) as recorder:
+        game = DominoGame(2, recorder=recorder)
+        for seed in range(7):
+            game.reset(deal=seeded_deal(seed))
+            play_out(game, rng)
+        game.reset()   # Partida nueva sin jugadas al cerrar: no se guarda
+    archive = GameArchive(path)
+    assert len(archive) == 7
+    assert (archive.records['winner'] >= 0).all()
+
+
+def test_interrupted_game_is_kept():
+    recorder = GameRecorder()
+    game = DominoGame(4, recorder=recorder)
+    moves = game.get_valid_moves(game.current_player)
+    game.step(moves[0])
+    game.reset()
+    records = records_of(recorder)
+    assert len(records) == 1
+    assert int(records[0]['winner']) == -1 and int(records[0]['num_moves']) == 1
+
+
+@pytest.mark.parametrize("num_players,hand_size", [(2, None), (4, None), (4, 5)])
+def test_tile_set_round_trips(num_players, hand_size):
+    recorder = GameRecorder()
+    game = DominoGame(num_players, recorder=recorder, max_pip=6, hand_size=hand_size)
+    game.reset(deal=seeded_deal(3, len(game.all_pieces)))
+    played = play_out(game, random.Random(2))
+
+    records = records_of(recorder)
+    assert record_max_pip(records).tolist() == [6]
+    assert record_hand_size(records).tolist() == [hand_size or 7]
+    start = initial_game(records[0])
+    assert (start.max_pip, start.hand_size, start.all_pieces) == (6, hand_size or 7, game.all_pieces)
+    replayed = replay_game(records[0])
+    assert record_moves(records[0]) == played
+    assert replayed.mesa == game.mesa and replayed.winner == game.winner
+
+
+def test_legacy_records_are_double_nine():
+    recorder = GameRecorder()
+    game = DominoGame(4, recorder=recorder)
+    play_out(game, random.Random(3))
+    records = records_of(recorder)
+    # Los registros anteriores al juego de fichas no tienen nada en los bits de max_pip
+    assert int(records[0]['flags']) >> FLAG_PIP_SHIFT == 0
+    assert record_max_pip(records).tolist() == [9] and record_hand_size(records).tolist() == [10]
+    assert initial_game(records[0]).max_pip == 9
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from domino_engine import DominoGame, make_pieces, seeded_deal, seeded_deals
+from domino_batch import BatchDominoGame
+from domino_gym import DominoEnv
+
+NUM_SEEDS = 2000
+
+
+def test_equal_seeds_give_equal_deals():
+    seeds = np.arange(NUM_SEEDS) * 7919 + 3
+    orders, lots = seeded_deals(seeds)
+    again, again_lots = seeded_deals(seeds[::-1])
+    # Cada reparto depende solo de su semilla, no del resto del lote
+    np.testing.assert_array_equal(orders, again[::-1])
+    np.testing.assert_array_equal(lots, again_lots[::-1])
+    for k in (0, 1, NUM_SEEDS - 1):
+        order, lot = seeded_deal(int(seeds[k]))
+        np.testing.assert_array_equal(order, orders[k])
+        assert lot == lots[k]
+    # Son permutaciones, y semillas distintas dan repartos distintos
+    assert (np.sort(orders, axis=1) == np.arange(orders.shape[1])).all()
+    assert len({o.tobytes() for o in orders}) == NUM_SEEDS
+
+
+@pytest.mark.parametrize("num_players,max_pip", [(2, 9), (4, 9), (2, 6), (4, 6)])
+def test_game_and_batch_play_the_same_seeded_deal(num_players, max_pip):
+    seeds = np.arange(NUM_SEEDS)
+    num_pieces = len(make_pieces(max_pip))
+    batch = BatchDominoGame(NUM_SEEDS, num_players, seed=0, max_pip=max_pip)
+    batch.reset(seeds=seeds)
+    tiles = batch.layout.tile_list
+    game = DominoGame(num_players, max_pip=max_pip)
+    no_doubles = 0
+    for s in seeds:
+        game.reset(deal=seeded_deal(int(s), num_pieces))
+        for p in range(num_players):
+            held = np.flatnonzero(batch.hands[s, p])
+            assert sorted(tiles[a][b] for a, b in game.hands[p]) == held.tolist()
+        # Salida por el doble más alto o, si nadie tiene dobles, por el sorteo del reparto
+        assert batch.current_player[s] == game.current_player
+        no_doubles += game.start_reason.startswith("Sorteo")
+    if num_players == 2:
+        assert no_doubles > 0     # El sorteo también se ha comprobado
+
+
+@pytest.mark.parametrize("max_pip", [9, 6])
+def test_env_deal_seed_matches_game(max_pip):
+    env = DominoEnv(max_pip=max_pip)
+    game = DominoGame(max_pip=max_pip)
+    num_pieces = len(make_pieces(max_pip))
+    batch = BatchDominoGame(50, seed=0, max_pip=max_pip)
+    batch.reset(seeds=np.arange(50))
+    for s in range(50):
+        env.reset(seed=s + 1000, options={'deal_seed': s})
+        game.reset(deal=seeded_deal(s, num_pieces))
+        assert env.game.hands == game.hands
+        assert env.game.current_player == game.current_player == batch.current_player[s]
+        # Con deal_seed la semilla del entorno no cambia el reparto
+        env.reset(seed=s, options={'deal_seed': s})
+        assert env.game.hands == game.hands
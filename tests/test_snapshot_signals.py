@@ -0,0 +1,52 @@
+import os
+import signal
+import sys
+import pytest
+
+sb3_contrib = pytest.importorskip("sb3_contrib")
+
+from sb3_contrib.common.wrappers import ActionMasker
+from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.vec_env import SubprocVecEnv
+from domino_gym import DominoEnv
+from domino_snapshot import SnapshotCallback, ignore_stop_signals, list_snapshots
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="os.kill(SIGINT) solo en POSIX")
+
+
+def worker_env():
+    ignore_stop_signals()
+    return ActionMasker(DominoEnv(), lambda env: env.action_masks())
+
+
+class CtrlC(BaseCallback):
+    """Simula Ctrl+C en la terminal a mitad de rollout: la señal llega a todo el grupo de procesos."""
+    def __init__(self, at_step):
+        super().__init__()
+        self.at_step = at_step
+
+    def _on_step(self):
+        if self.n_calls == self.at_step:
+            for process in self.training_env.processes:
+                os.kill(process.pid, signal.SIGINT)
+            os.kill(os.getpid(), signal.SIGINT)
+        return True
+
+
+def test_ctrl_c_with_subproc_vec_env_saves_snapshot(tmp_path):
+    env = SubprocVecEnv([worker_env, worker_env])
+    try:
+        model = sb3_contrib.MaskablePPO("MlpPolicy", env, n_steps=64, batch_size=64, n_epochs=1, device='cpu')
+        snapshots = SnapshotCallback(str(tmp_path), interval_s=1e9)
+        model.learn(total_timesteps=10_000, callback=[snapshots, CtrlC(at_step=10)])
+
+        assert snapshots.stopped
+        assert model.num_timesteps < 10_000
+        assert len(list_snapshots(str(tmp_path))) == 1
+        # Los trabajadores siguen vivos: el VecEnv se puede seguir usando y cerrar con normalidad
+        assert all(process.is_alive() for process in env.processes)
+        env.reset()
+    finally:
+        env.close()
+    # learn() devuelve los manejadores originales
+    assert signal.getsignal(signal.SIGINT) is signal.default_int_handler
@@ -0,0 +1,145 @@
+import random
+import numpy as np
+from domino_engine import ALL_PIECES, DominoGame
+from domino_gym import encode_obs, encode_mask
+from domino_symmetry import (PAIR_INDEX, canonical_key, canonical_permutation, canonicalize_obs, inverse,
+                             permute_action, permute_mask, permute_move, permute_obs, random_permutations,
+                             unpermute_action)
+
+NUM_GAMES = 30
+PERMS_PER_POSITION = 3
+
+
+def permute_game(game, perm):
+    """Copia de la partida con los puntos renombrados (manos, mesa, extremos y pases)."""
+    perm = perm.tolist()
+    tile = lambda f: ALL_PIECES[PAIR_INDEX[perm[f[0]], perm[f[1]]]]
+    end = lambda v: perm[v] if v >= 0 else -1
+    g = game.clone()
+    g.hands = {p: [tile(f) for f in h] for p, h in game.hands.items()}
+    g.mesa = [tile(f) for f in game.mesa]
+    g.extremos = [end(v) for v in game.extremos]
+    g.passes = [(p, end(l), end(r)) for p, l, r in game.passes]
+    g._moves_cache = {}
+    return g
+
+
+def successor_key(game, move, player):
+    child = game.clone()
+    child.step(move)
+    return canonical_key(child, player)[0]
+
+
+def positions(seed):
+    """Estados de partidas aleatorias de 2 y 4 jugadores (con pases), uno cada pocas jugadas."""
+    rng = random.Random(seed)
+    states = []
+    for k in range(NUM_GAMES):
+        game = DominoGame(2 + 2 * (k % 2), rng=np.random.default_rng(rng.getrandbits(32)))
+        while not game.game_over:
+            if rng.random() < 0.3:
+                states.append(game.clone())
+            moves = game.get_valid_moves(game.current_player)
+            game.step(rng.choice(moves) if moves else None)
+    return states
+
+
+def test_canonical_obs_and_mask_are_invariant_under_permutation():
+    rng = np.random.default_rng(0)
+    for game in positions(0):
+        player = game.current_player
+        moves = game.get_valid_moves(player)
+        obs, mask = encode_obs(game, player), encode_mask(moves)
+        c_obs, c_mask, perm = canonicalize_obs(obs, mask)
+        for sigma in random_permutations(PERMS_PER_POSITION, rng):
+            p_obs, p_mask = permute_obs(obs, sigma), permute_mask(mask, sigma)
+            # La observación permutada es la de la partida permutada
+            np.testing.assert_array_equal(p_obs, encode_obs(permute_game(game, sigma), player))
+            np.testing.assert_array_equal(p_mask, encode_mask([permute_move(m, sigma) for m in moves]))
+            o, m, p = canonicalize_obs(p_obs, p_mask)
+            np.testing.assert_array_equal(o, c_obs)
+            np.testing.assert_array_equal(m, c_mask)
+
+        # Las jugadas legales siguen siéndolo en la forma canónica y vuelven a la partida real
+        legal = np.flatnonzero(mask)
+        canon = permute_action(legal, perm)
+        assert c_mask[canon].all()
+        np.testing.assert_array_equal(unpermute_action(canon, perm), legal)
+
+
+def test_canonical_key_is_invariant_under_permutation():
+    rng = np.random.default_rng(1)
+    for game in positions(1):
+        for player in (None, game.current_player):
+            key, perm = canonical_key(game, player)
+            for sigma in random_permutations(PERMS_PER_POSITION, rng):
+                permuted = permute_game(game, sigma)
+                p_key, p_perm = canonical_key(permuted, player)
+                assert p_key == key
+                # Una jugada guardada bajo la clave se traduce a una jugada legal de la otra
+                # partida equivalente a la original (con puntos gemelos puede no ser la misma)
+                legal = permuted.get_valid_moves(permuted.current_player)
+                for move in game.get_valid_moves(game.current_player):
+                    translated = permute_move(permute_move(move, perm), inverse(p_perm))
+                    assert translated in legal
+                    # La salida orienta la ficha por el orden de sus valores (extremos = [a, b]
+                    # con a <= b): tras renombrar puede quedar en espejo izquierda/derecha
+                    if game.mesa:
+                        assert successor_key(permuted, translated, player) == \
+                            successor_key(permuted, permute_move(move, sigma), player)
+
+
+def graph_labels(edges, perm=None):
+    """Etiquetas de un grafo sobre los 10 puntos (1 = arista), con los puntos renombrados por perm."""
+    perm = list(range(10)) if perm is None else perm.tolist()
+    labels = [[0] * 10 for _ in range(10)]
+    for a, b in edges:
+        labels[perm[a]][perm[b]] = labels[perm[b]][perm[a]] = 1
+    return labels
+
+
+def random_cubic_graph(rng):
+    """Grafo 3-regular simple al azar (modelo de configuración con reintentos); casi nunca es transitivo."""
+    while True:
+        stubs = rng.permutation(np.repeat(np.arange(10), 3)).reshape(-1, 2)
+        edges = {tuple(sorted(e)) for e in stubs.tolist()}
+        if len(edges) == 15 and all(a != b for a, b in edges):
+            return sorted(edges)
+
+
+def test_canonical_permutation_on_regular_graphs():
+    # Grafos regulares: el refinamiento de colores no separa ningún punto y la forma
+    # canónica depende por completo de la búsqueda con individualización
+    cycle10 = [(i, (i + 1) % 10) for i in range(10)]
+    two_cycles = [(i, (i + 1) % 5) for i in range(5)] + [(5 + i, 5 + (i + 1) % 5) for i in range(5)]
+    petersen = [(i, (i + 1) % 5) for i in range(5)] + [(5 + i, 5 + (i + 2) % 5) for i in range(5)] + \
+               [(i, i + 5) for i in range(5)]
+    prism = [(i, (i + 1) % 5) for i in range(5)] + [(5 + i, 5 + (i + 1) % 5) for i in range(5)] + \
+            [(i, i + 5) for i in range(5)]
+    vertex = [0] * 10
+    rng = np.random.default_rng(3)
+    graphs = [cycle10, two_cycles, petersen, prism] + [random_cubic_graph(rng) for _ in range(6)]
+    keys = []
+    for edges in graphs:
+        _, key = canonical_permutation(graph_labels(edges), vertex)
+        for sigma in random_permutations(10, rng):
+            assert canonical_permutation(graph_labels(edges, sigma), vertex)[1] == key
+        keys.append(key)
+    # Mismos grados, grafos distintos: claves distintas
+    assert len(set(keys[:4])) == 4
+
+
+def test_permute_action_round_trips():
+    rng = np.random.default_rng(2)
+    actions = np.arange(2 * len(ALL_PIECES))
+    for sigma in random_permutations(20, rng):
+        moved = permute_action(actions, sigma)
+        assert sorted(moved.tolist()) == actions.tolist()       # Es una biyección de las 110 acciones
+        np.testing.assert_array_equal(unpermute_action(moved, sigma), actions)
+        np.testing.assert_array_equal(permute_action(unpermute_action(actions, sigma), sigma), actions)
+        assert permute_move(permute_move(((3, 7), 'R'), sigma), inverse(sigma)) == ((3, 7), 'R')
+
+    # Por lotes: una permutación por fila
+    perms = random_permutations(50, rng)
+    batch = rng.integers(len(actions), size=50)
+    np.testing.assert_array_equal(unpermute_action(permute_action(batch, perms), perms), batch)
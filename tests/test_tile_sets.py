@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+from domino_engine import DominoGame, make_pieces
+from domino_batch import BatchDominoGame
+from domino_gym import DominoEnv
+from domino_vec_env import DominoVecEnv
+
+
+@pytest.mark.parametrize("max_pip,layout_pip,obs_size,num_actions", [
+    (9, None, 133, 110), (6, None, 73, 56), (6, 9, 133, 110)])
+def test_env_spaces_follow_layout(max_pip, layout_pip, obs_size, num_actions):
+    env = DominoEnv(max_pip=max_pip, layout_pip=layout_pip)
+    assert env.observation_space.shape == (obs_size,) and env.action_space.n == num_actions
+    obs, _ = env.reset(seed=0)
+    assert obs.shape == (obs_size,) and env.action_masks().shape == (num_actions,)
+    vec = DominoVecEnv(4, seed=0, max_pip=max_pip, layout_pip=layout_pip)
+    assert vec.observation_space.shape == (obs_size,) and vec.action_space.n == num_actions
+    assert vec.reset().shape == (4, obs_size)
+
+
+def test_layout_smaller_than_game_is_rejected():
+    with pytest.raises(ValueError):
+        DominoEnv(max_pip=9, layout_pip=6)
+    with pytest.raises(ValueError):
+        BatchDominoGame(4, max_pip=9, layout_pip=6)
+    with pytest.raises(ValueError):
+        BatchDominoGame(4, 4, max_pip=6, hand_size=8)     # 32 fichas > 28
+
+
+@pytest.mark.parametrize("num_players,hand_size,layout_pip", [(2, None, None), (4, None, 9), (4, 5, 9)])
+def test_batch_deals_double_six(num_players, hand_size, layout_pip):
+    batch = BatchDominoGame(500, num_players, seed=0, max_pip=6, hand_size=hand_size, layout_pip=layout_pip)
+    batch.reset()
+    size = hand_size or 7
+    assert (batch.hands.sum(axis=2) == size).all() and (batch.hand_sizes == size).all()
+    # Manos disjuntas y solo con fichas del doble seis, en los índices de la plantilla
+    assert (batch.hands.sum(axis=1) <= 1).all()
+    tiles = batch.layout.tile_list
+    allowed = np.zeros(batch.layout.num_pieces, dtype=bool)
+    allowed[[tiles[a][b] for a, b in make_pieces(6)]] = True
+    assert not batch.hands[:, :, ~allowed].any()
+    # Sale quien tiene el doble más alto repartido, como en DominoGame
+    pieces = batch.layout.pieces
+    game = DominoGame(num_players, max_pip=6, hand_size=hand_size)
+    for k in range(50):
+        for p in range(num_players):
+            game.set_hand(p, [pieces[i] for i in np.flatnonzero(batch.hands[k, p])])
+        holders = [(d, p) for p in range(num_players) for d in range(7) if (d, d) in game.hands[p]]
+        if holders:
+            assert batch.current_player[k] == max(holders)[1]
+
+
+def test_curriculum_stages_and_resume():
+    pytest.importorskip("sb3_contrib")
+    import train_domino
+
+    stages = [(6, 300_000), (9, 1_000_000)]
+    assert [train_domino.resume_stage(stages, done) for done in (0, 299_999, 300_000, 999_999, 1_000_000)] == \
+        [0, 0, 1, 1, 1]
+
+
+def test_training_stages(monkeypatch):
+    pytest.importorskip("sb3_contrib")
+    import train_domino
+
+    monkeypatch.setattr(train_domino, "TOTAL_TIMESTEPS", 200_000)
+    monkeypatch.setattr(train_domino, "CURRICULUM", False)
+    assert train_domino.training_stages() == [(9, 200_000)]
+    # Las etapas se recortan al total de pasos; None es hasta el final
+    monkeypatch.setattr(train_domino, "CURRICULUM", True)
+    monkeypatch.setattr(train_domino, "CURRICULUM_STAGES", [(6, 300_000), (9, None)])
+    assert train_domino.training_stages() == [(6, 200_000), (9, 200_000)]
+    monkeypatch.setattr(train_domino, "TOTAL_TIMESTEPS", 1_000_000)
+    assert train_domino.training_stages() == [(6, 300_000), (9, 1_000_000)]
+
+
+def test_bc_samples_replay_mixed_tile_sets(tmp_path):
+    pytest.importorskip("torch")
+    import random
+    from domino_bc import OBS_SCALE, iter_samples
+    from domino_gym import encode_obs
+    from domino_layout import obs_layout
+    from domino_records import GameArchive, GameRecorder
+
+    path = str(tmp_path / "mixed.dom")
+    rng = random.Random(0)
+    expected = []
+    with GameRecorder(path) as recorder:
+        for k in range(12):
+            game = DominoGame(2 + 2 * (k % 2), recorder=recorder, rng=np.random.default_rng(k),
+                              max_pip=(6, 9)[k % 3 == 0], hand_size=(None, 5)[k % 4 == 1])
+            while not game.game_over:
+                moves = game.get_valid_moves(game.current_player)
+                if moves:
+                    expected.append(encode_obs(game, game.current_player, layout=obs_layout(9)))
+                game.step(rng.choice(moves) if moves else None)
+    samples = list(iter_samples(GameArchive(path), batch_size=5))
+    obs = np.concatenate([o for o, _, _ in samples])
+    assert obs.shape == (len(expected), 133)
+    # Cada partida se reproduce con sus fichas y la observación se guarda sin pérdida
+    expected = np.array(expected) * OBS_SCALE
+    np.testing.assert_allclose(expected, np.rint(expected), atol=1e-4)
+    assert sorted(o.tobytes() for o in obs) == sorted(o.tobytes() for o in np.rint(expected).astype(np.uint8))
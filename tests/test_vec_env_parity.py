@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("stable_baselines3")
+
+from domino_gym import DominoEnv
+from domino_vec_env import DominoVecEnv
+
+NUM_ENVS = 32
+STEPS = 600
+INVALID_RATE = 0.03   # De vez en cuando una acción ilegal (-10 y fin del episodio)
+
+
+def test_vec_env_matches_independent_domino_envs():
+    vec = DominoVecEnv(NUM_ENVS, seed=0)
+    vec.reset()
+    envs = [DominoEnv() for _ in range(NUM_ENVS)]
+    rng = np.random.default_rng(0)
+
+    # Mismos repartos en los dos lados: seeded_deal(s) en cada entorno y en su fila del lote
+    next_seed = NUM_ENVS
+    seeds = np.arange(NUM_ENVS)
+    vec.game.reset(seeds=seeds)
+    obs = np.array([env.reset(options={'deal_seed': int(s)})[0] for env, s in zip(envs, seeds)])
+    np.testing.assert_array_equal(vec.game.observations(), obs)
+
+    episodes = 0
+    for _ in range(STEPS):
+        masks = np.asarray(vec.env_method("action_masks"))
+        np.testing.assert_array_equal(masks, np.array([env.action_masks() for env in envs]))
+
+        keys = np.where(masks, rng.random(masks.shape), -1.0)
+        actions = np.argmax(keys, axis=1)
+        invalid = rng.random(NUM_ENVS) < INVALID_RATE
+        actions[invalid] = rng.integers(vec.action_space.n, size=int(invalid.sum()))
+
+        vec.step_async(actions)
+        vec_obs, rewards, dones, infos = vec.step_wait()
+        results = [env.step(int(a)) for env, a in zip(envs, actions)]
+
+        np.testing.assert_allclose(rewards, [r[1] for r in results], rtol=0, atol=1e-6)
+        np.testing.assert_array_equal(dones, [r[2] for r in results])
+        for i, (env_obs, _, done, _, _) in enumerate(results):
+            if done:
+                np.testing.assert_array_equal(infos[i]["terminal_observation"], env_obs)
+            else:
+                assert "terminal_observation" not in infos[i]
+                np.testing.assert_array_equal(vec_obs[i], env_obs)
+
+        # El VecEnv ya ha repartido al azar las terminadas: se repite con semillas en los dos lados
+        if dones.any():
+            rows = np.flatnonzero(dones)
+            seeds = np.arange(next_seed, next_seed + len(rows))
+            next_seed += len(rows)
+            vec.game.reset(dones, seeds=seeds)
+            new_obs = vec.game.observations()
+            for i, s in zip(rows, seeds):
+                np.testing.assert_array_equal(new_obs[i], envs[i].reset(options={'deal_seed': int(s)})[0])
+            episodes += len(rows)
+
+    assert episodes > NUM_ENVS
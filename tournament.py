@@ -0,0 +1,324 @@
+import argparse
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from domino_engine import DominoGame, seeded_deals
+from domino_gym import encode_obs, encode_mask, ACTION_TILES, ACTION_SIDES
+from domino_mcts import ENDGAME_TILES, MCTSPlayer, player_won
+from domino_records import GameRecorder, append_records
+
+# --- CONFIGURACIÓN POR DEFECTO ---
+NUM_GAMES = 10_000
+FORMAT = "1v1"              # "1v1", "ffa" (4 jugadores) o "2v2" (equipos)
+AGENTS = ["ppo:modelos_domino_mask/domino_pro", "random"]
+SEED = 0
+CHUNK_SIZE = 250            # Partidas por tarea enviada al pool
+
+FORMATS = {
+    # formato: (jugadores, equipos, agentes necesarios)
+    "1v1": (2, False, 2),
+    "ffa": (4, False, 4),
+    "2v2": (4, True, 2),
+}
+
+
+# --- AGENTES ---
+class RandomAgent:
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+
+    def choose_move(self, game):
+        moves = game.get_valid_moves(game.current_player)
+        return self.rng.choice(moves) if moves else None
+
+
+class GreedyAgent:
+    """Suelta primero la ficha que más puntos vale (dobles en caso de empate)."""
+    def choose_move(self, game):
+        moves = game.get_valid_moves(game.current_player)
+        if not moves:
+            return None
+        return max(moves, key=lambda m: (m[0][0] + m[0][1], m[0][0] == m[0][1]))
+
+
+class PPOAgent:
+    """Política entrenada; con endgame_tiles > 0 el final lo juega el solver exacto, como MCTSPlayer."""
+    def __init__(self, path, endgame_tiles=0, seed=None):
+        from domino_numpy_policy import load_policy
+        if not path.endswith(".npz"):
+            import torch
+            torch.set_num_threads(1)  # La paralelización viene de los procesos del pool
+        self.model = load_policy(path)
+        self.endgame_tiles = endgame_tiles
+        self.endgame = None
+        if endgame_tiles:
+            from domino_endgame import EndgameSolver
+            self.endgame = EndgameSolver(seed=seed)
+
+    def choose_move(self, game):
+        player = game.current_player
+        moves = game.get_valid_moves(player)
+        if len(moves) <= 1:
+            return moves[0] if moves else None
+        if self.endgame is not None:
+            from domino_endgame import endgame_move
+            move = endgame_move(self.endgame, game, self.endgame_tiles)
+            if move is not None:
+                return move
+        action, _ = self.model.predict(encode_obs(game, player), action_masks=encode_mask(moves),
+                                       deterministic=True)
+        action = int(action)
+        return ACTION_TILES[action], ACTION_SIDES[action]
+
+
+def make_agent(spec, seed, book=None, endgame_tiles=ENDGAME_TILES):
+    """
+    Crea un agente a partir de su descripción:
+    "random", "greedy", "mcts[:rollouts]" o "ppo:ruta_modelo" (".npz" = runtime NumPy).
+    book: ruta de un libro de aperturas (domino_book) para los agentes MCTS.
+    endgame_tiles: fichas en manos a partir de las que los agentes MCTS y PPO
+        usan el solver exacto (0 = nunca).
+    """
+    kind, _, arg = spec.partition(":")
+    if kind == "random":
+        return RandomAgent(seed)
+    if kind == "greedy":
+        return GreedyAgent()
+    if kind == "mcts":
+        if book is not None:
+            from domino_book import OpeningBook
+            book = OpeningBook(book)
+        return MCTSPlayer(rollouts=int(arg) if arg else 500, seed=seed, book=book, endgame_tiles=endgame_tiles)
+    if kind == "ppo":
+        return PPOAgent(arg or "modelos_domino_mask/domino_pro", endgame_tiles, seed)
+    raise ValueError(f"Agente desconocido: {spec}")
+
+
+# --- TRABAJADORES ---
+_worker_agents = None
+
+
+def _init_worker(specs, seed, profile=False, book=None, endgame_tiles=ENDGAME_TILES):
+    # Los modelos no se pueden serializar: cada proceso crea sus agentes una vez
+    global _worker_agents
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    _worker_agents = [make_agent(s, seed + i, book, endgame_tiles) for i, s in enumerate(specs)]
+    if profile:
+        from domino_profiler import enable, instrument
+        enable()
+        for agent in _worker_agents:
+            if isinstance(agent, PPOAgent):
+                instrument(agent.model, "predict", "inference")
+
+
+def seat_lineup(fmt, game_idx, num_agents):
+    """Agente que ocupa cada asiento; rota con la partida para repartir la ventaja de salida."""
+    num_players, teams, _ = FORMATS[fmt]
+    if teams:
+        a, b = (0, 1) if game_idx % 2 == 0 else (1, 0)
+        return [a, b, a, b]
+    shift = game_idx % num_agents
+    return [(seat + shift) % num_agents for seat in range(num_players)]
+
+
+def game_seed(seed, game_idx):
+    """Semilla determinista por partida: se puede repetir cualquier partida suelta."""
+    return seed * 1_000_003 + game_idx
+
+
+def play_games(fmt, game_ids, seed, record=False, profile=False):
+    """
+    Juega las partidas de índices `game_ids` y devuelve sus estadísticas, el
+    conjunto de agentes ganadores de cada una como bits (agente a -> 1 << a),
+    los registros binarios de las partidas si record (si no b"") y, con
+    profile, el desglose por fases de este lote (si no None).
+    """
+    num_players, teams, _ = FORMATS[fmt]
+    agents = _worker_agents
+    if profile:
+        from domino_profiler import PROFILER
+        PROFILER.reset()
+    recorder = GameRecorder() if record else None
+    wins = np.zeros(len(agents), dtype=np.int64)
+    played = np.zeros(len(agents), dtype=np.int64)
+    latencies = [[] for _ in agents]
+    outcomes = np.zeros(len(game_ids), dtype=np.uint8)
+
+    # Todos los repartos del lote de una vez; cada uno depende solo de su semilla
+    seeds = [game_seed(seed, g) for g in game_ids]
+    orders, lots = seeded_deals(seeds)
+    game = DominoGame(num_players, teams, recorder=recorder)
+
+    for k, game_idx in enumerate(game_ids):
+        random.seed(seeds[k])
+        for i, agent in enumerate(agents):
+            if hasattr(agent, 'rng'):
+                agent.rng.seed(seeds[k] * 31 + i)
+            if getattr(agent, 'endgame', None) is not None:
+                # El solver muestrea mundos con su propio generador
+                agent.endgame.rng.seed(seeds[k] * 37 + i)
+        game.reset(deal=(orders[k], lots[k]))
+        lineup = seat_lineup(fmt, game_idx, len(agents))
+
+        while not game.game_over:
+            a = lineup[game.current_player]
+            t0 = time.perf_counter()
+            move = agents[a].choose_move(game)
+            latencies[a].append(time.perf_counter() - t0)
+            game.step(move)
+
+        winners = {lineup[p] for p in range(num_players) if player_won(game, p)}
+        for a in set(lineup):
+            played[a] += 1
+            if a in winners:
+                wins[a] += 1
+                outcomes[k] |= 1 << a
+
+    records = recorder.take() if recorder is not None else b""
+    phases = PROFILER.report() if profile else None
+    return wins, played, [np.array(l, dtype=np.float32) for l in latencies], outcomes, records, phases
+
+
+def wilson_interval(wins, n, z=1.96):
+    """Intervalo de confianza de Wilson (95% por defecto) para una proporción."""
+    if n == 0:
+        return 0.0, 0.0
+    p = wins / n
+    denom = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return centre - half, centre + half
+
+
+def run_tournament(agents, fmt=FORMAT, num_games=NUM_GAMES, seed=SEED, workers=None, chunk_size=CHUNK_SIZE,
+                   record=None, profile=False, book=None, game_ids=None, endgame_tiles=ENDGAME_TILES):
+    """
+    game_ids: índices de las partidas a jugar (por defecto 0..num_games-1). Con
+        la misma semilla cada índice repite exactamente su partida, p.ej. las
+        que perdió un checkpoint nuevo (report['game_ids'] y report['winners']).
+    record: ruta de un archivo de partidas (domino_records) donde añadir todas las partidas jugadas.
+    profile: añade al informe 'profile' con el tiempo por fase (domino_profiler) total y por proceso.
+    book: libro de aperturas (domino_book) que consultan los agentes MCTS antes de buscar.
+    endgame_tiles: umbral del solver exacto de los agentes MCTS y PPO (0 = nunca).
+    """
+    num_players, teams, needed = FORMATS[fmt]
+    if len(agents) != needed:
+        raise ValueError(f"El formato {fmt} necesita {needed} agentes (recibidos {len(agents)})")
+
+    game_ids = list(range(num_games)) if game_ids is None else [int(g) for g in game_ids]
+    num_games = len(game_ids)
+    workers = workers or os.cpu_count()
+    wins = np.zeros(len(agents), dtype=np.int64)
+    played = np.zeros(len(agents), dtype=np.int64)
+    latencies = [[] for _ in agents]
+    outcomes = []
+    phases = []
+
+    start = time.time()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(agents, seed, profile, book, endgame_tiles)) as pool:
+        futures = [pool.submit(play_games, fmt, game_ids[s:s + chunk_size], seed, record is not None, profile)
+                   for s in range(0, num_games, chunk_size)]
+        for fut in futures:
+            w, p, lat, task_outcomes, records, task_phases = fut.result()
+            outcomes.append(task_outcomes)
+            if task_phases is not None:
+                phases.append(task_phases)
+            if records:
+                # En orden de partida: el archivo es igual con cualquier número de procesos
+                append_records(record, records)
+            wins += w
+            played += p
+            for i, l in enumerate(lat):
+                latencies[i].append(l)
+    total = time.time() - start
+
+    results = []
+    for i, spec in enumerate(agents):
+        lat = np.concatenate(latencies[i]) * 1000.0 if latencies[i] else np.zeros(1)
+        lo, hi = wilson_interval(wins[i], played[i])
+        results.append({
+            'agent': spec,
+            'wins': int(wins[i]),
+            'games': int(played[i]),
+            'win_rate': wins[i] / played[i] if played[i] else 0.0,
+            'ci95': (lo, hi),
+            'latency_ms': {q: float(np.percentile(lat, q)) for q in (50, 90, 99)},
+        })
+    report = {'results': results, 'games': num_games, 'seconds': total, 'games_per_sec': num_games / total,
+              'game_ids': np.array(game_ids, dtype=np.int64), 'winners': np.concatenate(outcomes)}
+    if profile:
+        from domino_profiler import merge_reports
+        report['profile'] = merge_reports(phases)
+    return report
+
+
+def regressed_games(before, after, agent=0):
+    """Índices de las partidas que `agent` ganaba en el informe `before` y pierde en `after` (misma semilla)."""
+    won_before = dict(zip(before['game_ids'].tolist(), (before['winners'] >> agent) & 1))
+    return [g for g, w in zip(after['game_ids'].tolist(), (after['winners'] >> agent) & 1)
+            if won_before.get(g) and not w]
+
+
+def parse_ids(spec):
+    """"3,10-12" -> [3, 10, 11, 12]."""
+    ids = []
+    for part in spec.split(","):
+        a, _, b = part.partition("-")
+        ids.extend(range(int(a), int(b or a) + 1))
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Torneo paralelo y reproducible entre agentes de dominó")
+    parser.add_argument("agents", nargs="*", default=AGENTS,
+                        help='random | greedy | mcts[:rollouts] | ppo:ruta (sin ".zip", o un .npz exportado)')
+    parser.add_argument("--format", default=FORMAT, choices=sorted(FORMATS))
+    parser.add_argument("--games", type=int, default=NUM_GAMES)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--record", default=None, help="Archivo binario donde guardar las partidas")
+    parser.add_argument("--profile", default=None, metavar="JSON",
+                        help="Medir el tiempo por fase en cada proceso y guardarlo en este JSON")
+    parser.add_argument("--book", default=None, help="Libro de aperturas para los agentes MCTS")
+    parser.add_argument("--endgame-tiles", type=int, default=ENDGAME_TILES, metavar="N",
+                        help="Con N fichas en manos o menos, MCTS y PPO juegan con el solver exacto (0 = nunca)")
+    parser.add_argument("--only", default=None, metavar="IDS",
+                        help='Jugar solo estas partidas, p.ej. "3,10-12" (mismos repartos que en el torneo completo)')
+    parser.add_argument("--outcomes", default=None, metavar="NPZ",
+                        help="Guardar el índice y los ganadores de cada partida (para comparar checkpoints)")
+    args = parser.parse_args()
+    game_ids = parse_ids(args.only) if args.only else None
+
+    num_games = len(game_ids) if game_ids else args.games
+    print(f"🏟️  TORNEO {args.format.upper()} | {num_games} partidas | semilla {args.seed}")
+    print("=" * 60)
+    report = run_tournament(args.agents, args.format, args.games, args.seed, args.workers, record=args.record,
+                            profile=args.profile is not None, book=args.book, game_ids=game_ids,
+                            endgame_tiles=args.endgame_tiles)
+
+    for r in report['results']:
+        lo, hi = r['ci95']
+        lat = r['latency_ms']
+        print(f"🎮 {r['agent']}")
+        print(f"   Victorias: {r['wins']}/{r['games']} ({r['win_rate'] * 100:.2f}%, IC95 {lo * 100:.2f}-{hi * 100:.2f}%)")
+        print(f"   Latencia por decisión: p50 {lat[50]:.3f} ms | p90 {lat[90]:.3f} ms | p99 {lat[99]:.3f} ms")
+    print("-" * 60)
+    print(f"⏱️  {report['seconds']:.1f} s ({report['games_per_sec']:,.0f} partidas/s)")
+    if args.record:
+        print(f"💾 Partidas guardadas en {args.record}")
+    if args.outcomes:
+        np.savez(args.outcomes, game_ids=report['game_ids'], winners=report['winners'])
+        print(f"📝 Resultado de cada partida guardado en {args.outcomes}")
+    if args.profile:
+        from domino_profiler import print_report, write_json
+        print_report(report['profile'])
+        write_json(args.profile, report['profile'])
+        print(f"📝 Perfil de {len(report['profile']['workers'])} procesos guardado en {args.profile}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,14 @@ from sb3_contrib import MaskablePPO
 from sb3_contrib.common.wrappers import ActionMasker
 from stable_baselines3.common.vec_env import SubprocVecEnv # Importante para Multiproceso
 from stable_baselines3.common.callbacks import CheckpointCallback
+from domino_engine import MAX_PIP
 from domino_gym import DominoEnv
+from domino_vec_env import DominoVecEnv
+from domino_batch import evaluate_policy
+from domino_league import OpponentPool, LeagueVecEnv, LeagueCallback
+from domino_snapshot import (SnapshotCallback, ignore_stop_signals, latest_snapshot, list_snapshots, load_snapshot,
+                             snapshot_steps)
+from domino_profiler import ProfilerCallback, attach_worker
 
 # --- OPTIMIZACIÓN DE CPU PARA i9-13900H ---
 # Al usar multiproceso (SubprocVecEnv), NO queremos que PyTorch use 
@@ -15,9 +22,46 @@ os.environ["MKL_NUM_THREADS"] = "1"
 os.environ["OPENBLAS_NUM_THREADS"] = "1" 
 # ------------------------------------------
 
+# VecEnv nativo: todas las partidas en un proceso con NumPy (sin pickling ni pipes).
+# Poner en False para volver a SubprocVecEnv + ActionMasker.
+USE_NATIVE_VEC_ENV = True
+NATIVE_NUM_ENVS = 256
+NATIVE_N_STEPS = 128  # 256 x 128 = 32k transiciones por rollout (12 x 2048 = 24k con Subproc)
+EVAL_GAMES = 1000     # Partidas de la evaluación final (en lote)
+
+# Liga de autojuego (requiere el VecEnv nativo): el modelo solo juega el asiento 0 y
+# los demás los ocupan checkpoints congelados de logs_dir, elegidos según lo que ganan.
+USE_LEAGUE = False
+LEAGUE_POOL_SIZE = 10
+
+# Snapshots reanudables (pesos, optimizador, RNGs y partidas en curso) cada
+# SNAPSHOT_EVERY_S segundos y al recibir Ctrl+C / SIGTERM. Con RESUME se continúa
+# desde el último snapshot de snapshots_dir (idéntico con el VecEnv nativo).
+TOTAL_TIMESTEPS = 1_000_000
+RESUME = True
+SNAPSHOT_EVERY_S = 600
+
+# Arranque en caliente: pesos de la política preentrenada con domino_bc.py (None = desde cero).
+# domino_bc clona partidas de 4 jugadores sin equipos, las mismas que se entrenan aquí;
+# con otro formato (ARCHIVE_FORMAT) no conviene usarla de punto de partida
+PRETRAINED_PATH = "modelos_domino_mask/domino_bc"
+
+# Perfilado por fases (generación de jugadas, observaciones, máscaras, motor, inferencia):
+# se registra en TensorBoard como profile/* y el acumulado por proceso en logs_dir/profile.json
+PROFILE = False
+
+# Currículo: primero doble seis (partidas más cortas, menos estados, converge antes)
+# y luego doble nueve. Todas las etapas usan la plantilla de observación y acciones
+# del doble LAYOUT_PIP (133 floats y 110 acciones), así la misma red pasa de una a
+# otra sin tocar sus pesos. Cada etapa es (max_pip, paso en que termina); None = TOTAL_TIMESTEPS.
+CURRICULUM = False
+CURRICULUM_STAGES = [(6, 300_000), (9, None)]
+LAYOUT_PIP = 9
+
 # Directorios
 models_dir = "modelos_domino_mask"
 logs_dir = "logs_domino_mask"
+snapshots_dir = "snapshots_domino"
 
 if not os.path.exists(models_dir):
     os.makedirs(models_dir)
@@ -27,7 +71,7 @@ if not os.path.exists(logs_dir):
 def mask_fn(env: DominoEnv):
     return env.action_masks()
 
-def make_env(rank):
+def make_env(rank, max_pip=MAX_PIP):
     """
     Función factory para crear entornos con semilla única por proceso.
     rank: índice del proceso (0 a 11)
@@ -35,55 +79,141 @@ def make_env(rank):
     def _init():
         # Importamos dentro para evitar problemas con 'spawn' en Windows/Linux
         from domino_gym import DominoEnv
-        env = DominoEnv()
+        # Ctrl+C / SIGTERM los gestiona el proceso principal (snapshot al terminar el rollout)
+        ignore_stop_signals()
+        env = DominoEnv(max_pip=max_pip, layout_pip=LAYOUT_PIP)
         env = ActionMasker(env, mask_fn)
+        if PROFILE:
+            attach_worker(env)
         return env
     return _init
 
-def main():
-    print(f"🚀 Iniciando entrenamiento OPTIMIZADO PARA i9-13900H")
-    print(f"🔧 Modo: Multiproceso Real (Subprocess)")
-    
+def make_vec_env(max_pip, pool=None):
+    """VecEnv de entrenamiento con fichas del doble max_pip: (env, num_envs, n_steps)."""
+    if USE_NATIVE_VEC_ENV:
+        num_envs = NATIVE_NUM_ENVS
+        if USE_LEAGUE:
+            env = LeagueVecEnv(num_envs, pool, max_pip=max_pip, layout_pip=LAYOUT_PIP)
+        else:
+            env = DominoVecEnv(num_envs, max_pip=max_pip, layout_pip=LAYOUT_PIP)
+        return env, num_envs, NATIVE_N_STEPS
+
     # NÚMERO DE TRABAJADORES (NUM_ENVS)
     # Un i9-13900H tiene 14 núcleos. Usamos 12 para dejar margen al sistema.
     # Esto creará 12 partidas jugando simultáneamente.
-    num_envs = 12 
-    
-    print(f"⚡ {num_envs} Entornos paralelos activos")
-    
+    num_envs = 12
     # Usamos SubprocVecEnv para eludir el GIL de Python
-    env = SubprocVecEnv([make_env(i) for i in range(num_envs)])
-
-    # Configuración del Modelo
-    # learning_rate lento para estabilidad
-    model = MaskablePPO(
-        "MlpPolicy", 
-        env, 
-        verbose=1, 
-        device='cpu', # Mantenemos CPU por compatibilidad, el i9 es una bestia en FP32
-        learning_rate=0.0001,
-        gamma=0.99,
-        tensorboard_log=logs_dir
-    )
+    return SubprocVecEnv([make_env(i, max_pip) for i in range(num_envs)]), num_envs, 2048
+
+
+def training_stages():
+    """[(max_pip, paso final)]; sin currículo, una sola etapa de doble nueve."""
+    stages = CURRICULUM_STAGES if CURRICULUM else [(MAX_PIP, None)]
+    return [(max_pip, TOTAL_TIMESTEPS if end is None else min(end, TOTAL_TIMESTEPS)) for max_pip, end in stages]
+
+
+def resume_stage(stages, done):
+    """Índice de la etapa que contiene el paso done (la última si ya se pasaron todas)."""
+    return next((i for i, (_, end) in enumerate(stages) if done < end), len(stages) - 1)
+
+
+def main():
+    print(f"🚀 Iniciando entrenamiento OPTIMIZADO PARA i9-13900H")
+
+    pool = None
+    if USE_NATIVE_VEC_ENV:
+        print(f"🔧 Modo: VecEnv nativo (NumPy, un solo proceso)")
+        print(f"⚡ {NATIVE_NUM_ENVS} Partidas simultáneas en lote")
+        if USE_LEAGUE:
+            pool = OpponentPool(max_size=LEAGUE_POOL_SIZE)
+            pool.refresh(logs_dir)
+            print(f"🏟️  Liga de autojuego: {len(pool)} rivales iniciales")
+    else:
+        print(f"🔧 Modo: Multiproceso Real (Subprocess)")
+
+    stages = training_stages()
+    if CURRICULUM:
+        print("🎓 Currículo: " + " -> ".join(f"doble {p} hasta {end:,}" for p, end in stages))
+
+    snapshot = latest_snapshot(snapshots_dir) if RESUME else None
+    # Se reanuda en la etapa del snapshot: su VecEnv es el que tenía las partidas en curso
+    done = snapshot_steps(snapshot) if snapshot is not None else 0
+    stage = resume_stage(stages, done)
+    env, num_envs, n_steps = make_vec_env(stages[stage][0], pool)
+    if not USE_NATIVE_VEC_ENV:
+        print(f"⚡ {num_envs} Entornos paralelos activos")
+
+    if snapshot is not None:
+        model = load_snapshot(snapshot, env)
+        print(f"♻️  Reanudando desde {snapshot} ({model.num_timesteps:,} pasos)")
+    else:
+        # Configuración del Modelo
+        # learning_rate lento para estabilidad
+        model = MaskablePPO(
+            "MlpPolicy", 
+            env, 
+            verbose=1, 
+            device='cpu', # Mantenemos CPU por compatibilidad, el i9 es una bestia en FP32
+            learning_rate=0.0001,
+            n_steps=n_steps,
+            gamma=0.99,
+            tensorboard_log=logs_dir
+        )
+        if PRETRAINED_PATH and os.path.exists(PRETRAINED_PATH + ".zip"):
+            # Solo los pesos: el optimizador de PPO empieza de cero
+            pretrained = MaskablePPO.load(PRETRAINED_PATH, device='cpu')
+            model.policy.load_state_dict(pretrained.policy.state_dict())
+            print(f"🎓 Política inicial de {PRETRAINED_PATH} (behavior cloning)")
 
     # Callback para guardar checkpoints cada 200k pasos (ahora que es más rápido)
+    # save_freq cuenta llamadas a step() del VecEnv, no pasos totales
     checkpoint_callback = CheckpointCallback(
-        save_freq=200_000, 
+        save_freq=max(200_000 // num_envs, 1), 
         save_path=logs_dir,
         name_prefix="domino_checkpoint"
     )
 
+    snapshot_callback = SnapshotCallback(snapshots_dir, interval_s=SNAPSHOT_EVERY_S, verbose=1)
+    callbacks = [checkpoint_callback, snapshot_callback]
+    if USE_NATIVE_VEC_ENV and USE_LEAGUE:
+        # Antes de cada rollout entran en la liga los checkpoints recién guardados
+        callbacks.append(LeagueCallback(pool, logs_dir, verbose=1))
+    if PROFILE:
+        callbacks.append(ProfilerCallback(os.path.join(logs_dir, "profile.json"), verbose=1))
+
     start_time = time.time()
-    
-    print("📊 Comenzando entrenamiento de 1,000,000 pasos...")
-    
-    # ENTRENAMIENTO
-    model.learn(
-        total_timesteps=1_000_000, 
-        callback=checkpoint_callback,
-        progress_bar=True
-    )
-    
+    predict = lambda obs, masks: model.predict(obs, action_masks=masks, deterministic=True)[0]
+
+    for i in range(stage, len(stages)):
+        max_pip, end = stages[i]
+        if i > stage:
+            # Nueva etapa: mismos pesos y optimizador, partidas del juego siguiente
+            env.close()
+            env, num_envs, n_steps = make_vec_env(max_pip, pool)
+            model.set_env(env)
+        remaining = end - model.num_timesteps
+        if remaining <= 0:
+            continue
+
+        print(f"📊 Comenzando entrenamiento de {remaining:,} pasos (doble {max_pip})...")
+
+        # ENTRENAMIENTO
+        model.learn(
+            total_timesteps=remaining,
+            callback=callbacks,
+            progress_bar=True,
+            reset_num_timesteps=snapshot is None and i == 0
+        )
+
+        if snapshot_callback.stopped:
+            print(f"⏸️  Entrenamiento interrumpido en {model.num_timesteps:,} pasos. Vuelve a lanzar el script para reanudar.")
+            return
+
+        if CURRICULUM and i < len(stages) - 1:
+            wins, _ = evaluate_policy(predict, EVAL_GAMES, num_players=4, max_pip=max_pip, layout_pip=LAYOUT_PIP)
+            print(f"🎓 Fin de la etapa doble {max_pip}: {wins}/{EVAL_GAMES} victorias contra 3 bots aleatorios "
+                  f"({wins / EVAL_GAMES * 100:.1f}%)")
+
     total_time = time.time() - start_time
     print(f"✅ Entrenamiento completado en {total_time/60:.2f} minutos.")
     
@@ -91,21 +221,15 @@ def main():
     model.save(f"{models_dir}/domino_pro")
     print("✅ Modelo final guardado.")
 
+    # La ejecución terminó: sus snapshots ya no sirven para reanudar
+    for path in list_snapshots(snapshots_dir):
+        os.remove(path)
+
     # --- TEST RÁPIDO ---
     print("\n--- TEST DE VERIFICACIÓN ---")
-    # Usamos un solo entorno para probar al final
-    env_test = make_env(0)()
-    obs, _ = env_test.reset()
-    
-    for i in range(5): 
-        action_masks = env_test.action_masks()
-        if not any(action_masks):
-            print("Paso")
-            obs, _, done, _, _ = env_test.step(0)
-        else:
-            action, _ = model.predict(obs, action_masks=action_masks, deterministic=True)
-            obs, _, done, _, _ = env_test.step(action)
-        if done: break
+    # Partidas en lote contra bots aleatorios: una sola inferencia por paso para todas
+    wins, _ = evaluate_policy(predict, EVAL_GAMES, num_players=4, layout_pip=LAYOUT_PIP)
+    print(f"🏆 {wins}/{EVAL_GAMES} victorias contra 3 bots aleatorios ({wins / EVAL_GAMES * 100:.1f}%)")
 
 if __name__ == "__main__":
     # Requerido para SubprocVecEnv en Windows